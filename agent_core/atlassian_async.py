@@ -0,0 +1,400 @@
+# agent_core/atlassian_async.py
+"""
+Clientes REST asíncronos para Jira y Confluence sobre `httpx.AsyncClient`.
+
+Cubren los endpoints que usan las herramientas (JQL, issue, worklog, transiciones,
+búsqueda de usuarios, búsqueda CQL y lectura/actualización de páginas) y replican
+los nombres de método y la forma de las respuestas de `atlassian-python-api`,
+para que las herramientas puedan hacer `await` directo sin ocupar hilos del
+ThreadPoolExecutor por defecto.
+
+Los clientes se agrupan por (event loop, URL, usuario, huella del token): un
+`httpx.AsyncClient` solo puede usarse dentro del loop en el que abrió sus conexiones.
+"""
+
+import asyncio
+import threading
+from collections import OrderedDict, deque
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import logfire
+
+from agent_core.client_registry import token_fingerprint
+from config import settings
+from config.request_context import resolve_atlassian_credentials
+
+
+class AsyncAtlassianClient:
+    """Base común: sesión HTTP asíncrona con auth básica y pool de conexiones acotado."""
+
+    def __init__(self, url: str, username: str, token: str):
+        self.url = url.rstrip("/")
+        self.username = username
+        self._http = httpx.AsyncClient(
+            base_url=self.url,
+            auth=(username, token),
+            headers={"Accept": "application/json", "Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=settings.ATLASSIAN_ASYNC_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.ATLASSIAN_ASYNC_MAX_KEEPALIVE,
+            ),
+            timeout=settings.ATLASSIAN_HTTP_TIMEOUT_SECONDS,
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self._http.is_closed
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        json: Optional[Any] = None,
+    ) -> Any:
+        """Ejecuta la petición y retorna el JSON (o None si la respuesta no tiene cuerpo)."""
+        # Quitar parámetros vacíos para no enviar `expand=None` y similares
+        clean_params = {k: v for k, v in (params or {}).items() if v is not None}
+        response = await self._http.request(method, "/" + path.lstrip("/"), params=clean_params, json=json)
+        response.raise_for_status()
+        if response.status_code == 204 or not response.content:
+            return None
+        return response.json()
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        return await self.request("GET", path, params=params)
+
+
+class AsyncJiraClient(AsyncAtlassianClient):
+    """Subconjunto asíncrono de `atlassian.Jira` usado por las herramientas."""
+
+    async def myself(self) -> Dict[str, Any]:
+        return await self.get("rest/api/2/myself")
+
+    async def jql(
+        self,
+        jql: str,
+        fields: Any = "*all",
+        start: int = 0,
+        limit: Optional[int] = None,
+        expand: Optional[str] = None,
+        validate_query: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if isinstance(fields, (list, tuple, set)):
+            fields = ",".join(fields)
+        params = {"jql": jql, "fields": fields, "startAt": start, "maxResults": limit, "expand": expand,
+                  "validateQuery": validate_query}
+        return await self.get("rest/api/2/search", params=params)
+
+    async def jql_page_token(
+        self,
+        jql: str,
+        fields: Any = "*all",
+        next_page_token: Optional[str] = None,
+        limit: Optional[int] = None,
+        expand: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Búsqueda con paginación por token (`/search/jql`); no informa `total`."""
+        if isinstance(fields, (list, tuple, set)):
+            fields = ",".join(fields)
+        params = {"jql": jql, "fields": fields, "nextPageToken": next_page_token, "maxResults": limit, "expand": expand}
+        return await self.get("rest/api/2/search/jql", params=params)
+
+    async def iter_jql(
+        self,
+        jql: str,
+        fields: Any = "*all",
+        max_results: Optional[int] = None,
+        page_size: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        expand: Optional[str] = None,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Recorre todas las páginas de una búsqueda JQL y entrega los issues crudos en orden.
+
+        Con paginación `startAt` la primera página informa el total y el resto se pide
+        en paralelo (hasta `concurrency` páginas en vuelo). Con `nextPageToken` las
+        páginas se siguen en secuencia. Cortar la iteración cancela las páginas pendientes.
+        """
+        page_size = page_size or settings.JIRA_SEARCH_PAGE_SIZE
+        concurrency = max(1, concurrency or settings.JIRA_SEARCH_MAX_CONCURRENT_PAGES)
+        if max_results is not None:
+            page_size = max(1, min(page_size, max_results))
+        remaining = max_results if max_results is not None else float("inf")
+
+        if settings.JIRA_SEARCH_TOKEN_PAGINATION:
+            token: Optional[str] = None
+            while remaining > 0:
+                page = await self.jql_page_token(jql, fields, next_page_token=token, limit=page_size, expand=expand)
+                for issue in (page or {}).get("issues", [])[: int(min(remaining, page_size))]:
+                    remaining -= 1
+                    yield issue
+                token = (page or {}).get("nextPageToken")
+                if not token or (page or {}).get("isLast"):
+                    return
+            return
+
+        first = await self.jql(jql, fields, start=0, limit=page_size, expand=expand) or {}
+        first_issues = first.get("issues", [])
+        for issue in first_issues[: int(min(remaining, len(first_issues)))]:
+            remaining -= 1
+            yield issue
+        # Jira puede devolver menos issues por página de los pedidos: usar el tamaño real
+        effective_page = len(first_issues)
+        total = first.get("total", 0)
+        if remaining <= 0 or effective_page == 0 or total <= effective_page:
+            return
+
+        last_index = min(total, effective_page + remaining)
+        starts = iter(range(effective_page, int(last_index), effective_page))
+        pending: "deque[asyncio.Task]" = deque()
+
+        def _schedule_next() -> bool:
+            start = next(starts, None)
+            if start is None:
+                return False
+            pending.append(asyncio.ensure_future(
+                self.jql(jql, fields, start=start, limit=effective_page, expand=expand)
+            ))
+            return True
+
+        try:
+            for _ in range(concurrency):
+                if not _schedule_next():
+                    break
+            while pending and remaining > 0:
+                page = await pending.popleft() or {}
+                _schedule_next()
+                for issue in page.get("issues", []):
+                    if remaining <= 0:
+                        break
+                    remaining -= 1
+                    yield issue
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def issue(self, key: str, fields: Any = "*all", expand: Optional[str] = None) -> Dict[str, Any]:
+        if isinstance(fields, (list, tuple, set)):
+            fields = ",".join(fields)
+        return await self.get(f"rest/api/2/issue/{key}", params={"fields": fields, "expand": expand})
+
+    async def issue_get_worklog(self, issue_key: str) -> Dict[str, Any]:
+        return await self.get(f"rest/api/2/issue/{issue_key}/worklog")
+
+    async def iter_issue_worklogs(self, issue_key: str, page_size: int = 1000) -> AsyncIterator[Dict[str, Any]]:
+        """Recorre todos los worklogs de un issue siguiendo la paginación startAt/total."""
+        start = 0
+        while True:
+            page = await self.get(
+                f"rest/api/2/issue/{issue_key}/worklog",
+                params={"startAt": start, "maxResults": page_size},
+            ) or {}
+            worklogs = page.get("worklogs", [])
+            for worklog in worklogs:
+                yield worklog
+            start += len(worklogs)
+            if not worklogs or start >= page.get("total", 0):
+                return
+
+    async def worklog_updated_since(self, since_ms: int) -> Dict[str, Any]:
+        """IDs de worklogs actualizados desde `since_ms` (epoch en ms), paginado por `until`/`lastPage`."""
+        return await self.get("rest/api/2/worklog/updated", params={"since": since_ms})
+
+    async def worklog_deleted_since(self, since_ms: int) -> Dict[str, Any]:
+        """IDs de worklogs eliminados desde `since_ms` (epoch en ms)."""
+        return await self.get("rest/api/2/worklog/deleted", params={"since": since_ms})
+
+    async def worklog_list(self, ids: List[int]) -> List[Dict[str, Any]]:
+        """Obtiene hasta 1000 worklogs completos por ID en una sola llamada."""
+        return await self.request("POST", "rest/api/2/worklog/list", json={"ids": ids}) or []
+
+    async def issue_add_comment(self, issue_key: str, comment: str) -> Dict[str, Any]:
+        return await self.request("POST", f"rest/api/2/issue/{issue_key}/comment", json={"body": comment})
+
+    async def update_issue_field(self, key: str, fields: Dict[str, Any]) -> Any:
+        return await self.request("PUT", f"rest/api/2/issue/{key}", json={"fields": fields})
+
+    async def get_issue_transitions(self, issue_key: str) -> List[Dict[str, Any]]:
+        # Misma forma que atlassian-python-api: 'to' es el nombre del estado destino
+        data = await self.get(f"rest/api/2/issue/{issue_key}/transitions", params={"expand": "transitions.fields"})
+        return [
+            {
+                "name": transition["name"],
+                "id": int(transition["id"]),
+                "to": transition.get("to", {}).get("name"),
+                "hasScreen": transition.get("hasScreen", False),
+                "fields": transition.get("fields", {}),
+            }
+            for transition in (data or {}).get("transitions", [])
+        ]
+
+    async def set_issue_status_by_transition_id(self, issue_key: str, transition_id: int) -> Any:
+        return await self.request(
+            "POST",
+            f"rest/api/2/issue/{issue_key}/transitions",
+            json={"transition": {"id": str(transition_id)}},
+        )
+
+    async def user(self, account_id: str) -> Dict[str, Any]:
+        return await self.get("rest/api/2/user", params={"accountId": account_id})
+
+    async def user_find_by_user_string(
+        self,
+        query: str,
+        start: int = 0,
+        limit: int = 50,
+        include_inactive_users: bool = False,
+    ) -> List[Dict[str, Any]]:
+        params = {
+            "query": query,
+            "startAt": start,
+            "maxResults": limit,
+            "includeInactive": str(include_inactive_users).lower(),
+        }
+        return await self.get("rest/api/2/user/search", params=params)
+
+
+class AsyncConfluenceClient(AsyncAtlassianClient):
+    """Subconjunto asíncrono de `atlassian.Confluence` usado por las herramientas."""
+
+    def __init__(self, url: str, username: str, token: str):
+        # Igual que atlassian-python-api: en Cloud la API REST vive bajo /wiki
+        if ("atlassian.net" in url or "jira.com" in url) and "/wiki" not in url:
+            url = url.rstrip("/") + "/wiki"
+        super().__init__(url, username, token)
+
+    async def cql(
+        self,
+        cql: str,
+        start: int = 0,
+        limit: Optional[int] = None,
+        expand: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        params = {"cql": cql, "start": start, "limit": limit, "expand": expand}
+        return await self.get("rest/api/content/search", params=params)
+
+    async def get_page_by_id(self, page_id: str, expand: Optional[str] = None) -> Dict[str, Any]:
+        return await self.get(f"rest/api/content/{page_id}", params={"expand": expand})
+
+    async def update_page(
+        self,
+        page_id: str,
+        title: str,
+        body: str,
+        representation: str = "storage",
+        version_comment: Optional[str] = None,
+        minor_edit: bool = False,
+    ) -> Dict[str, Any]:
+        current = await self.get_page_by_id(page_id, expand="version,ancestors")
+        version = {"number": current["version"]["number"] + 1, "minorEdit": minor_edit}
+        if version_comment:
+            version["message"] = version_comment
+        data = {
+            "id": page_id,
+            "type": current.get("type", "page"),
+            "title": title,
+            "body": {representation: {"value": body, "representation": representation}},
+            "version": version,
+        }
+        if current.get("ancestors"):
+            data["ancestors"] = [{"type": "page", "id": current["ancestors"][-1]["id"]}]
+        return await self.request("PUT", f"rest/api/content/{page_id}", json=data)
+
+
+_AsyncKey = Tuple[int, str, str, str]
+
+
+class _AsyncClientPool:
+    """
+    Pool LRU de clientes asíncronos por (loop, URL, usuario, huella del token).
+    Las entradas de loops ya cerrados se descartan al consultar.
+    """
+
+    def __init__(self, client_cls: type, max_size: int):
+        self._client_cls = client_cls
+        self._max_size = max(1, max_size)
+        self._entries: "OrderedDict[_AsyncKey, Tuple[asyncio.AbstractEventLoop, AsyncAtlassianClient]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url: str, username: str, token: str) -> AsyncAtlassianClient:
+        loop = asyncio.get_running_loop()
+        key = (id(loop), url.rstrip("/"), username, token_fingerprint(token))
+        with self._lock:
+            self._drop_dead_loops()
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is loop and not entry[1].is_closed:
+                self._entries.move_to_end(key)
+                return entry[1]
+            client = self._client_cls(url, username, token)
+            self._entries[key] = (loop, client)
+            while len(self._entries) > self._max_size:
+                _, (old_loop, old_client) = self._entries.popitem(last=False)
+                self._schedule_close(old_loop, old_client)
+        logfire.debug("Cliente HTTP asíncrono {cls} creado para {user}", cls=self._client_cls.__name__, user=username)
+        return client
+
+    def invalidate(self, username: Optional[str] = None) -> int:
+        with self._lock:
+            keys = [key for key in self._entries if username is None or key[2] == username]
+            removed = [self._entries.pop(key) for key in keys]
+        for loop, client in removed:
+            self._schedule_close(loop, client)
+        return len(removed)
+
+    def _drop_dead_loops(self) -> None:
+        """Debe llamarse con el lock tomado."""
+        dead = [key for key, (loop, _) in self._entries.items() if loop.is_closed()]
+        for key in dead:
+            self._entries.pop(key)
+
+    @staticmethod
+    def _schedule_close(loop: asyncio.AbstractEventLoop, client: AsyncAtlassianClient) -> None:
+        # Cerrar en su propio loop; si ya no corre, el GC libera las conexiones
+        if loop.is_closed():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(client.aclose(), loop)
+        except RuntimeError:
+            pass
+
+
+_jira_async_pool = _AsyncClientPool(AsyncJiraClient, settings.ATLASSIAN_CLIENT_CACHE_MAX_SIZE)
+_confluence_async_pool = _AsyncClientPool(AsyncConfluenceClient, settings.ATLASSIAN_CLIENT_CACHE_MAX_SIZE)
+
+
+def get_async_jira_client(username: Optional[str] = None, api_key: Optional[str] = None) -> AsyncJiraClient:
+    """
+    Retorna un cliente Jira asíncrono reutilizable para el loop actual.
+    Mismo criterio de credenciales que `get_jira_client`; debe llamarse dentro de una corrutina.
+    """
+    username, api_key = resolve_atlassian_credentials(username, api_key)
+    jira_url = settings.JIRA_URL
+    jira_user = username if username else settings.JIRA_USERNAME
+    jira_token = api_key if api_key else settings.JIRA_API_TOKEN
+    if not all([jira_url, jira_user, jira_token]):
+        raise ValueError("Credenciales de Jira no configuradas completamente. Revisa tu configuración.")
+    return _jira_async_pool.get(jira_url, jira_user, jira_token)
+
+
+def get_async_confluence_client(username: Optional[str] = None, api_key: Optional[str] = None) -> AsyncConfluenceClient:
+    """
+    Retorna un cliente Confluence asíncrono reutilizable para el loop actual.
+    Mismo criterio de credenciales que `get_confluence_client`; debe llamarse dentro de una corrutina.
+    """
+    username, api_key = resolve_atlassian_credentials(username, api_key)
+    confluence_url = settings.CONFLUENCE_URL
+    confluence_user = username if username else settings.CONFLUENCE_USERNAME
+    confluence_token = api_key if api_key else settings.CONFLUENCE_API_TOKEN
+    if not all([confluence_url, confluence_user, confluence_token]):
+        raise ValueError("Credenciales de Confluence no configuradas completamente. Revisa tu configuración.")
+    return _confluence_async_pool.get(confluence_url, confluence_user, confluence_token)
+
+
+def invalidate_async_clients(username: Optional[str] = None) -> int:
+    """Descarta los clientes asíncronos (Jira y Confluence) de un usuario, o todos."""
+    return _jira_async_pool.invalidate(username) + _confluence_async_pool.invalidate(username)
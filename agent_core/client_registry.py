@@ -0,0 +1,176 @@
+# agent_core/client_registry.py
+"""
+Registro de clientes Atlassian reutilizables a nivel de proceso.
+
+Mantiene una instancia por (URL base, usuario, huella del token) para conservar
+las sesiones HTTP (keep-alive) entre llamadas a herramientas, valida las
+credenciales una sola vez por TTL y descarta entradas inactivas con LRU.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import logfire
+import requests
+from requests.adapters import HTTPAdapter
+
+ClientKey = Tuple[str, str, str]
+
+
+def token_fingerprint(token: str) -> str:
+    """Devuelve una huella corta del token para usarla como clave sin guardarlo en claro."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()[:16]
+
+
+def build_pooled_session(pool_maxsize: int) -> requests.Session:
+    """
+    Crea una sesión `requests` con un pool de conexiones acotado por host.
+    Con `pool_block=True` las peticiones esperan una conexión libre en lugar de abrir conexiones extra.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(1, pool_maxsize), pool_block=True)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@dataclass
+class _RegistryEntry:
+    client: Any
+    validated_at: float
+    last_used: float
+
+
+class AtlassianClientRegistry:
+    """
+    Cache LRU thread-safe de clientes autenticados.
+
+    - `factory(url, username, token)` construye un cliente nuevo.
+    - `validator(client)` prueba las credenciales (ej. `/myself`); debe lanzar excepción si fallan.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        factory: Callable[[str, str, str], Any],
+        validator: Callable[[Any], Any],
+        max_size: int,
+        validation_ttl_seconds: int,
+        idle_timeout_seconds: int,
+    ):
+        self.name = name
+        self._factory = factory
+        self._validator = validator
+        self._max_size = max(1, max_size)
+        self._validation_ttl = validation_ttl_seconds
+        self._idle_timeout = idle_timeout_seconds
+        self._entries: "OrderedDict[ClientKey, _RegistryEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, username: str, token: str) -> ClientKey:
+        return (url.rstrip("/"), username, token_fingerprint(token))
+
+    def get(self, url: str, username: str, token: str) -> Any:
+        """Retorna un cliente validado, reutilizando el existente si sigue vigente."""
+        key = self.make_key(url, username, token)
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                entry.last_used = now
+                if now - entry.validated_at < self._validation_ttl:
+                    return entry.client
+
+        if entry is not None:
+            # Entrada conocida pero con validación vencida: revalidar sin reconstruir la sesión
+            try:
+                with logfire.span(f"{self.name}_client.revalidation", user=username):
+                    self._validator(entry.client)
+            except Exception:
+                self._discard(key)
+                raise
+            with self._lock:
+                entry.validated_at = time.monotonic()
+            return entry.client
+
+        with logfire.span(f"{self.name}_client.initialization", user=username):
+            client = self._factory(url, username, token)
+            try:
+                self._validator(client)
+            except Exception:
+                self._close_client(client)
+                raise
+
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None:
+                # Otro hilo creó el cliente mientras validábamos: usar el suyo
+                self._close_client(client)
+                existing.last_used = time.monotonic()
+                self._entries.move_to_end(key)
+                return existing.client
+            stamp = time.monotonic()
+            self._entries[key] = _RegistryEntry(client=client, validated_at=stamp, last_used=stamp)
+            while len(self._entries) > self._max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._close_client(evicted.client)
+        logfire.debug("{registry}: cliente registrado para {user} ({size} en cache)",
+                      registry=self.name, user=username, size=len(self._entries))
+        return client
+
+    def invalidate(self, username: Optional[str] = None, url: Optional[str] = None) -> int:
+        """
+        Elimina los clientes de un usuario (o todos si no se indica usuario).
+        Retorna la cantidad de entradas eliminadas.
+        """
+        with self._lock:
+            keys = [
+                key for key in self._entries
+                if (username is None or key[1] == username)
+                and (url is None or key[0] == url.rstrip("/"))
+            ]
+            removed = [self._entries.pop(key) for key in keys]
+        for entry in removed:
+            self._close_client(entry.client)
+        if removed:
+            logfire.info("{registry}: {count} clientes invalidados para {user}",
+                         registry=self.name, count=len(removed), user=username or "*")
+        return len(removed)
+
+    def clear(self) -> None:
+        self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"registry": self.name, "size": len(self._entries), "max_size": self._max_size}
+
+    def _discard(self, key: ClientKey) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._close_client(entry.client)
+
+    def _evict_idle(self, now: float) -> None:
+        """Debe llamarse con el lock tomado."""
+        if self._idle_timeout <= 0:
+            return
+        idle_keys = [key for key, entry in self._entries.items() if now - entry.last_used > self._idle_timeout]
+        for key in idle_keys:
+            self._close_client(self._entries.pop(key).client)
+
+    @staticmethod
+    def _close_client(client: Any) -> None:
+        close = getattr(client, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
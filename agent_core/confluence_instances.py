@@ -4,6 +4,8 @@ from atlassian import Confluence
 from config import settings
 import logfire
 from typing import Optional
+from agent_core.client_registry import AtlassianClientRegistry, build_pooled_session
+from config.request_context import resolve_atlassian_credentials
 
 # Configuración condicional de Logfire para evitar duplicados
 def _configure_logfire_if_needed():
@@ -28,13 +30,46 @@ def _configure_logfire_if_needed():
 _configure_logfire_if_needed()
 
 # --- Confluence Client Instance ---
+# Registro de clientes a nivel de proceso: una sesión HTTP caliente por (URL, usuario, token)
+
+def _build_confluence_client(url: str, username: str, token: str) -> Confluence:
+    return Confluence(
+        url=url,
+        username=username,
+        password=token, # API Token
+        cloud=True, # Assuming Confluence Cloud. Adjust if using Server.
+        session=build_pooled_session(settings.ATLASSIAN_HTTP_POOL_MAXSIZE)
+    )
+
+def _validate_confluence_client(client: Confluence) -> None:
+    # Probar la conexión intentando obtener al menos un espacio (una vez por TTL)
+    # Esta prueba es importante para asegurar que las credenciales (de usuario o globales) son válidas
+    spaces_data = client.get_all_spaces(limit=1)
+    if spaces_data and spaces_data.get('results'):
+        logfire.info(f"Cliente Confluence validado para el usuario {client.username}. Acceso a espacios confirmado.")
+    elif spaces_data:
+        logfire.info(f"Cliente Confluence validado para {client.username}. Conexión establecida, pero no se encontraron espacios accesibles o la respuesta está vacía.")
+    else:
+        logfire.warn(f"Cliente Confluence inicializado para {client.username}, pero get_all_spaces no devolvió datos. Verificar permisos.")
+
+_confluence_client_registry = AtlassianClientRegistry(
+    name="confluence",
+    factory=_build_confluence_client,
+    validator=_validate_confluence_client,
+    max_size=settings.ATLASSIAN_CLIENT_CACHE_MAX_SIZE,
+    validation_ttl_seconds=settings.ATLASSIAN_CLIENT_VALIDATION_TTL_SECONDS,
+    idle_timeout_seconds=settings.ATLASSIAN_CLIENT_IDLE_TIMEOUT_SECONDS,
+)
 
 def get_confluence_client(username: Optional[str] = None, api_key: Optional[str] = None) -> Confluence:
     """
     Retorna una instancia inicializada y autenticada del cliente Confluence.
     Si se proveen username y api_key, se usan esas credenciales.
-    De lo contrario, recurre a las configuraciones globales en settings.
+    De lo contrario, usa las de la petición en curso (config/request_context.py)
+    y, si no hay, recurre a las configuraciones globales en settings.
+    La instancia se reutiliza entre llamadas mientras las credenciales no cambien.
     """
+    username, api_key = resolve_atlassian_credentials(username, api_key)
     confluence_url = settings.CONFLUENCE_URL
     confluence_user = username if username else settings.CONFLUENCE_USERNAME
     confluence_token = api_key if api_key else settings.CONFLUENCE_API_TOKEN
@@ -46,27 +81,18 @@ def get_confluence_client(username: Optional[str] = None, api_key: Optional[str]
         raise ValueError("Credenciales de Confluence no configuradas completamente. Revisa tu configuración.")
     
     try:
-        with logfire.span("confluence_client.initialization", user=confluence_user):
-            client = Confluence(
-                url=confluence_url,
-                username=confluence_user,
-                password=confluence_token, # API Token
-                cloud=True # Assuming Confluence Cloud. Adjust if using Server.
-            )
-            # Probar la conexión intentando obtener al menos un espacio
-            # Esta prueba es importante para asegurar que las credenciales (de usuario o globales) son válidas
-            spaces_data = client.get_all_spaces(limit=1)
-            if spaces_data and spaces_data.get('results'):
-                logfire.info(f"Cliente Confluence inicializado y conectado exitosamente para el usuario {confluence_user}. Acceso a espacios confirmado.")
-            elif spaces_data:
-                logfire.info(f"Cliente Confluence inicializado para {confluence_user}. Conexión establecida, pero no se encontraron espacios accesibles o la respuesta está vacía.")
-            else:
-                logfire.warn(f"Cliente Confluence inicializado para {confluence_user}, pero get_all_spaces no devolvió datos. Verificar permisos.")
-            return client
+        return _confluence_client_registry.get(confluence_url, confluence_user, confluence_token)
     except Exception as e:
         logfire.error(f"Error al inicializar el cliente Confluence para {confluence_user}: {e}", exc_info=True)
         raise ConnectionError(f"No se pudo conectar a Confluence para {confluence_user}: {e}")
 
+def invalidate_confluence_client(username: Optional[str] = None) -> int:
+    """
+    Descarta los clientes Confluence cacheados de un usuario (o todos si no se indica).
+    Debe llamarse cuando el usuario rota o elimina su API token.
+    """
+    return _confluence_client_registry.invalidate(username=username)
+
 def check_confluence_connection(username: Optional[str] = None, api_key: Optional[str] = None) -> tuple[bool, str]:
     """
     Verifica la conexión con Confluence intentando obtener información del servidor.
@@ -0,0 +1,187 @@
+# agent_core/history_manager.py
+"""
+Gestión del historial de conversación que se reenvía al modelo en cada turno.
+
+Sin límites, `pydantic_ai_messages` crece linealmente y arrastra payloads de
+herramientas enormes (ej. `body_storage` de Confluence). Tras cada turno:
+
+1. Se estiman los tokens de cada mensaje (~4 caracteres por token).
+2. En los turnos antiguos, los retornos de herramientas se reemplazan por un
+   resumen corto (nombre de la herramienta + inicio del contenido).
+3. Si aun así se excede el presupuesto, los turnos más antiguos se condensan en
+   un resumen extractivo (pregunta y respuesta recortadas) que se conserva junto
+   al system prompt original, para que el tamaño del prompt se mantenga estable.
+"""
+
+import json
+from dataclasses import replace
+from typing import List
+
+import logfire
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    SystemPromptPart,
+    TextPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+
+from config import settings
+
+CHARS_PER_TOKEN = 4
+SUMMARY_HEADER = "Resumen de la conversación anterior (turnos condensados):"
+DIGEST_PREFIX = "[Resultado resumido de "
+
+
+def _part_text(part) -> str:
+    if isinstance(part, ToolReturnPart):
+        try:
+            return part.model_response_str()
+        except Exception:
+            return str(part.content)
+    if isinstance(part, ToolCallPart):
+        args = part.args
+        return part.tool_name + (args if isinstance(args, str) else json.dumps(args, ensure_ascii=False, default=str))
+    content = getattr(part, "content", "")
+    return content if isinstance(content, str) else str(content)
+
+
+def estimate_message_tokens(message: ModelMessage) -> int:
+    return sum(len(_part_text(part)) for part in message.parts) // CHARS_PER_TOKEN + 1
+
+
+def estimate_tokens(messages: List[ModelMessage]) -> int:
+    return sum(estimate_message_tokens(message) for message in messages)
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "…"
+
+
+def _is_turn_start(message: ModelMessage) -> bool:
+    return isinstance(message, ModelRequest) and any(isinstance(p, UserPromptPart) for p in message.parts)
+
+
+class ConversationHistoryManager:
+    """Mantiene el historial dentro de un presupuesto de tokens sin romper pares llamada/retorno de herramientas."""
+
+    def __init__(
+        self,
+        max_tokens: int,
+        keep_recent_turns: int,
+        tool_return_max_chars: int,
+        summary_max_chars: int,
+        summary_chars_per_turn: int = 300,
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.tool_return_max_chars = tool_return_max_chars
+        self.summary_max_chars = summary_max_chars
+        self.summary_chars_per_turn = summary_chars_per_turn
+
+    def _split_turns(self, messages: List[ModelMessage]) -> List[List[ModelMessage]]:
+        """Agrupa mensajes por turno: cada turno empieza con un request que trae el prompt del usuario."""
+        turns: List[List[ModelMessage]] = []
+        for message in messages:
+            if not turns or _is_turn_start(message):
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _digest_tool_returns(self, turn: List[ModelMessage]) -> List[ModelMessage]:
+        digested: List[ModelMessage] = []
+        for message in turn:
+            if isinstance(message, ModelRequest):
+                parts = []
+                for part in message.parts:
+                    if isinstance(part, ToolReturnPart) and not (
+                            isinstance(part.content, str) and part.content.startswith(DIGEST_PREFIX)):
+                        text = _part_text(part)
+                        if len(text) > self.tool_return_max_chars:
+                            part = replace(part, content=(
+                                f"{DIGEST_PREFIX}{part.tool_name}: "
+                                f"{_truncate(text, self.tool_return_max_chars)} "
+                                f"({len(text)} caracteres originales omitidos)]"
+                            ))
+                    parts.append(part)
+                message = replace(message, parts=parts)
+            digested.append(message)
+        return digested
+
+    def _summarize_turn(self, turn: List[ModelMessage]) -> str:
+        question = ""
+        answer = ""
+        tools: List[str] = []
+        for message in turn:
+            for part in message.parts:
+                if isinstance(part, UserPromptPart) and not question:
+                    # El prompt del usuario va al final (después del contexto de memoria)
+                    question = _part_text(part).strip().split("\n\n")[-1]
+                elif isinstance(part, ToolCallPart):
+                    tools.append(part.tool_name)
+                elif isinstance(message, ModelResponse) and isinstance(part, TextPart):
+                    answer = part.content
+        half = self.summary_chars_per_turn // 2
+        line = f"- Usuario: {_truncate(question, half)} | Agente: {_truncate(answer, half)}"
+        if tools:
+            line += f" (herramientas: {', '.join(dict.fromkeys(tools))})"
+        return line
+
+    def compact(self, messages: List[ModelMessage]) -> List[ModelMessage]:
+        """Retorna un historial acotado listo para reenviar al modelo."""
+        if not messages:
+            return messages
+        tokens_before = estimate_tokens(messages)
+        turns = self._split_turns(messages)
+
+        # System prompt original y resumen previo (si ya se compactó antes)
+        system_parts: List[SystemPromptPart] = []
+        summary_lines: List[str] = []
+        first = turns[0][0]
+        if isinstance(first, ModelRequest):
+            for part in first.parts:
+                if isinstance(part, SystemPromptPart):
+                    if part.content.startswith(SUMMARY_HEADER):
+                        summary_lines.extend(line for line in part.content.splitlines()[1:] if line)
+                    else:
+                        system_parts.append(part)
+
+        recent_start = max(0, len(turns) - self.keep_recent_turns)
+        turns = [self._digest_tool_returns(turn) if i < recent_start else turn for i, turn in enumerate(turns)]
+
+        condensed = 0
+        while len(turns) > self.keep_recent_turns and \
+                sum(estimate_tokens(turn) for turn in turns) > self.max_tokens:
+            summary_lines.append(self._summarize_turn(turns.pop(0)))
+            condensed += 1
+
+        if not condensed and not summary_lines:
+            result = [message for turn in turns for message in turn]
+        else:
+            summary_text = "\n".join(summary_lines)
+            if len(summary_text) > self.summary_max_chars:
+                summary_text = summary_text[-self.summary_max_chars:].split("\n", 1)[-1]
+            head = turns[0][0]
+            body_parts = [p for p in head.parts if not isinstance(p, SystemPromptPart)]
+            new_head = replace(head, parts=system_parts + [SystemPromptPart(content=f"{SUMMARY_HEADER}\n{summary_text}")] + body_parts)
+            result = [new_head] + turns[0][1:] + [message for turn in turns[1:] for message in turn]
+
+        tokens_after = estimate_tokens(result)
+        if condensed or tokens_after < tokens_before:
+            logfire.info("Historial compactado: {before} → {after} tokens estimados, {condensed} turnos condensados",
+                         before=tokens_before, after=tokens_after, condensed=condensed)
+        return result
+
+
+# Instancia global
+history_manager = ConversationHistoryManager(
+    max_tokens=settings.HISTORY_MAX_TOKENS,
+    keep_recent_turns=settings.HISTORY_KEEP_RECENT_TURNS,
+    tool_return_max_chars=settings.HISTORY_TOOL_RETURN_MAX_CHARS,
+    summary_max_chars=settings.HISTORY_SUMMARY_MAX_CHARS,
+)
@@ -0,0 +1,240 @@
+# agent_core/intent_router.py
+"""
+Router determinista para comandos triviales, antes de `main_agent`.
+
+Pedidos como "PROJ-123", "log 2h on PROJ-45" o "mueve PROJ-9 a Done" no necesitan
+un paso de planificación del LLM: se reconocen con patrones de alta confianza y se
+llama directamente a la herramienta de `tools/jira_tools.py` (pasando por el
+planificador de herramientas, igual que si la pidiera el agente).
+
+Solo se reconoce el mensaje del usuario completo (sin el contexto de memoria que
+arma la UI): "no lo hagas todavía:\n\nmove PROJ-9 to Done" va al agente. Las
+escrituras se atajan solo en el primer turno (o con INTENT_ROUTER_WRITE_ROUTES_WITH_HISTORY),
+porque en medio de una conversación el pedido puede depender de lo anterior.
+
+Cualquier cosa ambigua (tiempo no reconocido, transición inexistente o repetida,
+transición con campos obligatorios, error de Jira en una lectura) retorna None y
+el pedido sigue su camino normal por el agente.
+"""
+
+import re
+import time
+import unicodedata
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+import logfire
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, UserPromptPart
+
+from agent_core.tool_scheduler import get_tool_access, is_mutating_tool, tool_scheduler
+from config import settings
+from tools.jira_tools import (
+    _parse_time_spent_to_seconds,
+    add_worklog_to_jira_issue,
+    get_issue_details,
+    get_issue_transitions,
+    transition_issue,
+)
+
+_KEY = r"(?P<key>[A-Za-z][A-Za-z0-9_]*-\d+)"
+
+# Solo la clave del issue (opcionalmente con signo de pregunta)
+_ISSUE_KEY_ONLY = re.compile(rf"^\s*{_KEY}\s*\??\s*$")
+
+# "log 2h on PROJ-45", "registra 1h 30m en PROJ-45", "imputar 45m a PROJ-45"
+_WORKLOG = re.compile(
+    rf"^\s*(?:log|registra(?:r)?|imputa(?:r)?|carga(?:r)?)\s+(?P<time>\d[\dhms ]*?)\s+"
+    rf"(?:on|to|en|a)\s+{_KEY}\s*\.?\s*$",
+    re.IGNORECASE,
+)
+
+# "move PROJ-9 to Done", "mueve PROJ-9 a En curso", "pasa PROJ-9 a 'Done'"
+_TRANSITION = re.compile(
+    rf"^\s*(?:move|mueve|mover|pasa|pasar|transiciona(?:r)?)\s+(?:el\s+issue\s+|issue\s+)?{_KEY}\s+"
+    rf"(?:to|a|al)\s+(?:estado\s+|status\s+)?[\"'“]?(?P<status>[^\"'”]+?)[\"'”]?\s*\.?\s*$",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class RoutedCommand:
+    """Comando reconocido sin LLM."""
+    tool_name: str
+    issue_key: str
+    time_spent: Optional[str] = None
+    target_status: Optional[str] = None
+
+
+@dataclass
+class RoutedResult:
+    """Resultado del atajo, con la misma interfaz que usa la UI para un AgentRunResult."""
+    output: str
+    messages: List[ModelMessage] = field(default_factory=list)
+    tool_name: str = ""
+
+    def new_messages(self) -> List[ModelMessage]:
+        return list(self.messages)
+
+    def usage(self) -> str:
+        return "fast-path"
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return " ".join("".join(ch for ch in text if not unicodedata.combining(ch)).split())
+
+
+def _friendly_seconds(seconds: int) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes = rest // 60
+    return " ".join(part for part in (f"{hours}h" if hours else "", f"{minutes}m" if minutes else "") if part) or f"{seconds}s"
+
+
+def match_command(text: str) -> Optional[RoutedCommand]:
+    """Reconoce un comando de alta confianza en el texto del usuario; None si no hay coincidencia."""
+    text = text.strip()
+    if not text or "\n" in text:
+        return None
+
+    match = _ISSUE_KEY_ONLY.match(text)
+    if match:
+        return RoutedCommand("get_issue_details", match.group("key").upper())
+
+    match = _WORKLOG.match(text)
+    if match:
+        time_spent = " ".join(match.group("time").split())
+        try:
+            if _parse_time_spent_to_seconds(time_spent) <= 0:
+                return None
+        except ValueError:
+            return None
+        return RoutedCommand("add_worklog_to_jira_issue", match.group("key").upper(), time_spent=time_spent)
+
+    match = _TRANSITION.match(text)
+    if match:
+        return RoutedCommand("transition_issue", match.group("key").upper(), target_status=match.group("status").strip())
+
+    return None
+
+
+class IntentRouter:
+    """Ejecuta los comandos reconocidos por `match_command` llamando directo a las herramientas."""
+
+    def __init__(self, enabled: bool = True, write_routes_with_history: bool = False):
+        self.enabled = enabled
+        self.write_routes_with_history = write_routes_with_history
+
+    @staticmethod
+    async def _call(tool_name: str, func, **kwargs):
+        return await tool_scheduler.run(tool_name, get_tool_access(tool_name), lambda: func(**kwargs))
+
+    async def _issue_details(self, command: RoutedCommand) -> Optional[str]:
+        details = await self._call("get_issue_details", get_issue_details, issue_key=command.issue_key)
+        if details.status == "ERROR":
+            return None
+        if details.status == "NOT_FOUND":
+            return f"No se encontró el issue **{command.issue_key}**."
+        lines = [
+            f"**{details.key}** - {details.summary}",
+            f"*   **Estado:** {details.status or 'Desconocido'}",
+            f"*   **Responsable:** {details.assignee or 'No asignado'}",
+        ]
+        if details.story_points is not None:
+            lines.append(f"*   **Story Points:** {details.story_points}")
+        if details.duedate:
+            lines.append(f"*   **Vencimiento:** {details.duedate}")
+        if details.description:
+            lines.append(f"\n{details.description}")
+        return "\n".join(lines)
+
+    async def _add_worklog(self, command: RoutedCommand) -> str:
+        worklog = await self._call(
+            "add_worklog_to_jira_issue", add_worklog_to_jira_issue,
+            issue_key=command.issue_key, time_spent=command.time_spent,
+            started_datetime_str=None, comment=None, confirm=False,
+        )
+        if worklog.id == "ERROR":
+            return f"❌ No se pudo registrar el tiempo en **{command.issue_key}**: {worklog.comment}"
+        seconds = worklog.time_spent_seconds or _parse_time_spent_to_seconds(command.time_spent)
+        return (f"✅ Registré **{_friendly_seconds(seconds)}** en **{command.issue_key}** "
+                f"(worklog {worklog.id}, inicio {worklog.started}).")
+
+    async def _transition(self, command: RoutedCommand) -> Optional[str]:
+        transitions = await self._call("get_issue_transitions", get_issue_transitions, issue_key=command.issue_key)
+        if transitions.current_status.id == "error":
+            return None
+        target = _normalize(command.target_status)
+        if _normalize(transitions.current_status.name) == target:
+            return f"**{command.issue_key}** ya está en estado **{transitions.current_status.name}**."
+        candidates = [
+            t for t in transitions.available_transitions
+            if target in (_normalize(t.name), _normalize(t.to_status.name))
+        ]
+        # Ambigua, inexistente o con campos a completar: que el agente muestre las opciones
+        if len({t.to_status.id for t in candidates}) != 1 or candidates[0].has_screen or candidates[0].required_fields:
+            return None
+        chosen = candidates[0]
+        result = await self._call(
+            "transition_issue", transition_issue,
+            issue_key=command.issue_key, transition_id=chosen.id, comment=None, additional_fields=None,
+        )
+        if not result.get("success"):
+            return f"❌ No se pudo mover **{command.issue_key}** a {chosen.to_status.name}: {result.get('error')}"
+        return f"✅ **{command.issue_key}** movido a **{result.get('new_status', chosen.to_status.name)}** (transición '{chosen.name}')."
+
+    async def try_route(
+        self,
+        user_prompt: str,
+        message_history: Optional[List[ModelMessage]] = None,
+    ) -> Optional[RoutedResult]:
+        """
+        Intenta resolver sin LLM el mensaje del usuario tal como lo escribió (sin contexto
+        agregado). Retorna None para que siga por el agente.
+        """
+        if not self.enabled:
+            return None
+        command = match_command(user_prompt)
+        if command is None:
+            return None
+        if message_history and is_mutating_tool(command.tool_name) and not self.write_routes_with_history:
+            logfire.info("Atajo {tool} para {issue_key} delegado al agente (conversación en curso)",
+                         tool=command.tool_name, issue_key=command.issue_key)
+            return None
+
+        handlers = {
+            "get_issue_details": self._issue_details,
+            "add_worklog_to_jira_issue": self._add_worklog,
+            "transition_issue": self._transition,
+        }
+        started_at = time.perf_counter()
+        try:
+            output = await handlers[command.tool_name](command)
+        except Exception as e:
+            if is_mutating_tool(command.tool_name):
+                # Una escritura pudo haberse aplicado: no se reintenta vía agente
+                logfire.error("Error en atajo {tool} para {issue_key}: {error}",
+                              tool=command.tool_name, issue_key=command.issue_key, error=str(e), exc_info=True)
+                output = f"❌ Error al ejecutar el comando sobre **{command.issue_key}**: {e}"
+            else:
+                logfire.warn("Atajo {tool} falló, se delega al agente: {error}", tool=command.tool_name, error=str(e))
+                return None
+        if output is None:
+            logfire.info("Atajo {tool} para {issue_key} delegado al agente (caso ambiguo)",
+                         tool=command.tool_name, issue_key=command.issue_key)
+            return None
+
+        logfire.info("Comando resuelto sin LLM: {tool} {issue_key} en {elapsed_ms:.0f} ms",
+                     tool=command.tool_name, issue_key=command.issue_key,
+                     elapsed_ms=(time.perf_counter() - started_at) * 1000)
+        messages = [
+            ModelRequest(parts=[UserPromptPart(content=user_prompt)]),
+            ModelResponse(parts=[TextPart(content=output)]),
+        ]
+        return RoutedResult(output=output, messages=messages, tool_name=command.tool_name)
+
+
+# Instancia global
+intent_router = IntentRouter(
+    enabled=settings.INTENT_ROUTER_ENABLED,
+    write_routes_with_history=settings.INTENT_ROUTER_WRITE_ROUTES_WITH_HISTORY,
+)
@@ -2,6 +2,8 @@ from atlassian import Jira
 from config import settings
 import logfire
 from typing import Optional
+from agent_core.client_registry import AtlassianClientRegistry, build_pooled_session
+from config.request_context import resolve_atlassian_credentials
 
 # Configuración condicional de Logfire para evitar duplicados
 def _configure_logfire_if_needed():
@@ -26,17 +28,40 @@ def _configure_logfire_if_needed():
 _configure_logfire_if_needed()
 
 # --- JIRA Client Instance ---
-# _jira_client = None # Eliminamos el singleton global
+# Registro de clientes a nivel de proceso: una sesión HTTP caliente por (URL, usuario, token)
+
+def _build_jira_client(url: str, username: str, token: str) -> Jira:
+    return Jira(
+        url=url,
+        username=username,
+        password=token, # 'password' se usa para el API token aquí
+        cloud=True, # Asumimos Jira Cloud, ajustar si es Server
+        session=build_pooled_session(settings.ATLASSIAN_HTTP_POOL_MAXSIZE)
+    )
+
+def _validate_jira_client(client: Jira) -> None:
+    # Probar la conexión una sola vez por TTL en lugar de en cada llamada
+    user_info = client.myself()
+    logfire.info(f"Cliente Jira validado para el usuario {client.username} (displayName: {user_info.get('displayName')})")
+
+_jira_client_registry = AtlassianClientRegistry(
+    name="jira",
+    factory=_build_jira_client,
+    validator=_validate_jira_client,
+    max_size=settings.ATLASSIAN_CLIENT_CACHE_MAX_SIZE,
+    validation_ttl_seconds=settings.ATLASSIAN_CLIENT_VALIDATION_TTL_SECONDS,
+    idle_timeout_seconds=settings.ATLASSIAN_CLIENT_IDLE_TIMEOUT_SECONDS,
+)
 
 def get_jira_client(username: Optional[str] = None, api_key: Optional[str] = None) -> Jira:
     """
     Retorna una instancia inicializada y autenticada del cliente Jira.
     Si se proveen username y api_key, se usan esas credenciales.
-    De lo contrario, recurre a las configuraciones globales en settings.
+    De lo contrario, usa las de la petición en curso (config/request_context.py)
+    y, si no hay, recurre a las configuraciones globales en settings.
+    La instancia se reutiliza entre llamadas mientras las credenciales no cambien.
     """
-    # global _jira_client # Ya no es global
-    # if _jira_client is None: # Ya no es singleton
-
+    username, api_key = resolve_atlassian_credentials(username, api_key)
     jira_url = settings.JIRA_URL
     jira_user = username if username else settings.JIRA_USERNAME
     jira_token = api_key if api_key else settings.JIRA_API_TOKEN
@@ -48,22 +73,17 @@ def get_jira_client(username: Optional[str] = None, api_key: Optional[str] = Non
         raise ValueError("Credenciales de Jira no configuradas completamente. Revisa tu configuración.")
     
     try:
-        with logfire.span("jira_client.initialization", user=jira_user):
-            client = Jira(
-                url=jira_url,
-                username=jira_user,
-                password=jira_token, # 'password' se usa para el API token aquí
-                cloud=True # Asumimos Jira Cloud, ajustar si es Server
-            )
-            # Probar la conexión (opcional pero recomendado)
-            user_info = client.myself()
-            logfire.info(f"Cliente Jira inicializado y conectado exitosamente para el usuario {jira_user} (displayName: {user_info.get('displayName')})")
-            return client
+        return _jira_client_registry.get(jira_url, jira_user, jira_token)
     except Exception as e:
         logfire.error(f"Error al inicializar el cliente Jira para {jira_user}: {e}", exc_info=True)
-        # _jira_client = None # Ya no es global
         raise ConnectionError(f"No se pudo conectar a Jira para {jira_user}: {e}")
-    # return _jira_client # Ya no es global
+
+def invalidate_jira_client(username: Optional[str] = None) -> int:
+    """
+    Descarta los clientes Jira cacheados de un usuario (o todos si no se indica).
+    Útil cuando el usuario rota su API token.
+    """
+    return _jira_client_registry.invalidate(username=username)
 
 def check_jira_connection(username: Optional[str] = None, api_key: Optional[str] = None) -> tuple[bool, str]:
     """
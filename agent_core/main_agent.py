@@ -9,6 +9,9 @@ from pydantic_ai.messages import ToolReturnPart
 # Importar funciones de health check
 from agent_core.jira_instances import check_jira_connection
 from agent_core.confluence_instances import check_confluence_connection
+from agent_core.tool_compaction import CompactionSpec, compact_tool, get_tool_result_page as get_tool_result_page_tool_func
+from agent_core.tool_scheduler import read_only, mutating
+from agent_core.tool_catalog import tool_catalog, load_tool_group as load_tool_group_tool_func
 
 # NUEVO: Sistema de logging e instrumentación avanzada
 from config.logging_context import logger, log_operation, log_system_event
@@ -18,12 +21,14 @@ from config.logfire_instrumentation import get_instrumentation, setup_applicatio
 from tools.jira_tools import (
     search_issues as jira_search_issues_tool_func,
     get_issue_details as jira_get_issue_details_tool_func,
+    get_issues_details_batch as jira_get_issues_details_batch_tool_func,
     add_comment_to_jira_issue as jira_add_comment_tool_func,
     add_worklog_to_jira_issue as jira_add_worklog_tool_func,
     # create_jira_issue as jira_create_issue_tool_func # Descomentar cuando esté lista
     get_user_hours_on_story as get_user_hours_on_story_tool_func,
     get_child_issues_status as get_child_issues_status_tool_func,
     get_all_worklog_hours_for_issue as get_all_worklog_hours_for_issue_tool_func,
+    get_worklog_hours_report as get_worklog_hours_report_tool_func,
     # === NUEVAS HERRAMIENTAS DE BÚSQUEDA DE USUARIOS ===
     search_jira_users as search_jira_users_tool_func,
     validate_jira_user as validate_jira_user_tool_func,
@@ -83,57 +88,75 @@ def _configure_advanced_logfire():
 _configure_advanced_logfire()
 
 # --- Definición de Herramientas para PydanticAI ---
+# Cada herramienta se anota como de lectura (read_only, corre en paralelo) o de escritura
+# (mutating, serializada por usuario); ver agent_core/tool_scheduler.py.
+# Las herramientas con resultados voluminosos se registran con compactación (agent_core/tool_compaction.py)
+# Todas pasan por el catálogo (prepare): grupos especializados bajo demanda y esquemas recortados
 # Jira Tools
-jira_search_tool = Tool(jira_search_issues_tool_func)
-jira_details_tool = Tool(jira_get_issue_details_tool_func)
-jira_add_comment_tool = Tool(jira_add_comment_tool_func)
-jira_add_worklog_tool = Tool(jira_add_worklog_tool_func)
+jira_search_tool = Tool(read_only(compact_tool(jira_search_issues_tool_func)), prepare=tool_catalog.prepare)
+jira_details_tool = Tool(read_only(jira_get_issue_details_tool_func), prepare=tool_catalog.prepare)
+jira_details_batch_tool = Tool(read_only(compact_tool(jira_get_issues_details_batch_tool_func)), prepare=tool_catalog.prepare)
+jira_add_comment_tool = Tool(mutating(jira_add_comment_tool_func), prepare=tool_catalog.prepare)
+jira_add_worklog_tool = Tool(mutating(jira_add_worklog_tool_func), prepare=tool_catalog.prepare)
 # jira_create_issue_tool = Tool(jira_create_issue_tool_func) # Descomentar cuando esté lista
-get_child_issues_status_tool = Tool(get_child_issues_status_tool_func)
+get_child_issues_status_tool = Tool(read_only(get_child_issues_status_tool_func), prepare=tool_catalog.prepare)
 
 # Confluence Tools
-confluence_search_tool = Tool(conf_search_pages_tool_func)
-confluence_content_tool = Tool(conf_get_page_content_tool_func)
-confluence_create_page_tool = Tool(conf_create_page_tool_func)
-confluence_update_page_tool = Tool(conf_update_page_tool_func)
+confluence_search_tool = Tool(read_only(compact_tool(conf_search_pages_tool_func)), prepare=tool_catalog.prepare)
+confluence_content_tool = Tool(read_only(compact_tool(conf_get_page_content_tool_func, CompactionSpec(max_string_chars=4000))), prepare=tool_catalog.prepare)
+confluence_create_page_tool = Tool(mutating(conf_create_page_tool_func), prepare=tool_catalog.prepare)
+confluence_update_page_tool = Tool(mutating(conf_update_page_tool_func), prepare=tool_catalog.prepare)
 
 # Time Tools
-get_current_datetime_tool = Tool(get_current_datetime_tool_func)
+get_current_datetime_tool = Tool(read_only(get_current_datetime_tool_func), prepare=tool_catalog.prepare)
 
 # Mem0 Tools
-save_memory_tool = Tool(save_memory_tool_func)
-search_memory_tool = Tool(search_memory_tool_func)
+save_memory_tool = Tool(mutating(save_memory_tool_func), prepare=tool_catalog.prepare)
+search_memory_tool = Tool(read_only(search_memory_tool_func), prepare=tool_catalog.prepare)
 # Nueva herramienta Jira: horas trabajadas por usuario en una historia
-get_user_hours_on_story_tool = Tool(get_user_hours_on_story_tool_func)
+get_user_hours_on_story_tool = Tool(read_only(get_user_hours_on_story_tool_func), prepare=tool_catalog.prepare)
 
 # Nueva herramienta Jira: todas las horas registradas por todos los usuarios en un issue
-get_all_worklog_hours_for_issue_tool = Tool(get_all_worklog_hours_for_issue_tool_func)
+get_all_worklog_hours_for_issue_tool = Tool(read_only(compact_tool(get_all_worklog_hours_for_issue_tool_func, CompactionSpec(
+    sort_by={"users_summary": ("total_seconds", True), "worklogs": ("started", True)},
+    max_items=5,
+))), prepare=tool_catalog.prepare)
+
+# Reporte agregado de horas sobre una épica o consulta JQL completa
+get_worklog_hours_report_tool = Tool(read_only(compact_tool(get_worklog_hours_report_tool_func)), prepare=tool_catalog.prepare)
 
 # === NUEVAS HERRAMIENTAS DE BÚSQUEDA DE USUARIOS ===
-search_jira_users_tool = Tool(search_jira_users_tool_func)
-validate_jira_user_tool = Tool(validate_jira_user_tool_func)
-get_user_hours_with_confirmed_user_tool = Tool(get_user_hours_with_confirmed_user_tool_func)
+search_jira_users_tool = Tool(read_only(search_jira_users_tool_func), prepare=tool_catalog.prepare)
+validate_jira_user_tool = Tool(read_only(validate_jira_user_tool_func), prepare=tool_catalog.prepare)
+get_user_hours_with_confirmed_user_tool = Tool(read_only(get_user_hours_with_confirmed_user_tool_func), prepare=tool_catalog.prepare)
 
 # === NUEVAS HERRAMIENTAS DE SPRINT ===
-get_active_sprint_issues_tool = Tool(get_active_sprint_issues_tool_func)
-get_my_current_sprint_work_tool = Tool(get_my_current_sprint_work_tool_func)
-get_sprint_progress_tool = Tool(get_sprint_progress_tool_func)
+get_active_sprint_issues_tool = Tool(read_only(compact_tool(get_active_sprint_issues_tool_func, CompactionSpec(max_items=25))), prepare=tool_catalog.prepare)
+get_my_current_sprint_work_tool = Tool(read_only(compact_tool(get_my_current_sprint_work_tool_func, CompactionSpec(max_items=25))), prepare=tool_catalog.prepare)
+get_sprint_progress_tool = Tool(read_only(get_sprint_progress_tool_func), prepare=tool_catalog.prepare)
 
 # === NUEVAS HERRAMIENTAS DE TRANSICIONES Y ESTADOS ===
-get_issue_transitions_tool = Tool(get_issue_transitions_tool_func)
-get_project_workflow_statuses_tool = Tool(get_project_workflow_statuses_tool_func)
-transition_issue_tool = Tool(transition_issue_tool_func)
+get_issue_transitions_tool = Tool(read_only(get_issue_transitions_tool_func), prepare=tool_catalog.prepare)
+get_project_workflow_statuses_tool = Tool(read_only(get_project_workflow_statuses_tool_func), prepare=tool_catalog.prepare)
+transition_issue_tool = Tool(mutating(transition_issue_tool_func), prepare=tool_catalog.prepare)
 
 # === NUEVA HERRAMIENTA DE STORY POINTS ===
-get_issue_story_points_tool = Tool(get_issue_story_points_tool_func)
+get_issue_story_points_tool = Tool(read_only(get_issue_story_points_tool_func), prepare=tool_catalog.prepare)
 
 # Nueva herramienta de formato para PydanticAI
-format_jira_issues_tool = Tool(format_jira_issues_tool_func)
+format_jira_issues_tool = Tool(read_only(format_jira_issues_tool_func), prepare=tool_catalog.prepare)
+
+# Paginación de resultados compactados
+get_tool_result_page_tool = Tool(read_only(get_tool_result_page_tool_func), prepare=tool_catalog.prepare)
+
+# Carga de grupos de herramientas especializadas (siempre disponible)
+load_tool_group_tool = Tool(read_only(load_tool_group_tool_func), prepare=tool_catalog.prepare)
 
 # Lista de todas las herramientas para el agente
 available_tools = [
     jira_search_tool,
     jira_details_tool,
+    jira_details_batch_tool,
     jira_add_comment_tool,
     jira_add_worklog_tool,
     # jira_create_issue_tool, # Descomentar cuando esté lista
@@ -147,6 +170,7 @@ available_tools = [
     search_memory_tool,
     get_user_hours_on_story_tool,
     get_all_worklog_hours_for_issue_tool,
+    get_worklog_hours_report_tool,
     search_jira_users_tool,
     validate_jira_user_tool,
     get_user_hours_with_confirmed_user_tool,
@@ -158,6 +182,8 @@ available_tools = [
     transition_issue_tool,
     get_issue_story_points_tool,
     format_jira_issues_tool, # Añadir la nueva herramienta
+    get_tool_result_page_tool,
+    load_tool_group_tool,
 ]
 
 # --- Creación del Agente Principal ---
@@ -184,6 +210,10 @@ main_agent = Agent(
         "**Directrices para Herramientas:**\\n"
         "-   **Refinamiento de Búsqueda:** Cuando uses herramientas de búsqueda (Jira, Confluence), siempre intenta refinar los resultados usando los parámetros disponibles (ej. JQL en Jira, clave de espacio en Confluence, filtros de estado, etc.) para obtener la información más precisa posible.\\n"
         "-   **Refinamiento de Busqueda:** Considera que cuando el usuario hace referencia a Ej.: 'mis historias', es para que uses en e JQL currentUser()\\n"
+        "-   **Varios Issues a la Vez:** Si el usuario menciona dos o más claves de issue (ej. 'PROJ-1, PROJ-7 y PROJ-22'), usa UNA sola llamada a `get_issues_details_batch` con todas las claves en lugar de llamar a `get_issue_details` por cada una.\\n"
+        "-   **Horas sobre Muchos Issues:** Para horas de una épica, un sprint o cualquier conjunto de issues, usa UNA llamada a `get_worklog_hours_report` (con `parent_issue_key` o `jql_query`, y opcionalmente `user`, `date_from`, `date_to`) en lugar de consultar las horas issue por issue.\\n"
+        "-   **Resultados Compactados:** Si un resultado trae `result_handle` y `compaction_note`, muestra lo recibido (filas principales y totales de las omitidas) y usa `get_tool_result_page` solo si el usuario necesita las filas o el texto omitidos.\\n"
+        "-   **Grupos de Herramientas:** Algunas herramientas (sprints, transiciones, worklogs, escritura en Confluence) se cargan bajo demanda. Si necesitas una que no tienes disponible, llama primero a `load_tool_group` con el grupo correspondiente y úsala en el paso siguiente; nunca inventes el nombre de una herramienta.\\n"
         "-   **Claridad ante Ambigüedad:** Si una solicitud es ambigua o una herramienta requiere parámetros que el usuario no ha proporcionado, pide la clarificación necesaria ANTES de ejecutar la herramienta de forma genérica."
 
         # === OUTPUT FORMATTING & USE OF FORMATTING TOOLS ===
@@ -0,0 +1,121 @@
+# agent_core/model_tiering.py
+"""
+Ejecución en dos niveles de modelo dentro de una misma corrida del agente.
+
+- Nivel "routing": un modelo rápido y barato elige herramientas y argumentos.
+- Nivel "synthesis": el modelo grande solo entra cuando la respuesta final debe
+  sintetizar muchos resultados de herramientas (por cantidad o por tamaño).
+
+La corrida se conduce nodo a nodo (`Agent.iter`) y antes de cada request al
+modelo se decide el nivel según los retornos de herramientas acumulados en la
+corrida. Latencia y tokens de cada request se registran por nivel.
+"""
+
+import time
+from typing import Dict, Optional
+
+import logfire
+from pydantic_ai.messages import ModelRequest, ToolReturnPart
+from pydantic_ai.models import Model, infer_model
+
+from config import settings
+from config.logfire_instrumentation import get_instrumentation
+
+ROUTING_TIER = "routing"
+SYNTHESIS_TIER = "synthesis"
+SINGLE_TIER = "single"
+
+
+class ModelTierPolicy:
+    """Elige el modelo de cada request de una corrida según los resultados de herramientas acumulados."""
+
+    def __init__(
+        self,
+        routing_model: str,
+        synthesis_model: str,
+        synthesis_min_tool_results: int,
+        synthesis_min_result_chars: int,
+    ):
+        self.routing_model = routing_model
+        self.synthesis_model = synthesis_model
+        self.synthesis_min_tool_results = synthesis_min_tool_results
+        self.synthesis_min_result_chars = synthesis_min_result_chars
+        self._models: Dict[str, Model] = {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.routing_model) and self.routing_model != self.synthesis_model
+
+    def model_name(self, tier: str) -> str:
+        return self.routing_model if tier == ROUTING_TIER else self.synthesis_model
+
+    def model_for(self, tier: str) -> Model:
+        name = self.model_name(tier)
+        if name not in self._models:
+            self._models[name] = infer_model(name)
+        return self._models[name]
+
+    def start_run(self) -> "TieredRun":
+        return TieredRun(self)
+
+
+class TieredRun:
+    """Estado de una corrida: resultados de herramientas vistos y nivel actual."""
+
+    def __init__(self, policy: ModelTierPolicy):
+        self.policy = policy
+        self.tool_results = 0
+        self.result_chars = 0
+        self.tier = ROUTING_TIER
+        self._request_started: Optional[float] = None
+        self._tokens_before = (0, 0)
+
+    def observe_request(self, request: ModelRequest) -> str:
+        """Acumula los retornos de herramientas del request y retorna el nivel que debe atenderlo."""
+        for part in request.parts:
+            if isinstance(part, ToolReturnPart):
+                self.tool_results += 1
+                try:
+                    self.result_chars += len(part.model_response_str())
+                except Exception:
+                    self.result_chars += len(str(part.content))
+        if self.tier == ROUTING_TIER and (
+                self.tool_results >= self.policy.synthesis_min_tool_results
+                or self.result_chars >= self.policy.synthesis_min_result_chars):
+            logfire.info("Cambio a modelo de síntesis tras {results} resultados ({chars} caracteres)",
+                         results=self.tool_results, chars=self.result_chars)
+            self.tier = SYNTHESIS_TIER
+        return self.tier
+
+    def request_started(self, usage) -> None:
+        self._request_started = time.perf_counter()
+        self._tokens_before = (usage.request_tokens or 0, usage.response_tokens or 0)
+
+    def request_finished(self, usage) -> None:
+        if self._request_started is None:
+            return
+        record_model_usage(
+            self.tier,
+            self.policy.model_name(self.tier),
+            (time.perf_counter() - self._request_started) * 1000,
+            (usage.request_tokens or 0) - self._tokens_before[0],
+            (usage.response_tokens or 0) - self._tokens_before[1],
+        )
+        self._request_started = None
+
+
+def record_model_usage(tier: str, model: str, duration_ms: float, input_tokens: int, output_tokens: int) -> None:
+    """Registra latencia y tokens de un request (o corrida) al modelo, por nivel."""
+    logfire.info("Request al modelo {model} (nivel {tier}): {duration_ms:.0f} ms, {input_tokens} tokens de entrada, "
+                 "{output_tokens} de salida", model=model, tier=tier, duration_ms=duration_ms,
+                 input_tokens=input_tokens, output_tokens=output_tokens)
+    get_instrumentation().record_model_request(tier, model, duration_ms, input_tokens, output_tokens)
+
+
+# Instancia global
+model_tiers = ModelTierPolicy(
+    routing_model=settings.AGENT_ROUTING_MODEL,
+    synthesis_model=settings.AGENT_SYNTHESIS_MODEL,
+    synthesis_min_tool_results=settings.AGENT_SYNTHESIS_MIN_TOOL_RESULTS,
+    synthesis_min_result_chars=settings.AGENT_SYNTHESIS_MIN_RESULT_CHARS,
+)
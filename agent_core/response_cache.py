@@ -0,0 +1,218 @@
+# agent_core/response_cache.py
+"""
+Cache de respuestas del agente para preguntas de solo lectura repetidas.
+
+Se indexa por (usuario de la app, usuario de Atlassian, prompt normalizado). Una
+respuesta se guarda solo si la ejecución usó herramientas de lectura y ninguna de
+escritura (anotaciones de agent_core/tool_scheduler.py); su TTL es el menor de la
+frescura de los datos que consultó (ej. un sprint cambia más seguido que una página
+de Confluence). Cualquier herramienta de escritura ejecutada por el usuario invalida todas sus entradas,
+aunque la ejecución termine con error (aviso `on_write` del planificador).
+
+Las preguntas que dependen de la conversación previa ("¿y ese issue?") no se
+cachean cuando hay historial, porque la misma frase puede significar otra cosa. Si
+una respuesta se sirve en una conversación con historial, se agrega solo el pedido
+y el texto final (sin el system prompt ni las herramientas de la ejecución original).
+"""
+
+import hashlib
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import logfire
+from pydantic_ai.messages import ModelMessage, ModelRequest, ModelResponse, TextPart, ToolCallPart, UserPromptPart
+
+from config import settings
+from config.request_context import get_request_user_id, resolve_atlassian_credentials
+from agent_core.tool_scheduler import is_mutating_tool, tool_scheduler
+
+# Herramientas cuya respuesta depende del momento de la consulta
+NON_CACHEABLE_TOOL_NAMES: FrozenSet[str] = frozenset({"get_current_datetime"})
+
+# Herramientas sin datos propios (formato, paginación): no limitan el TTL
+NEUTRAL_TOOL_NAMES: FrozenSet[str] = frozenset({"format_jira_issues_for_markdown", "get_tool_result_page", "load_tool_group"})
+
+# Frescura (segundos) por herramienta de lectura; el resto usa RESPONSE_CACHE_TTL_SECONDS
+TOOL_FRESHNESS_SECONDS: Dict[str, float] = {
+    "search_issues": 120,
+    "get_issue_details": 120,
+    "get_issues_details_batch": 120,
+    "get_child_issues_status": 120,
+    "get_active_sprint_issues": 120,
+    "get_my_current_sprint_work": 120,
+    "get_sprint_progress": 120,
+    "get_issue_transitions": 120,
+    "get_user_hours_on_story": settings.WORKLOG_SYNC_MAX_STALENESS_SECONDS,
+    "get_all_worklog_hours_for_issue": settings.WORKLOG_SYNC_MAX_STALENESS_SECONDS,
+    "get_worklog_hours_report": settings.WORKLOG_SYNC_MAX_STALENESS_SECONDS,
+    "search_confluence_pages": 600,
+    "get_confluence_page_content": 600,
+    "get_project_workflow_statuses": 3600,
+}
+
+# Referencias a la conversación previa (la pregunta no se entiende sola)
+_CONTEXT_DEPENDENT = re.compile(
+    r"\b(ese|esa|eso|esos|esas|este|esta|esto|aquel|anterior|mismo|misma|tambien|otro|otra|"
+    r"siguiente|lo de antes|that|this|those|same|previous|it)\b"
+)
+
+_CacheKey = Tuple[str, str, str]
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Minúsculas, sin acentos, sin puntuación final y con espacios colapsados."""
+    text = unicodedata.normalize("NFKD", prompt.lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[¿?¡!.,;:]+", " ", text)
+    return " ".join(text.split())
+
+
+def tools_used(messages: List[ModelMessage]) -> FrozenSet[str]:
+    return frozenset(
+        part.tool_name
+        for message in messages if isinstance(message, ModelResponse)
+        for part in message.parts if isinstance(part, ToolCallPart)
+    )
+
+
+@dataclass
+class CachedAgentResult:
+    """Resultado reproducido desde cache, con la misma interfaz que usa la UI."""
+    output: str
+    messages: List[ModelMessage]
+    tools: FrozenSet[str]
+    cached: bool = True
+
+    def new_messages(self) -> List[ModelMessage]:
+        return list(self.messages)
+
+    def usage(self) -> str:
+        return "cache"
+
+
+@dataclass
+class _Entry:
+    result: CachedAgentResult
+    expires_at: float
+
+
+class AgentResponseCache:
+    def __init__(self, max_entries: int, default_ttl_seconds: float, enabled: bool = True):
+        self.enabled = enabled
+        self._max_entries = max(1, max_entries)
+        self._default_ttl = default_ttl_seconds
+        self._entries: "OrderedDict[_CacheKey, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _current_users() -> Tuple[str, str]:
+        atlassian_user, _ = resolve_atlassian_credentials(None, None)
+        return get_request_user_id() or "", atlassian_user or ""
+
+    def _make_key(self, prompt: str) -> _CacheKey:
+        user_id, atlassian_user = self._current_users()
+        digest = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return (user_id, atlassian_user, digest)
+
+    @staticmethod
+    def is_cacheable_prompt(prompt: str, message_history: Optional[List[ModelMessage]]) -> bool:
+        if not message_history:
+            return True
+        # Con historial, solo la pregunta en sí (el contexto de memoria va antes de la última línea en blanco)
+        question = normalize_prompt(prompt.split("\n\n")[-1])
+        return not _CONTEXT_DEPENDENT.search(question)
+
+    def ttl_for(self, tools: FrozenSet[str]) -> Optional[float]:
+        """TTL de una respuesta según las herramientas usadas; None si no debe cachearse."""
+        data_tools = tools - NEUTRAL_TOOL_NAMES
+        if not data_tools or data_tools & NON_CACHEABLE_TOOL_NAMES or any(map(is_mutating_tool, data_tools)):
+            return None
+        return min(TOOL_FRESHNESS_SECONDS.get(name, self._default_ttl) for name in data_tools)
+
+    def get(self, prompt: str, message_history: Optional[List[ModelMessage]] = None) -> Optional[CachedAgentResult]:
+        if not self.enabled or not self.is_cacheable_prompt(prompt, message_history):
+            return None
+        key = self._make_key(prompt)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.expires_at < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        logfire.info("Respuesta servida desde cache (herramientas: {tools})", tools=sorted(entry.result.tools))
+        if not message_history:
+            return entry.result
+        # Los mensajes guardados son de un primer turno (system prompt incluido): en medio de una
+        # conversación se agrega solo el intercambio visible
+        return CachedAgentResult(
+            output=entry.result.output,
+            messages=[
+                ModelRequest(parts=[UserPromptPart(content=prompt)]),
+                ModelResponse(parts=[TextPart(content=entry.result.output)]),
+            ],
+            tools=entry.result.tools,
+        )
+
+    def record(self, prompt: str, message_history: Optional[List[ModelMessage]], result: Any) -> None:
+        """Registra una ejecución completa: invalida si escribió datos, o la guarda si es cacheable."""
+        if not self.enabled or result is None:
+            return
+        messages = result.new_messages()
+        tools = tools_used(messages)
+        user_id, atlassian_user = self._current_users()
+        if any(map(is_mutating_tool, tools)):
+            self.invalidate_user(user_id, atlassian_user)
+            return
+        ttl = self.ttl_for(tools)
+        if ttl is None or not result.output or not self.is_cacheable_prompt(prompt, message_history):
+            return
+        key = self._make_key(prompt)
+        with self._lock:
+            self._entries[key] = _Entry(
+                result=CachedAgentResult(output=result.output, messages=messages, tools=tools),
+                expires_at=time.monotonic() + ttl,
+            )
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id: Optional[str] = None, atlassian_user: Optional[str] = None) -> int:
+        """Elimina las entradas del usuario (por id de la app o por usuario de Atlassian)."""
+        with self._lock:
+            keys = [key for key in self._entries
+                    if (user_id and key[0] == user_id) or (atlassian_user and key[1] == atlassian_user)]
+            for key in keys:
+                del self._entries[key]
+        if keys:
+            logfire.info("Cache de respuestas invalidada: {count} entradas", count=len(keys))
+        return len(keys)
+
+    def invalidate_current_user(self) -> int:
+        return self.invalidate_user(*self._current_users())
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+# Instancia global
+response_cache = AgentResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    default_ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
+tool_scheduler.on_write(lambda tool_name: response_cache.invalidate_current_user())
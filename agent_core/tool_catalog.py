@@ -0,0 +1,227 @@
+# agent_core/tool_catalog.py
+"""
+Catálogo de herramientas: qué esquemas viajan en cada request al modelo.
+
+Cada herramienta registrada envía su docstring y las descripciones de sus `Field`
+como JSON schema en cada request. Para achicar el prompt:
+
+- Solo el grupo "core" se expone siempre. Los grupos especializados (sprints,
+  transiciones, worklogs, escritura en Confluence) se activan por un clasificador
+  de palabras clave sobre el pedido, por el uso reciente en la conversación o
+  porque el modelo los pidió con `load_tool_group`.
+- Los esquemas se recortan (descripción resumida, sin parámetros internos de
+  credenciales) una sola vez por herramienta y quedan cacheados.
+
+Se aplica con el hook `prepare` de cada `Tool` de PydanticAI, que se evalúa antes
+de cada request: un grupo cargado en un paso está disponible en el siguiente.
+"""
+
+import copy
+import re
+import threading
+from dataclasses import replace
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+import logfire
+from pydantic import Field
+from pydantic_ai import RunContext
+from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart, UserPromptPart
+from pydantic_ai.tools import ToolDefinition
+
+from agent_core.response_cache import normalize_prompt
+from config import settings
+
+CORE_GROUP = "core"
+
+# Herramientas de cada grupo especializado (las no listadas son "core")
+TOOL_GROUPS: Dict[str, Tuple[str, ...]] = {
+    "sprints": (
+        "get_active_sprint_issues",
+        "get_my_current_sprint_work",
+        "get_sprint_progress",
+        "get_issue_story_points",
+    ),
+    "transitions": (
+        "get_issue_transitions",
+        "get_project_workflow_statuses",
+        "transition_issue",
+    ),
+    "worklogs": (
+        "add_worklog_to_jira_issue",
+        "get_user_hours_on_story",
+        "get_user_hours_with_confirmed_user",
+        "get_all_worklog_hours_for_issue",
+        "get_worklog_hours_report",
+    ),
+    "confluence_write": (
+        "create_confluence_page",
+        "update_confluence_page_content",
+    ),
+}
+
+GROUP_DESCRIPTIONS: Dict[str, str] = {
+    "sprints": "issues y progreso del sprint activo, story points",
+    "transitions": "transiciones de estado de issues y estados del workflow",
+    "worklogs": "registrar horas y reportes de horas trabajadas",
+    "confluence_write": "crear y actualizar páginas de Confluence",
+}
+
+# Clasificador barato sobre el pedido normalizado (minúsculas, sin acentos)
+GROUP_KEYWORDS: Dict[str, "re.Pattern[str]"] = {
+    "sprints": re.compile(r"\b(sprints?|story ?points?|puntos|avance|progreso|velocity|velocidad)\b"),
+    "transitions": re.compile(
+        r"\b(muev\w*|mover|move|pas(a|ar|alo)|transici\w*|transition\w*|estados?|status|workflow|flujo|"
+        r"cerr\w*|close|reabr\w*|done|finaliz\w*)\b"),
+    "worklogs": re.compile(
+        r"\b(horas?|hours?|worklogs?|registr\w*|imput\w*|log|tiempo|time|dedicad\w*|trabaj\w*)\b"),
+    "confluence_write": re.compile(
+        r"\b(cre\w*|create|actualiz\w*|update|edit\w*|escrib\w*|redact\w*|publica\w*|documenta\w*)\b.*"
+        r"\b(paginas?|pages?|confluence|documento|doc)\b"),
+}
+
+# Parámetros que el modelo nunca debe completar (las credenciales llegan por contexto)
+HIDDEN_PARAMETERS: FrozenSet[str] = frozenset({"atlassian_username", "atlassian_api_key"})
+
+_TOOL_GROUP_BY_NAME: Dict[str, str] = {name: group for group, names in TOOL_GROUPS.items() for name in names}
+
+
+def get_tool_group(tool_name: str) -> str:
+    return _TOOL_GROUP_BY_NAME.get(tool_name, CORE_GROUP)
+
+
+def _shorten(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    # Cortar en el último fin de oración si queda algo razonable
+    sentence_end = cut.rfind(". ")
+    if sentence_end > max_chars // 2:
+        return cut[:sentence_end + 1]
+    return cut.rstrip() + "…"
+
+
+def classify_groups(text: str) -> FrozenSet[str]:
+    """Grupos que el pedido probablemente necesita, por palabras clave."""
+    normalized = normalize_prompt(text)
+    return frozenset(group for group, pattern in GROUP_KEYWORDS.items() if pattern.search(normalized))
+
+
+class ToolCatalog:
+    """Decide qué herramientas se exponen en cada paso y cachea sus esquemas recortados."""
+
+    def __init__(
+        self,
+        enabled: bool,
+        recent_turns: int,
+        max_description_chars: int,
+        max_param_description_chars: int,
+    ):
+        self.enabled = enabled
+        self.recent_turns = max(1, recent_turns)
+        self.max_description_chars = max_description_chars
+        self.max_param_description_chars = max_param_description_chars
+        self._schemas: Dict[str, Tuple[str, ToolDefinition]] = {}
+        self._lock = threading.Lock()
+
+    def _trim_schema(self, tool_def: ToolDefinition) -> ToolDefinition:
+        schema = copy.deepcopy(tool_def.parameters_json_schema)
+        properties = schema.get("properties", {})
+        for name in HIDDEN_PARAMETERS & set(properties):
+            del properties[name]
+        for prop in properties.values():
+            if isinstance(prop, dict) and isinstance(prop.get("description"), str):
+                prop["description"] = _shorten(prop["description"], self.max_param_description_chars)
+        if "required" in schema:
+            schema["required"] = [name for name in schema["required"] if name not in HIDDEN_PARAMETERS]
+        description = (tool_def.description or "").strip().split("\n\n")[0]
+        return replace(
+            tool_def,
+            description=_shorten(description, self.max_description_chars),
+            parameters_json_schema=schema,
+        )
+
+    def trimmed(self, tool_def: ToolDefinition) -> ToolDefinition:
+        """Esquema recortado de la herramienta, calculado una vez y reutilizado en cada request."""
+        source = tool_def.description or ""
+        with self._lock:
+            cached = self._schemas.get(tool_def.name)
+            if cached is not None and cached[0] == source:
+                return cached[1]
+        trimmed = self._trim_schema(tool_def)
+        with self._lock:
+            self._schemas[tool_def.name] = (source, trimmed)
+        return trimmed
+
+    def _recent_messages(self, messages: List[Any]) -> List[Any]:
+        """Mensajes de los últimos `recent_turns` turnos (un turno empieza con un prompt del usuario)."""
+        turns = 0
+        for index in range(len(messages) - 1, -1, -1):
+            message = messages[index]
+            if isinstance(message, ModelRequest) and any(isinstance(p, UserPromptPart) for p in message.parts):
+                turns += 1
+                if turns >= self.recent_turns:
+                    return messages[index:]
+        return messages
+
+    def _compute_active_groups(self, ctx: RunContext[Any]) -> FrozenSet[str]:
+        groups = set()
+        prompt = ctx.prompt if isinstance(ctx.prompt, str) else ""
+        # El pedido del usuario va al final (después del contexto de memoria)
+        groups |= classify_groups(prompt.split("\n\n")[-1])
+        for message in self._recent_messages(ctx.messages):
+            if not isinstance(message, ModelResponse):
+                continue
+            for part in message.parts:
+                if not isinstance(part, ToolCallPart):
+                    continue
+                if part.tool_name == "load_tool_group":
+                    group = part.args_as_dict().get("group")
+                    if group in TOOL_GROUPS:
+                        groups.add(group)
+                elif get_tool_group(part.tool_name) != CORE_GROUP:
+                    groups.add(get_tool_group(part.tool_name))
+        return frozenset(groups)
+
+    def active_groups(self, ctx: RunContext[Any]) -> FrozenSet[str]:
+        """Grupos activos para este paso (se recalculan en cada llamada: solo miran los últimos turnos)."""
+        return self._compute_active_groups(ctx)
+
+    async def prepare(self, ctx: RunContext[Any], tool_def: ToolDefinition) -> Optional[ToolDefinition]:
+        """Hook `prepare` de PydanticAI: None oculta la herramienta en este paso."""
+        if not self.enabled:
+            return tool_def
+        group = get_tool_group(tool_def.name)
+        if group != CORE_GROUP and group not in self.active_groups(ctx):
+            return None
+        return self.trimmed(tool_def)
+
+
+# Instancia global
+tool_catalog = ToolCatalog(
+    enabled=settings.TOOL_CATALOG_ENABLED,
+    recent_turns=settings.TOOL_CATALOG_RECENT_TURNS,
+    max_description_chars=settings.TOOL_SCHEMA_MAX_DESCRIPTION_CHARS,
+    max_param_description_chars=settings.TOOL_SCHEMA_MAX_PARAM_DESCRIPTION_CHARS,
+)
+
+
+async def load_tool_group(
+    group: str = Field(..., description="Grupo a cargar: 'sprints', 'transitions', 'worklogs' o 'confluence_write'."),
+) -> Dict[str, Any]:
+    """
+    Carga un grupo de herramientas especializadas que no está disponible en este momento:
+    sprints (issues y progreso del sprint, story points), transitions (transiciones y estados
+    del workflow), worklogs (registrar y reportar horas) o confluence_write (crear y
+    actualizar páginas). Las herramientas quedan disponibles en el siguiente paso.
+    """
+    if group not in TOOL_GROUPS:
+        return {"status": "ERROR", "message": f"Grupo '{group}' desconocido. Opciones: {', '.join(TOOL_GROUPS)}."}
+    logfire.info("Grupo de herramientas cargado a pedido del modelo: {group}", group=group)
+    return {
+        "status": "ok",
+        "group": group,
+        "description": GROUP_DESCRIPTIONS[group],
+        "tools": list(TOOL_GROUPS[group]),
+        "message": "Herramientas disponibles a partir del siguiente paso.",
+    }
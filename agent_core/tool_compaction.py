@@ -0,0 +1,222 @@
+# agent_core/tool_compaction.py
+"""
+Compactación de resultados de herramientas antes de que vuelvan al contexto del modelo.
+
+PydanticAI serializa el retorno de cada herramienta tal cual; para reportes de
+worklogs, sprints o páginas de Confluence eso incluye cada comentario y el HTML
+completo. Cada herramienta se registra con un `CompactionSpec`:
+
+- Si el resultado serializado cabe en el presupuesto, se devuelve sin cambios.
+- Si no, las listas se recortan a las K primeras filas (con orden opcional) y se
+  agregan los totales numéricos de las filas omitidas; los textos largos se cortan.
+- El resultado completo queda en un handle del servidor y el modelo puede pedir
+  más filas o texto con la herramienta `get_tool_result_page`.
+"""
+
+import functools
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import logfire
+from pydantic import Field
+from pydantic_core import to_jsonable_python
+
+from config import settings
+from config.request_context import get_request_user_id
+
+
+@dataclass
+class CompactionSpec:
+    """Presupuesto de compactación de una herramienta."""
+    max_chars: int = settings.TOOL_RESULT_MAX_CHARS
+    max_items: int = settings.TOOL_RESULT_MAX_ITEMS
+    max_string_chars: int = settings.TOOL_RESULT_MAX_STRING_CHARS
+    # Orden previo al recorte por nombre de lista: (campo, descendente)
+    sort_by: Dict[str, Tuple[str, bool]] = field(default_factory=dict)
+
+
+class ToolResultHandleStore:
+    """Resultados completos de herramientas, por usuario, con TTL y desalojo LRU."""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self._max_entries = max(1, max_entries)
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[str, float, str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, owner: str, tool_name: str, data: Any) -> str:
+        handle = f"res_{uuid.uuid4().hex[:10]}"
+        with self._lock:
+            self._entries[handle] = (owner, time.monotonic(), tool_name, data)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return handle
+
+    def get(self, owner: str, handle: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(handle)
+            if entry is None:
+                return None
+            entry_owner, created_at, _, data = entry
+            if entry_owner != owner or time.monotonic() - created_at > self._ttl:
+                if entry_owner == owner:
+                    del self._entries[handle]
+                return None
+            self._entries.move_to_end(handle)
+            return data
+
+
+result_handles = ToolResultHandleStore(
+    max_entries=settings.TOOL_RESULT_HANDLE_MAX_ENTRIES,
+    ttl_seconds=settings.TOOL_RESULT_HANDLE_TTL_SECONDS,
+)
+
+
+def _numeric_totals(rows: List[Any]) -> Dict[str, float]:
+    totals: Dict[str, float] = {}
+    for row in rows:
+        if isinstance(row, dict):
+            for key, value in row.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    totals[key] = round(totals.get(key, 0) + value, 2)
+    return totals
+
+
+def _compact_value(value: Any, spec: CompactionSpec, name: str = "") -> Tuple[Any, Dict[str, Any]]:
+    """Compacta recursivamente. Retorna el valor y metadatos a agregar junto a él (para listas)."""
+    if isinstance(value, str):
+        if len(value) > spec.max_string_chars:
+            return value[:spec.max_string_chars] + f"… [{len(value) - spec.max_string_chars} caracteres más]", {}
+        return value, {}
+    if isinstance(value, list):
+        rows = value
+        kept, omitted = rows[:spec.max_items], rows[spec.max_items:]
+        compacted = [_compact_dict(row, spec) if isinstance(row, dict) else _compact_value(row, spec)[0] for row in kept]
+        extra: Dict[str, Any] = {}
+        if omitted:
+            extra[f"{name}_total_count"] = len(rows)
+            extra[f"{name}_omitted_count"] = len(omitted)
+            totals = _numeric_totals(omitted)
+            if totals:
+                extra[f"{name}_omitted_totals"] = totals
+        return compacted, extra
+    if isinstance(value, dict):
+        return _compact_dict(value, spec), {}
+    return value, {}
+
+
+def _apply_sort(value: Any, spec: CompactionSpec, name: str = "") -> Any:
+    """Ordena (recursivamente) las listas indicadas en `spec.sort_by`, antes de guardar y recortar."""
+    if isinstance(value, dict):
+        return {key: _apply_sort(item, spec, key) for key, item in value.items()}
+    if isinstance(value, list):
+        rows = [_apply_sort(item, spec) for item in value]
+        sort = spec.sort_by.get(name)
+        if sort:
+            key, descending = sort
+            rows.sort(key=lambda r: (r.get(key) is not None, r.get(key)) if isinstance(r, dict) else (False, None),
+                      reverse=descending)
+        return rows
+    return value
+
+
+def _compact_dict(data: Dict[str, Any], spec: CompactionSpec) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for key, value in data.items():
+        compacted, extra = _compact_value(value, spec, key)
+        result[key] = compacted
+        result.update(extra)
+    return result
+
+
+def compact_result(tool_name: str, result: Any, spec: CompactionSpec) -> Any:
+    """Aplica el presupuesto de `spec` a un resultado; lo devuelve intacto si ya cabe."""
+    data = to_jsonable_python(result, by_alias=False)
+    size = len(json.dumps(data, ensure_ascii=False, default=str))
+    if size <= spec.max_chars:
+        return result
+
+    # Se guarda ya ordenado para que las rutas de get_tool_result_page coincidan con lo mostrado
+    if spec.sort_by:
+        data = _apply_sort(data, spec, "items" if isinstance(data, list) else "")
+    handle = result_handles.put(get_request_user_id() or "", tool_name, data)
+    container = {"items": data} if isinstance(data, list) else data
+    compacted = _compact_dict(container, spec) if isinstance(container, dict) else container
+    if isinstance(compacted, dict):
+        compacted["result_handle"] = handle
+        compacted["compaction_note"] = (
+            "Resultado resumido por tamaño. Para ver filas o texto omitidos usa "
+            f"get_tool_result_page(handle='{handle}', path=...)."
+        )
+    logfire.info("Resultado de {tool} compactado: {size} caracteres → {compacted_size} (handle {handle})",
+                 tool=tool_name, size=size,
+                 compacted_size=len(json.dumps(compacted, ensure_ascii=False, default=str)), handle=handle)
+    return compacted
+
+
+def compact_tool(func: Callable, spec: Optional[CompactionSpec] = None) -> Callable:
+    """Envuelve una herramienta asíncrona para compactar su resultado (misma firma y docstring)."""
+    spec = spec or CompactionSpec()
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        result = await func(*args, **kwargs)
+        try:
+            return compact_result(func.__name__, result, spec)
+        except Exception as e:
+            logfire.warn("No se pudo compactar el resultado de {tool}: {error}", tool=func.__name__, error=str(e))
+            return result
+
+    return wrapper
+
+
+def _resolve_path(data: Any, path: str) -> Any:
+    current = data
+    for segment in [s for s in path.split(".") if s]:
+        if isinstance(current, list):
+            current = current[int(segment)]
+        elif isinstance(current, dict):
+            current = current[segment]
+        else:
+            raise KeyError(segment)
+    return current
+
+
+async def get_tool_result_page(
+    handle: str = Field(..., description="Handle del resultado compactado (campo `result_handle`), ej: 'res_1a2b3c4d5e'."),
+    path: str = Field(default="", description="Ruta dentro del resultado separada por puntos, ej: 'users_summary', 'users_summary.0.worklogs' o 'body_storage'. Vacío = raíz (o 'items' si el resultado era una lista)."),
+    offset: int = Field(default=0, description="Posición inicial: fila para listas, carácter para textos."),
+    limit: Optional[int] = Field(default=None, description="Cantidad de filas (listas) o caracteres (textos) a devolver."),
+) -> Dict[str, Any]:
+    """
+    Pagina un resultado de herramienta que fue compactado por tamaño, devolviendo las filas
+    o el fragmento de texto pedido desde el resultado completo guardado en el servidor.
+    """
+    data = result_handles.get(get_request_user_id() or "", handle)
+    if data is None:
+        return {"status": "ERROR", "message": f"El handle '{handle}' no existe o expiró. Vuelve a ejecutar la herramienta original."}
+    if isinstance(data, list):
+        data = {"items": data}
+    try:
+        target = _resolve_path(data, path or "")
+    except (KeyError, IndexError, ValueError):
+        return {"status": "ERROR", "message": f"La ruta '{path}' no existe en el resultado {handle}."}
+
+    offset = max(0, offset)
+    if isinstance(target, list):
+        limit = limit or settings.TOOL_RESULT_MAX_ITEMS
+        page = target[offset:offset + limit]
+        spec = CompactionSpec(max_chars=settings.TOOL_RESULT_MAX_CHARS, max_items=limit)
+        items = [_compact_dict(row, spec) if isinstance(row, dict) else row for row in page]
+        return {"status": "ok", "handle": handle, "path": path, "offset": offset,
+                "returned": len(items), "total": len(target), "items": items}
+    if isinstance(target, str):
+        limit = limit or settings.TOOL_RESULT_MAX_STRING_CHARS
+        return {"status": "ok", "handle": handle, "path": path, "offset": offset,
+                "total": len(target), "text": target[offset:offset + limit]}
+    return {"status": "ok", "handle": handle, "path": path, "value": target}
@@ -0,0 +1,122 @@
+# agent_core/tool_scheduler.py
+"""
+Planificación de llamadas a herramientas dentro del loop del agente.
+
+Cuando el modelo pide varias herramientas en un mismo paso, PydanticAI las lanza
+como tareas concurrentes. Cada herramienta se registra anotada como de lectura
+(`read_only`) o de escritura (`mutating`) y este módulo decide cómo corren:
+
+- Lecturas: concurrentes, con un tope por usuario (semáforo) para no saturar Jira.
+- Escrituras: serializadas por usuario (lock), en el orden en que se piden. Al
+  terminar (bien o con error) se avisa a los suscriptores de `on_write`.
+
+Las herramientas sin anotar se consideran de escritura (la opción segura).
+"""
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import logfire
+
+from config import settings
+from config.request_context import get_request_user_id, resolve_atlassian_credentials
+
+READ_ONLY = "read"
+MUTATING = "write"
+
+# Anotación de cada herramienta registrada (nombre → acceso)
+TOOL_ACCESS: Dict[str, str] = {}
+
+
+def get_tool_access(tool_name: str) -> str:
+    return TOOL_ACCESS.get(tool_name, MUTATING)
+
+
+def is_mutating_tool(tool_name: str) -> bool:
+    return get_tool_access(tool_name) == MUTATING
+
+
+class ToolScheduler:
+    """Primitivas de concurrencia por (loop, usuario): semáforo para lecturas y lock para escrituras."""
+
+    def __init__(self, read_concurrency: int):
+        self.read_concurrency = max(1, read_concurrency)
+        self._read_limits: Dict[Tuple[int, str], asyncio.Semaphore] = {}
+        self._write_locks: Dict[Tuple[int, str], asyncio.Lock] = {}
+        self._write_listeners: List[Callable[[str], Any]] = []
+        self._lock = threading.Lock()
+
+    def on_write(self, listener: Callable[[str], Any]) -> None:
+        """Registra `listener(tool_name)`, llamado tras cada escritura en el contexto del usuario que la pidió."""
+        self._write_listeners.append(listener)
+
+    def _notify_write(self, tool_name: str) -> None:
+        for listener in self._write_listeners:
+            try:
+                listener(tool_name)
+            except Exception as e:
+                logfire.warn("Suscriptor de escrituras falló tras {tool}: {error}", tool=tool_name, error=str(e))
+
+    @staticmethod
+    def _scope() -> Tuple[int, str]:
+        atlassian_user, _ = resolve_atlassian_credentials(None, None)
+        return id(asyncio.get_running_loop()), get_request_user_id() or atlassian_user or ""
+
+    def _read_limit(self) -> asyncio.Semaphore:
+        scope = self._scope()
+        with self._lock:
+            return self._read_limits.setdefault(scope, asyncio.Semaphore(self.read_concurrency))
+
+    def _write_lock(self) -> asyncio.Lock:
+        scope = self._scope()
+        with self._lock:
+            return self._write_locks.setdefault(scope, asyncio.Lock())
+
+    async def run(self, tool_name: str, access: str, call: Callable[[], Any]) -> Any:
+        guard = self._read_limit() if access == READ_ONLY else self._write_lock()
+        queued_at = time.perf_counter()
+        async with guard:
+            waited_ms = (time.perf_counter() - queued_at) * 1000
+            if waited_ms > 50:
+                logfire.debug("Herramienta {tool} esperó {waited_ms:.0f} ms por el planificador ({access})",
+                              tool=tool_name, waited_ms=waited_ms, access=access)
+            if access == READ_ONLY:
+                return await call()
+            try:
+                return await call()
+            finally:
+                # Una escritura que falló pudo haberse aplicado igual en Jira/Confluence
+                self._notify_write(tool_name)
+
+
+tool_scheduler = ToolScheduler(read_concurrency=settings.TOOL_READ_CONCURRENCY_PER_USER)
+
+
+def _scheduled(func: Callable, access: str) -> Callable:
+    TOOL_ACCESS[func.__name__] = access
+
+    if inspect.iscoroutinefunction(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await tool_scheduler.run(func.__name__, access, lambda: func(*args, **kwargs))
+    else:
+        # Herramientas síncronas: en un hilo, para no bloquear el loop mientras esperan
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            return await tool_scheduler.run(func.__name__, access, lambda: asyncio.to_thread(func, *args, **kwargs))
+
+    return wrapper
+
+
+def read_only(func: Callable) -> Callable:
+    """Anota una herramienta como de solo lectura: puede correr en paralelo con otras lecturas."""
+    return _scheduled(func, READ_ONLY)
+
+
+def mutating(func: Callable) -> Callable:
+    """Anota una herramienta como de escritura: se serializa con las demás escrituras del usuario."""
+    return _scheduled(func, MUTATING)
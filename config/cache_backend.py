@@ -0,0 +1,330 @@
+# config/cache_backend.py
+"""
+Backends de cache para las lecturas de Atlassian (issues, sprints, estados, páginas).
+
+- `MemoryCacheBackend`: LRU en memoria del proceso.
+- `SQLiteCacheBackend`: archivo SQLite en WAL con lecturas mapeadas en memoria
+  (`mmap_size`), compartido por todos los procesos de Streamlit del host; lo que
+  un worker descarga lo reutilizan los demás.
+
+Los valores son JSON (las respuestas REST ya lo son) y se agrupan por namespace.
+Desde el loop de asyncio se usan las variantes `aget`/`aset`/`adelete`/`ainvalidate`:
+en SQLite corren en un hilo, porque un archivo bloqueado por otro worker haría
+esperar (hasta el `timeout` de la conexión) a todas las corrutinas del loop.
+Los namespaces de datos de Atlassian incluyen al usuario (`user_namespace`), así
+una entrada solo la lee quien la descargó con sus propios permisos.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+import logfire
+
+from config import settings
+
+T = TypeVar("T")
+
+
+def user_namespace(kind: str, user: Optional[str]) -> str:
+    """Namespace de `kind` para un usuario (el usuario se guarda como hash, no en claro)."""
+    digest = hashlib.sha256((user or "").encode("utf-8")).hexdigest()[:16]
+    return f"{kind}:{digest}"
+
+
+class CacheBackend(ABC):
+    """Interfaz común: valores JSON por (namespace, clave) con vencimiento."""
+
+    name = "base"
+
+    # Si las operaciones pueden bloquear (E/S), las variantes async las corren en un hilo
+    blocking = False
+
+    @abstractmethod
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        ...
+
+    @abstractmethod
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, namespace: str, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def invalidate(self, namespace_prefix: str, key_prefix: str = "") -> int:
+        """Elimina las entradas cuyo namespace y clave empiezan con los prefijos dados."""
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        ...
+
+    async def _call(self, func: Callable[..., T], *args: Any) -> T:
+        if not self.blocking:
+            return func(*args)
+        return await asyncio.to_thread(func, *args)
+
+    async def aget(self, namespace: str, key: str) -> Optional[Any]:
+        return await self._call(self.get, namespace, key)
+
+    async def aset(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        await self._call(self.set, namespace, key, value, ttl_seconds)
+
+    async def adelete(self, namespace: str, key: str) -> None:
+        await self._call(self.delete, namespace, key)
+
+    async def ainvalidate(self, namespace_prefix: str, key_prefix: str = "") -> int:
+        return await self._call(self.invalidate, namespace_prefix, key_prefix)
+
+    async def get_or_load(
+        self,
+        namespace: str,
+        key: str,
+        ttl_seconds: float,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Retorna la entrada vigente o la obtiene con `loader` (solo se guardan resultados no vacíos)."""
+        value = await self.aget(namespace, key)
+        if value is not None:
+            return value
+        value = await loader()
+        if value:
+            await self.aset(namespace, key, value, ttl_seconds)
+        return value
+
+
+class MemoryCacheBackend(CacheBackend):
+    """LRU thread-safe en memoria del proceso."""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self._max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None or entry[0] < time.time():
+                if entry is not None:
+                    del self._entries[(namespace, key)]
+                self.misses += 1
+                return None
+            self._entries.move_to_end((namespace, key))
+            self.hits += 1
+            return entry[1]
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[(namespace, key)] = (time.time() + ttl_seconds, value)
+            self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, namespace: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((namespace, key), None)
+
+    def invalidate(self, namespace_prefix: str, key_prefix: str = "") -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k[0].startswith(namespace_prefix) and k[1].startswith(key_prefix)]
+            for k in keys:
+                del self._entries[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"backend": self.name, "size": len(self._entries), "max_entries": self._max_entries,
+                    "hits": self.hits, "misses": self.misses}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    Cache compartida entre procesos del mismo host sobre SQLite (WAL + mmap).
+    Al superar el máximo se descartan las entradas usadas hace más tiempo (LRU por `last_access`).
+    """
+
+    name = "sqlite"
+    blocking = True
+
+    # Cada cuántas escrituras se purgan vencidas y se recorta al máximo de entradas
+    PRUNE_EVERY_WRITES = 200
+
+    # `last_access` se actualiza como mucho una vez por este intervalo: un hit no paga una escritura
+    TOUCH_EVERY_SECONDS = 60
+
+    def __init__(self, db_path: str, max_entries: int, mmap_bytes: int):
+        self.db_path = Path(db_path)
+        self._max_entries = max(1, max_entries)
+        self._mmap_bytes = max(0, mmap_bytes)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Una conexión por hilo: abrir el archivo en cada lectura costaría más que la lectura
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10, check_same_thread=False)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(f"PRAGMA mmap_size={int(self._mmap_bytes)}")
+            self._local.conn = conn
+        return conn
+
+    def _init_db(self):
+        """Inicializa la tabla de entradas de cache"""
+        self.db_path.parent.mkdir(exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (namespace, key)
+            )
+        """)
+        # Archivos creados antes del recorte LRU no tienen `last_access`
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(cache_entries)")}
+        if "last_access" not in columns:
+            conn.execute("ALTER TABLE cache_entries ADD COLUMN last_access REAL NOT NULL DEFAULT 0")
+        conn.execute("DROP INDEX IF EXISTS idx_cache_created")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_last_access ON cache_entries (last_access)")
+        conn.commit()
+        logfire.info("Cache compartida inicializada en {path}", path=str(self.db_path))
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        now = time.time()
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires_at, last_access FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)).fetchone()
+            if row is not None and row[1] >= now and now - row[2] >= self.TOUCH_EVERY_SECONDS:
+                conn.execute("UPDATE cache_entries SET last_access = ? WHERE namespace = ? AND key = ?",
+                             (now, namespace, key))
+                conn.commit()
+        except sqlite3.Error as e:
+            logfire.warn("Lectura de cache compartida falló: {error}", error=str(e))
+            return None
+        with self._lock:
+            if row is None or row[1] < now:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, namespace: str, key: str, value: Any, ttl_seconds: float) -> None:
+        now = time.time()
+        try:
+            payload = json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            logfire.warn("Valor no serializable para la cache ({namespace}): {error}", namespace=namespace, error=str(e))
+            return
+        try:
+            conn = self._connect()
+            conn.execute("""
+                INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, created_at, last_access)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (namespace, key, payload, now + ttl_seconds, now, now))
+            conn.commit()
+        except sqlite3.Error as e:
+            logfire.warn("Escritura en cache compartida falló: {error}", error=str(e))
+            return
+        with self._lock:
+            self._writes += 1
+            prune = self._writes % self.PRUNE_EVERY_WRITES == 0
+        if prune:
+            self._prune()
+
+    def _prune(self) -> None:
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (time.time(),))
+            conn.execute("""
+                DELETE FROM cache_entries WHERE rowid IN (
+                    SELECT rowid FROM cache_entries ORDER BY last_access DESC LIMIT -1 OFFSET ?
+                )
+            """, (self._max_entries,))
+            conn.commit()
+        except sqlite3.Error as e:
+            logfire.warn("Purga de cache compartida falló: {error}", error=str(e))
+
+    def delete(self, namespace: str, key: str) -> None:
+        try:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+            conn.commit()
+        except sqlite3.Error as e:
+            logfire.warn("Borrado en cache compartida falló: {error}", error=str(e))
+
+    def invalidate(self, namespace_prefix: str, key_prefix: str = "") -> int:
+        try:
+            conn = self._connect()
+            cursor = conn.execute("""
+                DELETE FROM cache_entries
+                WHERE substr(namespace, 1, ?) = ? AND substr(key, 1, ?) = ?
+            """, (len(namespace_prefix), namespace_prefix, len(key_prefix), key_prefix))
+            conn.commit()
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            # Las escrituras en Jira ya ocurrieron: una invalidación fallida no debe convertirse en error
+            logfire.warn("Invalidación de cache compartida falló: {error}", error=str(e))
+            return 0
+
+    def clear(self) -> None:
+        conn = self._connect()
+        conn.execute("DELETE FROM cache_entries")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._connect().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        return {"backend": self.name, "size": size, "max_entries": self._max_entries,
+                "hits": self.hits, "misses": self.misses}
+
+
+def create_cache_backend(kind: str) -> CacheBackend:
+    """Crea el backend configurado; si el archivo compartido no se puede abrir, queda en memoria."""
+    if kind == SQLiteCacheBackend.name:
+        try:
+            return SQLiteCacheBackend(
+                db_path=settings.CACHE_DB_PATH,
+                max_entries=settings.CACHE_MAX_ENTRIES,
+                mmap_bytes=settings.CACHE_SQLITE_MMAP_BYTES,
+            )
+        except sqlite3.Error as e:
+            logfire.error("No se pudo abrir la cache compartida ({error}); se usa cache en memoria", error=str(e))
+    elif kind != MemoryCacheBackend.name:
+        logfire.warn("CACHE_BACKEND desconocido '{kind}'; se usa cache en memoria", kind=kind)
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES)
+
+
+# Instancia global
+shared_cache = create_cache_backend(settings.CACHE_BACKEND)
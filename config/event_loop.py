@@ -0,0 +1,135 @@
+# config/event_loop.py
+"""
+Loop de asyncio persistente en un hilo dedicado, uno por proceso del servidor.
+
+Streamlit ejecuta cada script de forma síncrona; en lugar de crear y cerrar un loop
+por consulta (perdiendo pools HTTP y clientes asíncronos ligados al loop), el
+script envía sus corrutinas a este loop y espera el resultado de forma thread-safe.
+Cada corrutina corre con una copia de las ContextVars del hilo que la envió.
+"""
+
+import asyncio
+import atexit
+import concurrent.futures
+import contextvars
+import queue
+import threading
+from typing import AsyncIterator, Awaitable, Iterator, Optional, TypeVar
+
+import logfire
+
+T = TypeVar("T")
+
+_ITEM, _ERROR, _END = "item", "error", "end"
+
+
+class BackgroundEventLoop:
+    def __init__(self, name: str):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is not None and self._thread is not None and self._thread.is_alive():
+                return self._loop
+            loop = asyncio.new_event_loop()
+            started = threading.Event()
+
+            def _run():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(started.set)
+                loop.run_forever()
+
+            self._thread = threading.Thread(target=_run, name=self.name, daemon=True)
+            self._thread.start()
+            started.wait()
+            self._loop = loop
+            logfire.info("Loop de fondo {name} iniciado", name=self.name)
+            return loop
+
+    def submit(self, coro: Awaitable[T]) -> "concurrent.futures.Future[T]":
+        """Programa `coro` en el loop de fondo con el contexto del hilo actual."""
+        loop = self._ensure_started()
+        context = contextvars.copy_context()
+        future: concurrent.futures.Future = concurrent.futures.Future()
+
+        def _start():
+            if future.cancelled():
+                coro.close()
+                return
+            task = loop.create_task(coro, context=context)
+
+            def _done(t: asyncio.Task):
+                if future.cancelled():
+                    return
+                if t.cancelled():
+                    future.cancel()
+                elif t.exception() is not None:
+                    future.set_exception(t.exception())
+                else:
+                    future.set_result(t.result())
+
+            task.add_done_callback(_done)
+            # Si quien espera cancela el future, cancelar también la tarea
+            future.add_done_callback(lambda f: f.cancelled() and loop.call_soon_threadsafe(task.cancel))
+
+        loop.call_soon_threadsafe(_start)
+        return future
+
+    def run(self, coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+        """Ejecuta `coro` en el loop de fondo y bloquea hasta obtener su resultado."""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except concurrent.futures.TimeoutError:
+            future.cancel()
+            raise
+
+    def iterate(self, agen: AsyncIterator[T]) -> Iterator[T]:
+        """Consume un generador asíncrono desde un hilo síncrono, elemento por elemento."""
+        items: "queue.Queue[tuple]" = queue.Queue()
+
+        async def _pump():
+            try:
+                async for item in agen:
+                    items.put((_ITEM, item))
+            except BaseException as e:
+                items.put((_ERROR, e))
+                raise
+            finally:
+                items.put((_END, None))
+
+        future = self.submit(_pump())
+        try:
+            while True:
+                kind, value = items.get()
+                if kind == _ITEM:
+                    yield value
+                elif kind == _ERROR:
+                    raise value
+                else:
+                    return
+        finally:
+            if not future.done():
+                future.cancel()
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None and loop.is_running():
+            loop.call_soon_threadsafe(loop.stop)
+        if thread is not None:
+            thread.join(timeout=5)
+
+
+# Instancia global del proceso
+app_event_loop = BackgroundEventLoop("app-event-loop")
+atexit.register(app_event_loop.stop)
+
+
+def run_async(coro: Awaitable[T], timeout: Optional[float] = None) -> T:
+    """Atajo para ejecutar una corrutina en el loop de fondo desde código síncrono."""
+    return app_event_loop.run(coro, timeout)
@@ -160,9 +160,35 @@ class LogfireInstrumentation:
                 description='System memory usage in megabytes'
             )
             
+            # Métricas de los pools de hilos por servicio
+            self.executor_queue_depth_histogram = logfire.metric_histogram(
+                'service_executor_queue_depth',
+                unit='1',
+                description='Number of calls waiting in a service executor queue at submit time'
+            )
+            
+            self.executor_wait_time_histogram = logfire.metric_histogram(
+                'service_executor_wait_ms',
+                unit='ms',
+                description='Time calls spend queued before a service executor worker picks them up'
+            )
+            
+            # Métricas de requests al modelo por nivel (routing / synthesis)
+            self.model_request_latency = logfire.metric_histogram(
+                'model_request_duration_ms',
+                unit='ms',
+                description='Duration of LLM requests in milliseconds, by model tier'
+            )
+            
+            self.model_tokens_counter = logfire.metric_counter(
+                'model_tokens_total',
+                unit='1',
+                description='Total number of LLM tokens, by model tier and direction'
+            )
+            
             log_system_event('custom_metrics_configured',
                            component='instrumentation',
-                           metrics_count=6)
+                           metrics_count=10)
             
         except Exception as e:
             log_system_event('metrics_configuration_failed',
@@ -254,6 +280,29 @@ class LogfireInstrumentation:
         except Exception as e:
             logger.error('service_error_metric_failed', error=e, service=service)
     
+    def record_executor_queue_depth(self, service: str, depth: int):
+        """Registra la profundidad de cola de un pool de servicio al encolar una llamada."""
+        try:
+            self.executor_queue_depth_histogram.record(depth, attributes={'service': service})
+        except Exception as e:
+            logger.error('executor_queue_metric_failed', error=e, service=service)
+    
+    def record_executor_wait(self, service: str, wait_ms: float):
+        """Registra cuánto esperó una llamada en la cola de un pool de servicio."""
+        try:
+            self.executor_wait_time_histogram.record(wait_ms, attributes={'service': service})
+        except Exception as e:
+            logger.error('executor_wait_metric_failed', error=e, service=service)
+    
+    def record_model_request(self, tier: str, model: str, duration_ms: float, input_tokens: int, output_tokens: int):
+        """Registra latencia y tokens de un request al modelo, por nivel."""
+        try:
+            self.model_request_latency.record(duration_ms, attributes={'tier': tier, 'model': model})
+            self.model_tokens_counter.add(input_tokens, attributes={'tier': tier, 'model': model, 'direction': 'input'})
+            self.model_tokens_counter.add(output_tokens, attributes={'tier': tier, 'model': model, 'direction': 'output'})
+        except Exception as e:
+            logger.error('model_request_metric_failed', error=e, tier=tier)
+    
     def track_user_session(self, user_id: str, action: str):
         """Rastrea sesiones de usuario (login/logout)."""
         try:
@@ -0,0 +1,240 @@
+# config/memory_store.py
+"""
+Almacén local (SQLite) de los alias de memoria de cada usuario.
+
+Es la fuente de lectura inmediata de la memoria: Mem0 queda como respaldo remoto.
+Las escrituras se guardan primero aquí marcadas como pendientes (`pending = 1`) y
+un proceso de fondo las envía a Mem0; así la cola de escrituras sobrevive a un
+reinicio y varias escrituras del mismo alias se coalescen en una sola.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import logfire
+
+from config import settings
+
+
+class MemoryStore:
+    def __init__(self, db_path: str = ".streamlit/memory_store.db"):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _bump(self, conn: sqlite3.Connection, owner: str) -> None:
+        # Dentro de la misma transacción que la escritura: otros procesos ven ambas o ninguna
+        conn.execute("""
+            INSERT INTO memory_versions (owner, version) VALUES (?, 1)
+            ON CONFLICT(owner) DO UPDATE SET version = memory_versions.version + 1
+        """, (owner,))
+
+    def version(self, owner: str) -> int:
+        """
+        Versión de los alias del usuario; cambia con cada escritura de cualquier proceso
+        que comparta el archivo (para invalidar índices derivados).
+        """
+        with self._connect() as conn:
+            row = conn.execute("SELECT version FROM memory_versions WHERE owner = ?", (owner,)).fetchone()
+        return row["version"] if row else 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Inicializa las tablas de alias y estado de reconciliación"""
+        self.db_path.parent.mkdir(exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_aliases (
+                    owner TEXT NOT NULL,
+                    alias TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    type TEXT,
+                    context TEXT,
+                    extra TEXT,
+                    memory_id TEXT,
+                    pending INTEGER NOT NULL DEFAULT 0,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    updated_at REAL NOT NULL,
+                    PRIMARY KEY (owner, alias)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memory_pending ON memory_aliases (pending, updated_at)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_sync_state (
+                    owner TEXT PRIMARY KEY,
+                    last_reconciled_at REAL NOT NULL,
+                    remote_watermark TEXT
+                )
+            """)
+            # Bases creadas antes de la carga incremental no tienen la marca de agua
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(memory_sync_state)")}
+            if "remote_watermark" not in columns:
+                conn.execute("ALTER TABLE memory_sync_state ADD COLUMN remote_watermark TEXT")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS memory_versions (
+                    owner TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL
+                )
+            """)
+            conn.commit()
+            logfire.info("Base de memoria inicializada con tablas: memory_aliases, memory_sync_state, memory_versions")
+
+    def get_aliases(self, owner: str) -> List[Dict[str, Any]]:
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT alias, value, type, context, extra, memory_id, pending
+                FROM memory_aliases WHERE owner = ? ORDER BY updated_at
+            """, (owner,)).fetchall()
+        return [_row_dict(row) for row in rows]
+
+    def get_alias(self, owner: str, alias: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("""
+                SELECT alias, value, type, context, extra, memory_id, pending
+                FROM memory_aliases WHERE owner = ? AND alias = ?
+            """, (owner, alias)).fetchone()
+        return _row_dict(row) if row else None
+
+    def save_pending(self, owner: str, alias: str, value: str, type: Optional[str] = None,
+                     context: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> float:
+        """Guarda (o reemplaza) un alias escrito por el usuario, pendiente de enviar a Mem0."""
+        updated_at = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO memory_aliases
+                (owner, alias, value, type, context, extra, memory_id, pending, attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, NULL, 1, 0, ?)
+            """, (owner, alias, value, type, context, json.dumps(extra) if extra else None, updated_at))
+            self._bump(conn, owner)
+            conn.commit()
+        return updated_at
+
+    def get_pending(self, limit: int) -> List[Dict[str, Any]]:
+        """Escrituras pendientes de todos los usuarios, las más antiguas primero."""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT owner, alias, value, type, context, extra, memory_id, pending, attempts, updated_at
+                FROM memory_aliases WHERE pending = 1 ORDER BY updated_at LIMIT ?
+            """, (limit,)).fetchall()
+        return [dict(_row_dict(row), owner=row["owner"], attempts=row["attempts"], updated_at=row["updated_at"])
+                for row in rows]
+
+    def mark_synced(self, owner: str, alias: str, updated_at: float, memory_id: Optional[str]) -> None:
+        """Marca la escritura como enviada, salvo que el alias haya cambiado mientras tanto."""
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                UPDATE memory_aliases SET pending = 0, memory_id = ?
+                WHERE owner = ? AND alias = ? AND updated_at = ?
+            """, (memory_id, owner, alias, updated_at))
+            self._bump(conn, owner)
+            conn.commit()
+
+    def mark_failed(self, owner: str, alias: str, updated_at: float) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                UPDATE memory_aliases SET attempts = attempts + 1
+                WHERE owner = ? AND alias = ? AND updated_at = ?
+            """, (owner, alias, updated_at))
+            conn.commit()
+
+    def merge_remote(self, owner: str, remote: Iterable[Dict[str, Any]], protect_seconds: float = 0) -> int:
+        """
+        Incorpora alias leídos de Mem0 (una página o una lectura completa). Los pendientes locales tienen prioridad
+        (todavía no llegaron al remoto). Un alias enviado hace menos de `protect_seconds`
+        solo se reemplaza por su propia memoria remota, porque Mem0 puede devolver
+        todavía la versión anterior mientras indexa la nueva.
+        """
+        now = time.time()
+        remote_by_alias: Dict[str, List[Dict[str, Any]]] = {}
+        for item in remote:
+            if item.get("alias") and item.get("value"):
+                remote_by_alias.setdefault(str(item["alias"]), []).append(item)
+
+        with self._lock, self._connect() as conn:
+            local = {
+                row["alias"]: row for row in conn.execute(
+                    "SELECT alias, memory_id, pending, updated_at FROM memory_aliases WHERE owner = ?", (owner,))
+            }
+            rows = []
+            for alias, items in remote_by_alias.items():
+                current = local.get(alias)
+                chosen = items[-1]
+                if current is not None:
+                    if current["pending"]:
+                        continue
+                    own = [item for item in items if current["memory_id"] and item.get("memory_id") == current["memory_id"]]
+                    if own:
+                        chosen = own[-1]
+                    elif now - current["updated_at"] < protect_seconds:
+                        continue
+                rows.append((owner, alias, str(chosen["value"]), chosen.get("type"), chosen.get("context"),
+                             json.dumps(chosen["extra"]) if chosen.get("extra") else None,
+                             chosen.get("memory_id"), now if current is None else current["updated_at"]))
+            conn.executemany("""
+                INSERT OR REPLACE INTO memory_aliases
+                (owner, alias, value, type, context, extra, memory_id, pending, attempts, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, ?)
+            """, rows)
+            if rows:
+                self._bump(conn, owner)
+            conn.commit()
+        return len(rows)
+
+    def mark_reconciled(self, owner: str, watermark: Optional[str] = None) -> None:
+        """Registra una reconciliación terminada; la marca de agua solo avanza si se recibe una."""
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                INSERT INTO memory_sync_state (owner, last_reconciled_at, remote_watermark) VALUES (?, ?, ?)
+                ON CONFLICT(owner) DO UPDATE SET
+                    last_reconciled_at = excluded.last_reconciled_at,
+                    remote_watermark = COALESCE(excluded.remote_watermark, memory_sync_state.remote_watermark)
+            """, (owner, time.time(), watermark))
+            conn.commit()
+
+    def last_reconciled_at(self, owner: str) -> Optional[float]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT last_reconciled_at FROM memory_sync_state WHERE owner = ?",
+                               (owner,)).fetchone()
+        return row["last_reconciled_at"] if row else None
+
+    def remote_watermark(self, owner: str) -> Optional[str]:
+        """Mayor `updated_at` de Mem0 ya incorporado (None si nunca hubo una lectura completa)."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT remote_watermark FROM memory_sync_state WHERE owner = ?",
+                               (owner,)).fetchone()
+        return row["remote_watermark"] if row else None
+
+    def delete_owner(self, owner: str) -> None:
+        """Elimina todos los alias locales de un usuario."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM memory_aliases WHERE owner = ?", (owner,))
+            conn.execute("DELETE FROM memory_sync_state WHERE owner = ?", (owner,))
+            # La versión no se borra: volver a 0 podría coincidir con un índice armado antes
+            self._bump(conn, owner)
+            conn.commit()
+
+
+def _row_dict(row: sqlite3.Row) -> Dict[str, Any]:
+    return {
+        "alias": row["alias"],
+        "value": row["value"],
+        "type": row["type"],
+        "context": row["context"],
+        "extra": json.loads(row["extra"]) if row["extra"] else None,
+        "memory_id": row["memory_id"],
+        "pending": bool(row["pending"]),
+    }
+
+
+# Instancia global del almacén de memoria
+memory_store = MemoryStore(settings.MEMORY_STORE_DB_PATH)
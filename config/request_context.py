@@ -0,0 +1,48 @@
+# config/request_context.py
+"""
+Contexto de la petición en curso (usuario de la app y credenciales de Atlassian).
+
+Las corrutinas del agente se ejecutan en el loop de fondo (`config/event_loop.py`),
+fuera del hilo del script de Streamlit, donde `st.session_state` no está disponible.
+El script fija aquí el contexto antes de enviar la corrutina; el loop la ejecuta
+con una copia de estas ContextVars, así que cada petición ve solo sus credenciales.
+"""
+
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+current_app_user_id: ContextVar[Optional[str]] = ContextVar('app_user_id', default=None)
+current_atlassian_credentials: ContextVar[Optional[Tuple[str, str]]] = ContextVar('atlassian_credentials', default=None)
+
+
+def set_request_context(
+    user_id: Optional[str],
+    atlassian_username: Optional[str] = None,
+    atlassian_api_key: Optional[str] = None,
+) -> None:
+    """Fija el usuario y las credenciales de Atlassian para las corrutinas que se envíen a continuación."""
+    current_app_user_id.set(user_id or None)
+    if atlassian_username and atlassian_api_key:
+        current_atlassian_credentials.set((atlassian_username, atlassian_api_key))
+    else:
+        current_atlassian_credentials.set(None)
+
+
+def get_request_user_id() -> Optional[str]:
+    return current_app_user_id.get()
+
+
+def resolve_atlassian_credentials(
+    username: Optional[str],
+    api_key: Optional[str],
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Completa credenciales no provistas con las de la petición en curso.
+    Si no hay contexto, retorna los valores recibidos (los clientes recurren a settings).
+    """
+    if username and api_key:
+        return username, api_key
+    credentials = current_atlassian_credentials.get()
+    if credentials:
+        return credentials
+    return username, api_key
@@ -0,0 +1,214 @@
+# config/service_executors.py
+"""
+Pools de hilos dedicados por servicio externo (Jira, Confluence, Mem0).
+
+Reemplazan a `loop.run_in_executor(None, ...)`: cada servicio tiene su propio
+ThreadPoolExecutor con un máximo de workers y un límite de cola, de modo que un
+servicio lento no agote los hilos de los demás. Cuando el pool está saturado la
+llamada espera (en orden de llegada) un tiempo acotado por un lugar y, si no lo
+obtiene, falla con `ServiceSaturatedError`. El lugar se libera cuando termina el
+hilo, aunque quien esperaba el resultado se haya cancelado antes.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Tuple
+
+import logfire
+
+from config import settings
+from config.logging_context import logger
+
+
+class ServiceSaturatedError(RuntimeError):
+    """El pool del servicio tiene todos los workers ocupados y la cola llena."""
+
+    def __init__(self, service: str, max_workers: int, queue_limit: int, waited_seconds: float):
+        self.service = service
+        super().__init__(
+            f"El servicio '{service}' está saturado ({max_workers} en ejecución y {queue_limit} en cola). "
+            f"Se esperó {waited_seconds:.1f}s sin obtener lugar; intenta nuevamente en unos segundos."
+        )
+
+
+class BoundedServiceExecutor:
+    """ThreadPoolExecutor con cola acotada y métricas de profundidad/espera."""
+
+    def __init__(self, service: str, max_workers: int, queue_limit: int, admission_timeout_seconds: float):
+        self.service = service
+        self.max_workers = max(1, max_workers)
+        self.queue_limit = max(0, queue_limit)
+        self.admission_timeout_seconds = max(0.0, admission_timeout_seconds)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=f"{service}-io")
+        # Lugares totales = workers + cola; cada llamada admitida ocupa uno hasta que su hilo termina
+        self._state_lock = threading.Lock()
+        self._available = self.max_workers + self.queue_limit
+        # Corrutinas esperando lugar (pueden venir de distintos event loops), en orden de llegada
+        self._waiters: "Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]]" = deque()
+        self._queued = 0
+        self._running = 0
+
+    async def run(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Ejecuta `func(*args, **kwargs)` en el pool del servicio y espera su resultado."""
+        await self._acquire_slot()
+        enqueued_at = time.monotonic()
+        with self._state_lock:
+            self._queued += 1
+            queue_depth = self._queued
+        _record_queue_depth(self.service, queue_depth)
+
+        # Propagar el contexto (usuario, sesión) al hilo del pool
+        ctx = contextvars.copy_context()
+        started = threading.Event()
+        call = functools.partial(ctx.run, self._run_tracked, started, enqueued_at, func, args, kwargs)
+        try:
+            future = self._executor.submit(call)
+        except BaseException:
+            with self._state_lock:
+                self._queued -= 1
+            self._release_slot()
+            raise
+        # El lugar se libera cuando el hilo termina (o la llamada se cancela antes de empezar),
+        # no cuando deja de esperarla quien la pidió
+        future.add_done_callback(functools.partial(self._on_call_done, started))
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._state_lock:
+            return {
+                "service": self.service,
+                "max_workers": self.max_workers,
+                "queue_limit": self.queue_limit,
+                "running": self._running,
+                "queued": self._queued,
+                "waiting_admission": len(self._waiters),
+            }
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
+
+    async def _acquire_slot(self) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        with self._state_lock:
+            if self._available > 0 and not self._waiters:
+                self._available -= 1
+                return
+            waiter = loop.create_future()
+            if self.admission_timeout_seconds > 0:
+                self._waiters.append((loop, waiter))
+        try:
+            if self.admission_timeout_seconds > 0:
+                await asyncio.wait_for(waiter, self.admission_timeout_seconds)
+                return
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                return
+        except BaseException:
+            # Cancelada mientras esperaba: si el lugar ya se le había otorgado, devolverlo
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            raise
+        finally:
+            with self._state_lock:
+                try:
+                    self._waiters.remove((loop, waiter))
+                except ValueError:
+                    pass  # Ya se le había pasado un lugar (ver _grant)
+        waited = time.monotonic() - started
+        logger.warning("service_executor_saturated", service=self.service,
+                       max_workers=self.max_workers, queue_limit=self.queue_limit,
+                       waited_seconds=round(waited, 2))
+        _record_rejection(self.service)
+        raise ServiceSaturatedError(self.service, self.max_workers, self.queue_limit, waited)
+
+    def _release_slot(self) -> None:
+        """Devuelve un lugar: pasa directo al primer waiter, o queda disponible."""
+        with self._state_lock:
+            if not self._waiters:
+                self._available += 1
+                return
+            loop, waiter = self._waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._grant, waiter)
+        except RuntimeError:
+            # El loop del waiter ya cerró: el lugar pasa al siguiente
+            self._release_slot()
+
+    def _grant(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            # El waiter venció o se canceló mientras se le pasaba el lugar
+            self._release_slot()
+        else:
+            waiter.set_result(True)
+
+    def _on_call_done(self, started: threading.Event, _future: Future) -> None:
+        if not started.is_set():
+            # Cancelada antes de llegar a un worker: nunca salió de la cola
+            with self._state_lock:
+                self._queued -= 1
+        self._release_slot()
+
+    def _run_tracked(self, started: threading.Event, enqueued_at: float, func: Callable[..., Any],
+                     args: tuple, kwargs: dict) -> Any:
+        wait_ms = (time.monotonic() - enqueued_at) * 1000
+        with self._state_lock:
+            started.set()
+            self._queued -= 1
+            self._running += 1
+        _record_wait_time(self.service, wait_ms)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._state_lock:
+                self._running -= 1
+
+
+def _record_queue_depth(service: str, depth: int) -> None:
+    try:
+        from config.logfire_instrumentation import get_instrumentation
+        get_instrumentation().record_executor_queue_depth(service, depth)
+    except Exception as e:
+        logfire.debug("No se pudo registrar profundidad de cola de {service}: {error}", service=service, error=str(e))
+
+
+def _record_wait_time(service: str, wait_ms: float) -> None:
+    try:
+        from config.logfire_instrumentation import get_instrumentation
+        get_instrumentation().record_executor_wait(service, wait_ms)
+    except Exception as e:
+        logfire.debug("No se pudo registrar espera de cola de {service}: {error}", service=service, error=str(e))
+
+
+def _record_rejection(service: str) -> None:
+    try:
+        from config.logfire_instrumentation import get_instrumentation
+        get_instrumentation().record_service_error(service, "executor_saturated")
+    except Exception:
+        pass
+
+
+# Instancias globales por servicio
+jira_executor = BoundedServiceExecutor(
+    "jira",
+    max_workers=settings.JIRA_EXECUTOR_MAX_WORKERS,
+    queue_limit=settings.JIRA_EXECUTOR_QUEUE_LIMIT,
+    admission_timeout_seconds=settings.SERVICE_EXECUTOR_ADMISSION_TIMEOUT_SECONDS,
+)
+confluence_executor = BoundedServiceExecutor(
+    "confluence",
+    max_workers=settings.CONFLUENCE_EXECUTOR_MAX_WORKERS,
+    queue_limit=settings.CONFLUENCE_EXECUTOR_QUEUE_LIMIT,
+    admission_timeout_seconds=settings.SERVICE_EXECUTOR_ADMISSION_TIMEOUT_SECONDS,
+)
+mem0_executor = BoundedServiceExecutor(
+    "mem0",
+    max_workers=settings.MEM0_EXECUTOR_MAX_WORKERS,
+    queue_limit=settings.MEM0_EXECUTOR_QUEUE_LIMIT,
+    admission_timeout_seconds=settings.SERVICE_EXECUTOR_ADMISSION_TIMEOUT_SECONDS,
+)
@@ -18,6 +18,59 @@ LOGFIRE_TOKEN = os.getenv("LOGFIRE_TOKEN")
 
 # PydanticAI Model (opcional, puedes definirlo directamente en el agente)
 PYDANTIC_AI_MODEL = os.getenv("PYDANTIC_AI_MODEL", "openai:gpt-4.1-mini") # Default model
+# Formatear listas con el LLM en vez del renderizador Markdown determinista
+MARKDOWN_FORMATTER_USE_LLM = os.getenv("MARKDOWN_FORMATTER_USE_LLM", "false").lower() == "true"
+# Streaming de respuestas del agente en el chat (texto parcial + eventos de herramientas)
+AGENT_STREAMING_ENABLED = os.getenv("AGENT_STREAMING_ENABLED", "true").lower() == "true"
+AGENT_STREAM_RENDER_INTERVAL_SECONDS = float(os.getenv("AGENT_STREAM_RENDER_INTERVAL_SECONDS", "0.05"))
+
+# Model Tiering
+# Modelo rápido para elegir herramientas y modelo grande solo para sintetizar muchos resultados.
+# Sin AGENT_ROUTING_MODEL (o igual al de síntesis) se usa un único modelo como siempre.
+AGENT_ROUTING_MODEL = os.getenv("AGENT_ROUTING_MODEL", "")
+AGENT_SYNTHESIS_MODEL = os.getenv("AGENT_SYNTHESIS_MODEL", PYDANTIC_AI_MODEL)
+AGENT_SYNTHESIS_MIN_TOOL_RESULTS = int(os.getenv("AGENT_SYNTHESIS_MIN_TOOL_RESULTS", "3"))
+AGENT_SYNTHESIS_MIN_RESULT_CHARS = int(os.getenv("AGENT_SYNTHESIS_MIN_RESULT_CHARS", "6000"))
+
+# Conversation History
+# Presupuesto de tokens del historial reenviado al modelo y turnos recientes que se conservan íntegros
+HISTORY_MAX_TOKENS = int(os.getenv("HISTORY_MAX_TOKENS", "12000"))
+HISTORY_KEEP_RECENT_TURNS = int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "4"))
+# Largo máximo de un retorno de herramienta en turnos antiguos antes de resumirlo
+HISTORY_TOOL_RETURN_MAX_CHARS = int(os.getenv("HISTORY_TOOL_RETURN_MAX_CHARS", "500"))
+HISTORY_SUMMARY_MAX_CHARS = int(os.getenv("HISTORY_SUMMARY_MAX_CHARS", "4000"))
+
+# Tool Result Compaction
+# Presupuesto (caracteres JSON) de un resultado de herramienta antes de compactarlo
+TOOL_RESULT_MAX_CHARS = int(os.getenv("TOOL_RESULT_MAX_CHARS", "6000"))
+TOOL_RESULT_MAX_ITEMS = int(os.getenv("TOOL_RESULT_MAX_ITEMS", "10"))
+TOOL_RESULT_MAX_STRING_CHARS = int(os.getenv("TOOL_RESULT_MAX_STRING_CHARS", "1500"))
+# Resultados completos disponibles para paginar con get_tool_result_page
+TOOL_RESULT_HANDLE_TTL_SECONDS = float(os.getenv("TOOL_RESULT_HANDLE_TTL_SECONDS", "1800"))
+TOOL_RESULT_HANDLE_MAX_ENTRIES = int(os.getenv("TOOL_RESULT_HANDLE_MAX_ENTRIES", "256"))
+
+# Agent Response Cache
+# Respuestas a preguntas de solo lectura repetidas; TTL por defecto si la herramienta no define frescura
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() == "true"
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+
+# Tool Scheduler
+# Herramientas de lectura en paralelo por usuario dentro de un paso del agente (las escrituras se serializan)
+TOOL_READ_CONCURRENCY_PER_USER = int(os.getenv("TOOL_READ_CONCURRENCY_PER_USER", "4"))
+
+# Intent Router
+# Resolver sin LLM comandos triviales ("PROJ-123", "log 2h on PROJ-45", "mueve PROJ-9 a Done")
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+# Escrituras (worklog, transición) sin LLM también en medio de una conversación; por defecto solo en el primer turno
+INTENT_ROUTER_WRITE_ROUTES_WITH_HISTORY = os.getenv("INTENT_ROUTER_WRITE_ROUTES_WITH_HISTORY", "false").lower() == "true"
+
+# Tool Catalog
+# Grupos de herramientas especializadas bajo demanda y esquemas recortados en cada request
+TOOL_CATALOG_ENABLED = os.getenv("TOOL_CATALOG_ENABLED", "true").lower() == "true"
+TOOL_CATALOG_RECENT_TURNS = int(os.getenv("TOOL_CATALOG_RECENT_TURNS", "3"))
+TOOL_SCHEMA_MAX_DESCRIPTION_CHARS = int(os.getenv("TOOL_SCHEMA_MAX_DESCRIPTION_CHARS", "400"))
+TOOL_SCHEMA_MAX_PARAM_DESCRIPTION_CHARS = int(os.getenv("TOOL_SCHEMA_MAX_PARAM_DESCRIPTION_CHARS", "160"))
 
 # Timezone Configuration
 TIMEZONE = os.getenv("TIMEZONE", "UTC")
@@ -25,6 +78,95 @@ TIMEZONE = os.getenv("TIMEZONE", "UTC")
 # Mem0 Configuration
 MEM0_API_KEY = os.getenv("MEM0_API_KEY")
 
+# Atlassian Client Pool Configuration
+# Clientes reutilizados por (URL, usuario, huella del token) entre llamadas a herramientas
+ATLASSIAN_CLIENT_CACHE_MAX_SIZE = int(os.getenv("ATLASSIAN_CLIENT_CACHE_MAX_SIZE", "64"))
+ATLASSIAN_CLIENT_VALIDATION_TTL_SECONDS = int(os.getenv("ATLASSIAN_CLIENT_VALIDATION_TTL_SECONDS", "900"))
+ATLASSIAN_CLIENT_IDLE_TIMEOUT_SECONDS = int(os.getenv("ATLASSIAN_CLIENT_IDLE_TIMEOUT_SECONDS", "1800"))
+# Conexiones keep-alive máximas por host para cada cliente
+ATLASSIAN_HTTP_POOL_MAXSIZE = int(os.getenv("ATLASSIAN_HTTP_POOL_MAXSIZE", "10"))
+# Transporte asíncrono (httpx) usado por las herramientas
+ATLASSIAN_ASYNC_MAX_CONNECTIONS = int(os.getenv("ATLASSIAN_ASYNC_MAX_CONNECTIONS", "100"))
+ATLASSIAN_ASYNC_MAX_KEEPALIVE = int(os.getenv("ATLASSIAN_ASYNC_MAX_KEEPALIVE", "20"))
+ATLASSIAN_HTTP_TIMEOUT_SECONDS = float(os.getenv("ATLASSIAN_HTTP_TIMEOUT_SECONDS", "30"))
+
+# Jira Search Pagination
+JIRA_SEARCH_PAGE_SIZE = int(os.getenv("JIRA_SEARCH_PAGE_SIZE", "100"))
+JIRA_SEARCH_MAX_CONCURRENT_PAGES = int(os.getenv("JIRA_SEARCH_MAX_CONCURRENT_PAGES", "4"))
+# Tope de issues que search_issues devuelve al agente en una sola llamada
+JIRA_SEARCH_MAX_RESULTS = int(os.getenv("JIRA_SEARCH_MAX_RESULTS", "1000"))
+# Usar /search/jql con nextPageToken (instancias donde /search está deprecado)
+JIRA_SEARCH_TOKEN_PAGINATION = os.getenv("JIRA_SEARCH_TOKEN_PAGINATION", "false").lower() == "true"
+
+# Shared Cache Backend
+# "sqlite" comparte las lecturas de Atlassian entre los procesos de Streamlit del host; "memory" es por proceso
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "sqlite").lower()
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", ".streamlit/shared_cache.db")
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "4096"))
+CACHE_SQLITE_MMAP_BYTES = int(os.getenv("CACHE_SQLITE_MMAP_BYTES", str(64 * 1024 * 1024)))
+
+# Jira Issue Cache
+# Tiempo en que una entrada se sirve sin consultar a Jira; luego se revalida con el campo `updated`
+JIRA_ISSUE_CACHE_TTL_SECONDS = float(os.getenv("JIRA_ISSUE_CACHE_TTL_SECONDS", "60"))
+# Tiempo que una entrada vencida se conserva para revalidarla en lugar de descargarla de nuevo
+JIRA_ISSUE_CACHE_RETAIN_SECONDS = float(os.getenv("JIRA_ISSUE_CACHE_RETAIN_SECONDS", "3600"))
+# Frescura de sprints activos y de estados/proyectos (transiciones se invalidan con el issue)
+JIRA_SPRINT_CACHE_TTL_SECONDS = float(os.getenv("JIRA_SPRINT_CACHE_TTL_SECONDS", "120"))
+JIRA_STATUS_CACHE_TTL_SECONDS = float(os.getenv("JIRA_STATUS_CACHE_TTL_SECONDS", "3600"))
+
+# Confluence Page Cache
+CONFLUENCE_PAGE_CACHE_TTL_SECONDS = float(os.getenv("CONFLUENCE_PAGE_CACHE_TTL_SECONDS", "600"))
+
+# Jira Batch Fetch
+# Claves por consulta `key in (...)` y bloques consultados en paralelo
+JIRA_BATCH_CHUNK_SIZE = int(os.getenv("JIRA_BATCH_CHUNK_SIZE", "50"))
+JIRA_BATCH_MAX_CONCURRENCY = int(os.getenv("JIRA_BATCH_MAX_CONCURRENCY", "4"))
+
+# Worklog Aggregation
+WORKLOG_AGGREGATION_MAX_ISSUES = int(os.getenv("WORKLOG_AGGREGATION_MAX_ISSUES", "2000"))
+# Descargas de worklogs paginados en paralelo
+WORKLOG_FETCH_CONCURRENCY = int(os.getenv("WORKLOG_FETCH_CONCURRENCY", "8"))
+
+# Worklog Sync (almacén local alimentado por el feed "worklogs actualizados desde")
+WORKLOG_SYNC_ENABLED = os.getenv("WORKLOG_SYNC_ENABLED", "true").lower() == "true"
+WORKLOG_STORE_DB_PATH = os.getenv("WORKLOG_STORE_DB_PATH", ".streamlit/worklog_store.db")
+# Días de historia en la primera sincronización (0 = historia completa)
+WORKLOG_SYNC_INITIAL_DAYS = int(os.getenv("WORKLOG_SYNC_INITIAL_DAYS", "90"))
+# Antigüedad máxima del almacén antes de sincronizar de nuevo al leer
+WORKLOG_SYNC_MAX_STALENESS_SECONDS = float(os.getenv("WORKLOG_SYNC_MAX_STALENESS_SECONDS", "300"))
+
+# Memory Store (alias locales con escritura diferida a Mem0)
+MEMORY_STORE_DB_PATH = os.getenv("MEMORY_STORE_DB_PATH", ".streamlit/memory_store.db")
+# Escrituras pendientes enviadas por lote, espera antes de cada lote y reintentos por escritura
+MEMORY_WRITE_BATCH_SIZE = int(os.getenv("MEMORY_WRITE_BATCH_SIZE", "10"))
+MEMORY_WRITE_BATCH_DELAY_SECONDS = float(os.getenv("MEMORY_WRITE_BATCH_DELAY_SECONDS", "0.5"))
+MEMORY_WRITE_MAX_RETRIES = int(os.getenv("MEMORY_WRITE_MAX_RETRIES", "3"))
+# Cada cuánto se vuelve a consultar Mem0 por cambios en la memoria del usuario
+MEMORY_RECONCILE_INTERVAL_SECONDS = float(os.getenv("MEMORY_RECONCILE_INTERVAL_SECONDS", "600"))
+# Lectura paginada de Mem0: tamaño de página, tope de páginas y espera máxima de la primera al iniciar
+MEMORY_PRELOAD_PAGE_SIZE = int(os.getenv("MEMORY_PRELOAD_PAGE_SIZE", "50"))
+MEMORY_PRELOAD_MAX_PAGES = int(os.getenv("MEMORY_PRELOAD_MAX_PAGES", "40"))
+MEMORY_PRELOAD_FIRST_PAGE_TIMEOUT_SECONDS = float(os.getenv("MEMORY_PRELOAD_FIRST_PAGE_TIMEOUT_SECONDS", "15"))
+# Índice local para search_memory (filtros exactos por hash y similitud coseno con NumPy)
+MEMORY_LOCAL_INDEX_ENABLED = os.getenv("MEMORY_LOCAL_INDEX_ENABLED", "true").lower() == "true"
+MEMORY_INDEX_DIR = os.getenv("MEMORY_INDEX_DIR", ".streamlit/memory_index")
+MEMORY_INDEX_DIMS = int(os.getenv("MEMORY_INDEX_DIMS", "1024"))
+MEMORY_INDEX_MIN_SCORE = float(os.getenv("MEMORY_INDEX_MIN_SCORE", "0.2"))
+# Alias inyectados como contexto en cada prompt: los más relevantes (BM25) dentro de este presupuesto
+MEMORY_CONTEXT_TOKEN_BUDGET = int(os.getenv("MEMORY_CONTEXT_TOKEN_BUDGET", "150"))
+MEMORY_CONTEXT_MAX_ALIASES = int(os.getenv("MEMORY_CONTEXT_MAX_ALIASES", "10"))
+
+# Service Executor Configuration
+# Pools de hilos dedicados por servicio para llamadas síncronas (workers + cola máxima)
+JIRA_EXECUTOR_MAX_WORKERS = int(os.getenv("JIRA_EXECUTOR_MAX_WORKERS", "16"))
+JIRA_EXECUTOR_QUEUE_LIMIT = int(os.getenv("JIRA_EXECUTOR_QUEUE_LIMIT", "64"))
+CONFLUENCE_EXECUTOR_MAX_WORKERS = int(os.getenv("CONFLUENCE_EXECUTOR_MAX_WORKERS", "8"))
+CONFLUENCE_EXECUTOR_QUEUE_LIMIT = int(os.getenv("CONFLUENCE_EXECUTOR_QUEUE_LIMIT", "32"))
+MEM0_EXECUTOR_MAX_WORKERS = int(os.getenv("MEM0_EXECUTOR_MAX_WORKERS", "4"))
+MEM0_EXECUTOR_QUEUE_LIMIT = int(os.getenv("MEM0_EXECUTOR_QUEUE_LIMIT", "32"))
+# Segundos que una llamada espera lugar en un pool saturado antes de fallar
+SERVICE_EXECUTOR_ADMISSION_TIMEOUT_SECONDS = float(os.getenv("SERVICE_EXECUTOR_ADMISSION_TIMEOUT_SECONDS", "5"))
+
 def validate_config():
     """Valida que las configuraciones esenciales estén presentes."""
     required_jira = [JIRA_URL, JIRA_USERNAME, JIRA_API_TOKEN]
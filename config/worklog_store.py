@@ -0,0 +1,183 @@
+# config/worklog_store.py
+"""
+Almacén local (SQLite) de worklogs de Jira sincronizados incrementalmente.
+
+Vive junto a la base de credenciales en `.streamlit/`. Los worklogs se guardan por
+usuario de Atlassian (`owner`) porque el feed de Jira solo devuelve lo que ese
+usuario puede ver; así nunca se responde con datos de otra cuenta.
+"""
+
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import logfire
+
+from config import settings
+from config.settings import parse_datetime_robust
+
+
+class WorklogStore:
+    def __init__(self, db_path: str = ".streamlit/worklog_store.db"):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        """Inicializa las tablas de worklogs y estado de sincronización"""
+        self.db_path.parent.mkdir(exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS worklogs (
+                    owner TEXT NOT NULL,
+                    worklog_id TEXT NOT NULL,
+                    issue_id TEXT NOT NULL,
+                    author_account_id TEXT,
+                    author_display_name TEXT,
+                    started TEXT,
+                    time_spent_seconds INTEGER NOT NULL DEFAULT 0,
+                    comment TEXT,
+                    updated_ms INTEGER,
+                    PRIMARY KEY (owner, worklog_id)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_worklogs_issue ON worklogs (owner, issue_id)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_worklogs_author ON worklogs (owner, author_account_id)")
+
+            # watermark_ms: hasta dónde llegó el feed; covered_since_ms: desde cuándo está completo
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS worklog_sync_state (
+                    owner TEXT PRIMARY KEY,
+                    watermark_ms INTEGER NOT NULL,
+                    covered_since_ms INTEGER NOT NULL,
+                    last_sync_at REAL NOT NULL
+                )
+            """)
+            conn.commit()
+            logfire.info("Base de worklogs inicializada con tablas: worklogs, worklog_sync_state")
+
+    def get_sync_state(self, owner: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT watermark_ms, covered_since_ms, last_sync_at FROM worklog_sync_state WHERE owner = ?",
+                (owner,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def apply_changes(
+        self,
+        owner: str,
+        upserts: Iterable[Dict[str, Any]],
+        deleted_ids: Iterable[str],
+        watermark_ms: int,
+        covered_since_ms: int,
+    ) -> int:
+        """Aplica un lote de cambios del feed y avanza la marca de agua en la misma transacción."""
+        rows = _worklog_rows(owner, upserts)
+        deleted = [(owner, str(worklog_id)) for worklog_id in deleted_ids]
+        with self._lock, self._connect() as conn:
+            conn.executemany(_UPSERT_SQL, rows)
+            conn.executemany("DELETE FROM worklogs WHERE owner = ? AND worklog_id = ?", deleted)
+            conn.execute("""
+                INSERT OR REPLACE INTO worklog_sync_state (owner, watermark_ms, covered_since_ms, last_sync_at)
+                VALUES (?, ?, ?, ?)
+            """, (owner, watermark_ms, covered_since_ms, time.time()))
+            conn.commit()
+        return len(rows)
+
+    def upsert_worklogs(self, owner: str, worklogs: Iterable[Dict[str, Any]]) -> int:
+        """Guarda worklogs escritos por la propia aplicación sin mover la marca de agua."""
+        rows = _worklog_rows(owner, worklogs)
+        with self._lock, self._connect() as conn:
+            conn.executemany(_UPSERT_SQL, rows)
+            conn.commit()
+        return len(rows)
+
+    def touch(self, owner: str) -> None:
+        """Marca una sincronización sin cambios como reciente."""
+        with self._lock, self._connect() as conn:
+            conn.execute("UPDATE worklog_sync_state SET last_sync_at = ? WHERE owner = ?", (time.time(), owner))
+            conn.commit()
+
+    def get_issue_worklogs(self, owner: str, issue_id: str) -> List[Dict[str, Any]]:
+        """Worklogs de un issue con la misma forma que la respuesta de la API de Jira."""
+        with self._connect() as conn:
+            rows = conn.execute("""
+                SELECT worklog_id, author_account_id, author_display_name, started, time_spent_seconds, comment
+                FROM worklogs WHERE owner = ? AND issue_id = ?
+                ORDER BY started
+            """, (owner, str(issue_id))).fetchall()
+        return [
+            {
+                "id": row["worklog_id"],
+                "author": {"accountId": row["author_account_id"], "displayName": row["author_display_name"]},
+                "started": row["started"],
+                "timeSpentSeconds": row["time_spent_seconds"],
+                "comment": row["comment"],
+            }
+            for row in rows
+        ]
+
+    def delete_owner(self, owner: str) -> None:
+        """Elimina todos los datos sincronizados de un usuario (ej. al borrar sus credenciales)."""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM worklogs WHERE owner = ?", (owner,))
+            conn.execute("DELETE FROM worklog_sync_state WHERE owner = ?", (owner,))
+            conn.commit()
+
+
+_UPSERT_SQL = """
+    INSERT OR REPLACE INTO worklogs
+    (owner, worklog_id, issue_id, author_account_id, author_display_name,
+     started, time_spent_seconds, comment, updated_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _worklog_rows(owner: str, worklogs: Iterable[Dict[str, Any]]) -> List[tuple]:
+    return [
+        (
+            owner,
+            str(w.get("id")),
+            str(w.get("issueId")),
+            (w.get("author") or {}).get("accountId") or (w.get("author") or {}).get("name"),
+            (w.get("author") or {}).get("displayName"),
+            w.get("started"),
+            int(w.get("timeSpentSeconds") or 0),
+            _comment_text(w.get("comment")),
+            _to_epoch_ms(w.get("updated")),
+        )
+        for w in worklogs
+        if w.get("id") is not None and w.get("issueId") is not None
+    ]
+
+
+def _comment_text(comment: Any) -> Optional[str]:
+    if comment is None or isinstance(comment, str):
+        return comment
+    try:
+        return comment["content"][0]["content"][0]["text"]
+    except (KeyError, IndexError, TypeError):
+        return str(comment)
+
+
+def _to_epoch_ms(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    try:
+        return int(parse_datetime_robust(value, fallback_to_now=False).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+# Instancia global del almacén de worklogs
+worklog_store = WorklogStore(settings.WORKLOG_STORE_DB_PATH)
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Pruebas de los backends de cache (config/cache_backend.py).
+No requieren conexión a Jira ni a Confluence.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.cache_backend import CacheBackend, MemoryCacheBackend, SQLiteCacheBackend, user_namespace
+
+
+def _sqlite_backend(max_entries=100):
+    return SQLiteCacheBackend(os.path.join(tempfile.mkdtemp(), "cache.db"), max_entries=max_entries, mmap_bytes=0)
+
+
+def test_namespaces_por_usuario_no_se_cruzan():
+    alice, bob = user_namespace("jira_issue", "alice"), user_namespace("jira_issue", "bob")
+    assert alice != bob and alice.startswith("jira_issue:") and "alice" not in alice
+    for backend in (MemoryCacheBackend(10), _sqlite_backend()):
+        backend.set(alice, "PROJ-1|summary", {"key": "PROJ-1"}, 60)
+        assert backend.get(alice, "PROJ-1|summary") == {"key": "PROJ-1"}
+        assert backend.get(bob, "PROJ-1|summary") is None
+
+
+def test_entradas_vencidas_no_se_sirven():
+    for backend in (MemoryCacheBackend(10), _sqlite_backend()):
+        backend.set("ns", "k", [1, 2], -1)
+        assert backend.get("ns", "k") is None
+
+
+def test_invalidacion_por_prefijo_entre_usuarios():
+    for backend in (MemoryCacheBackend(10), _sqlite_backend()):
+        for user in ("alice", "bob"):
+            backend.set(user_namespace("jira_issue", user), "PROJ-1|summary", {"a": 1}, 60)
+            backend.set(user_namespace("jira_issue", user), "PROJ-10|summary", {"a": 1}, 60)
+        assert backend.invalidate("jira_issue:", "PROJ-1|") == 2
+        assert backend.get(user_namespace("jira_issue", "alice"), "PROJ-10|summary") == {"a": 1}
+
+
+def test_lru_en_memoria_respeta_el_maximo():
+    backend = MemoryCacheBackend(2)
+    backend.set("ns", "a", 1, 60)
+    backend.set("ns", "b", 2, 60)
+    backend.get("ns", "a")
+    backend.set("ns", "c", 3, 60)
+    assert backend.get("ns", "b") is None
+    assert backend.get("ns", "a") == 1
+
+
+def test_sqlite_comparte_entre_instancias():
+    path = os.path.join(tempfile.mkdtemp(), "cache.db")
+    writer = SQLiteCacheBackend(path, max_entries=100, mmap_bytes=0)
+    reader = SQLiteCacheBackend(path, max_entries=100, mmap_bytes=0)
+    writer.set("ns", "k", {"issues": []}, 60)
+    assert reader.get("ns", "k") == {"issues": []}
+
+
+def test_sqlite_recorta_las_menos_usadas():
+    backend = _sqlite_backend(max_entries=2)
+    backend.PRUNE_EVERY_WRITES = 1
+    backend.TOUCH_EVERY_SECONDS = 0
+    backend.set("ns", "a", 1, 60)
+    backend.set("ns", "b", 2, 60)
+    backend.get("ns", "a")
+    backend.set("ns", "c", 3, 60)
+    assert backend.get("ns", "b") is None
+    assert backend.get("ns", "a") == 1
+
+
+def test_get_or_load_guarda_solo_resultados_no_vacios():
+    async def run(backend):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return {"statuses": ["Done"]} if len(calls) > 1 else {}
+
+        assert await backend.get_or_load("ns", "k", 60, loader) == {}
+        assert await backend.get_or_load("ns", "k", 60, loader) == {"statuses": ["Done"]}
+        assert await backend.get_or_load("ns", "k", 60, loader) == {"statuses": ["Done"]}
+        assert len(calls) == 2
+
+    for backend in (MemoryCacheBackend(10), _sqlite_backend()):
+        asyncio.run(run(backend))
+
+
+def test_la_interfaz_no_se_instancia():
+    try:
+        CacheBackend()
+    except TypeError:
+        return
+    raise AssertionError("CacheBackend debería ser abstracta")
+
+
+if __name__ == "__main__":
+    test_namespaces_por_usuario_no_se_cruzan()
+    test_entradas_vencidas_no_se_sirven()
+    test_invalidacion_por_prefijo_entre_usuarios()
+    test_lru_en_memoria_respeta_el_maximo()
+    test_sqlite_comparte_entre_instancias()
+    test_sqlite_recorta_las_menos_usadas()
+    test_get_or_load_guarda_solo_resultados_no_vacios()
+    test_la_interfaz_no_se_instancia()
+    print("✅ Pruebas de backends de cache completadas")
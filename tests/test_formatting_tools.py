@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Pruebas del renderizador Markdown determinista de tools/formatting_tools.py.
+No requieren conexión a Jira ni al LLM.
+"""
+
+import sys
+import os
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agent_core.output_models import JiraIssueItem, SprintIssueSummary, ConfluencePageItem
+from tools.formatting_tools import (
+    format_jira_issues_for_markdown,
+    iter_jira_issues_markdown,
+    render_confluence_pages_markdown,
+    render_sprint_issues_markdown,
+)
+
+
+def test_format_jira_issues_formato_exacto():
+    issues = [
+        JiraIssueItem(key="TEST-1", summary="Primer issue de prueba", status="To Do", assignee="Usuario A"),
+        JiraIssueItem(key="TEST-2", summary="Segundo issue", status="In Progress", assignee=None),
+    ]
+    expected = (
+        "1.  **TEST-1**\n"
+        "    *   **Resumen:** Primer issue de prueba\n"
+        "    *   **Estado:** To Do\n"
+        "    *   **Responsable:** Usuario A\n"
+        "2.  **TEST-2**\n"
+        "    *   **Resumen:** Segundo issue\n"
+        "    *   **Estado:** In Progress\n"
+        "    *   **Responsable:** No asignado"
+    )
+    assert format_jira_issues_for_markdown(issues) == expected
+
+
+def test_format_jira_issues_lista_vacia():
+    assert format_jira_issues_for_markdown([]) == "No se encontraron issues con los criterios especificados."
+
+
+def test_iter_jira_issues_un_bloque_por_issue():
+    issues = [JiraIssueItem(key=f"TEST-{i}", summary="s", status="Done") for i in range(1, 4)]
+    blocks = list(iter_jira_issues_markdown(issues))
+    assert len(blocks) == 3
+    assert blocks[2].startswith("3.  **TEST-3**")
+
+
+def test_render_sprint_issues_story_points():
+    issues = [
+        SprintIssueSummary(key="S-1", summary="Con puntos", status="Done", assignee="Ana", story_points=3.0),
+        SprintIssueSummary(key="S-2", summary="Sin puntos", status="To Do", assignee=None),
+    ]
+    markdown = render_sprint_issues_markdown(issues)
+    assert "    *   **Story Points:** 3\n" in markdown
+    assert markdown.endswith("    *   **Story Points:** Sin estimar")
+
+
+def test_render_confluence_pages_con_enlace():
+    pages = [ConfluencePageItem(title="Guía", space="DEV", url="https://example.atlassian.net/wiki/x")]
+    markdown = render_confluence_pages_markdown(pages)
+    assert markdown.startswith("1.  **[Guía](https://example.atlassian.net/wiki/x)**")
+    assert "    *   **Espacio:** DEV" in markdown
+
+
+if __name__ == "__main__":
+    test_format_jira_issues_formato_exacto()
+    test_format_jira_issues_lista_vacia()
+    test_iter_jira_issues_un_bloque_por_issue()
+    test_render_sprint_issues_story_points()
+    test_render_confluence_pages_con_enlace()
+    print("✅ Pruebas de formato completadas")
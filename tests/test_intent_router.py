@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Pruebas del router de comandos sin LLM (agent_core/intent_router.py): reconocimiento
+y ejecución de `try_route` con herramientas falsas. No requieren conexión a Jira ni al LLM.
+"""
+
+import sys
+import os
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import agent_core.intent_router as intent_router_module
+from agent_core.intent_router import IntentRouter, match_command
+from agent_core.tool_scheduler import READ_ONLY, TOOL_ACCESS
+
+
+def test_clave_sola_es_detalle_de_issue():
+    command = match_command("proj-123")
+    assert command.tool_name == "get_issue_details"
+    assert command.issue_key == "PROJ-123"
+    assert match_command("  PROJ-123? ").issue_key == "PROJ-123"
+
+
+def test_registro_de_horas():
+    command = match_command("log 2h on PROJ-45")
+    assert command.tool_name == "add_worklog_to_jira_issue"
+    assert (command.issue_key, command.time_spent) == ("PROJ-45", "2h")
+    assert match_command("registra 1h 30m en PROJ-45").time_spent == "1h 30m"
+
+
+def test_registro_de_horas_no_reconocido_va_al_agente():
+    assert match_command("log 2 horas on PROJ-45") is None
+    assert match_command("log 0h on PROJ-45") is None
+
+
+def test_transicion():
+    command = match_command("move PROJ-9 to Done")
+    assert command.tool_name == "transition_issue"
+    assert (command.issue_key, command.target_status) == ("PROJ-9", "Done")
+    assert match_command("mueve PROJ-9 a 'En curso'").target_status == "En curso"
+
+
+def test_pedidos_ambiguos_van_al_agente():
+    assert match_command("¿qué pasa con PROJ-9?") is None
+    assert match_command("dame los worklogs de PROJ-9 y PROJ-10") is None
+    assert match_command("") is None
+
+
+@contextmanager
+def _fake_tools():
+    """Reemplaza las herramientas de Jira del router y registra las llamadas recibidas."""
+    calls = []
+
+    async def get_issue_details(issue_key):
+        calls.append(("get_issue_details", issue_key))
+        return SimpleNamespace(status="Done", key=issue_key, summary="Login", assignee=None,
+                               story_points=None, duedate=None, description=None)
+
+    async def add_worklog_to_jira_issue(issue_key, time_spent, **kwargs):
+        calls.append(("add_worklog_to_jira_issue", issue_key))
+        return SimpleNamespace(id="10001", comment=None, time_spent_seconds=7200, started="2024-01-01T09:00")
+
+    async def get_issue_transitions(issue_key):
+        calls.append(("get_issue_transitions", issue_key))
+        done = SimpleNamespace(id="3", name="Done")
+        return SimpleNamespace(
+            current_status=SimpleNamespace(id="1", name="To Do"),
+            available_transitions=[SimpleNamespace(id="31", name="Done", to_status=done,
+                                                   has_screen=False, required_fields=[])],
+        )
+
+    async def transition_issue(issue_key, transition_id, **kwargs):
+        calls.append(("transition_issue", issue_key))
+        return {"success": True, "new_status": "Done"}
+
+    fakes = {
+        "get_issue_details": get_issue_details,
+        "add_worklog_to_jira_issue": add_worklog_to_jira_issue,
+        "get_issue_transitions": get_issue_transitions,
+        "transition_issue": transition_issue,
+    }
+    originals = {name: getattr(intent_router_module, name) for name in fakes}
+    access = {name: TOOL_ACCESS.get(name) for name in ("get_issue_details", "get_issue_transitions")}
+    for name, fake in fakes.items():
+        setattr(intent_router_module, name, fake)
+    for name in access:
+        TOOL_ACCESS[name] = READ_ONLY
+    try:
+        yield calls
+    finally:
+        for name, original in originals.items():
+            setattr(intent_router_module, name, original)
+        for name, previous in access.items():
+            if previous is None:
+                TOOL_ACCESS.pop(name, None)
+            else:
+                TOOL_ACCESS[name] = previous
+
+
+HISTORY = [object()]
+
+
+def test_try_route_resuelve_el_comando_completo():
+    with _fake_tools() as calls:
+        routed = asyncio.run(IntentRouter().try_route("move PROJ-9 to Done"))
+    assert routed.tool_name == "transition_issue"
+    assert ("transition_issue", "PROJ-9") in calls
+    assert routed.messages[0].parts[0].content == "move PROJ-9 to Done"
+
+
+def test_try_route_ignora_comandos_dentro_de_un_mensaje_mas_largo():
+    with _fake_tools() as calls:
+        prompt = "No lo hagas todavía, solo dime qué pasaría:\n\nmove PROJ-9 to Done"
+        assert asyncio.run(IntentRouter().try_route(prompt)) is None
+    assert calls == []
+
+
+def test_try_route_no_escribe_en_medio_de_una_conversacion():
+    with _fake_tools() as calls:
+        router = IntentRouter()
+        assert asyncio.run(router.try_route("log 2h on PROJ-45", HISTORY)) is None
+        assert asyncio.run(router.try_route("move PROJ-9 to Done", HISTORY)) is None
+        assert calls == []
+        # Las lecturas sí se atajan con historial
+        assert asyncio.run(router.try_route("PROJ-45", HISTORY)).tool_name == "get_issue_details"
+
+
+def test_try_route_escrituras_con_historial_si_se_habilitan():
+    with _fake_tools() as calls:
+        routed = asyncio.run(IntentRouter(write_routes_with_history=True).try_route("log 2h on PROJ-45", HISTORY))
+    assert routed.tool_name == "add_worklog_to_jira_issue"
+    assert calls == [("add_worklog_to_jira_issue", "PROJ-45")]
+
+
+def test_try_route_deshabilitado():
+    with _fake_tools() as calls:
+        assert asyncio.run(IntentRouter(enabled=False).try_route("PROJ-45")) is None
+    assert calls == []
+
+
+if __name__ == "__main__":
+    test_clave_sola_es_detalle_de_issue()
+    test_registro_de_horas()
+    test_registro_de_horas_no_reconocido_va_al_agente()
+    test_transicion()
+    test_pedidos_ambiguos_van_al_agente()
+    test_try_route_resuelve_el_comando_completo()
+    test_try_route_ignora_comandos_dentro_de_un_mensaje_mas_largo()
+    test_try_route_no_escribe_en_medio_de_una_conversacion()
+    test_try_route_escrituras_con_historial_si_se_habilitan()
+    test_try_route_deshabilitado()
+    print("✅ Pruebas del router de comandos completadas")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la selección de alias para el contexto del prompt (tools/memory_context.py).
+No requieren conexión a Jira, Mem0 ni al LLM.
+"""
+
+import sys
+import os
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tools.memory_context import MemoryContextSelector, tokenize
+
+
+class FakeStore:
+    def __init__(self):
+        self.versions = {}
+
+    def version(self, owner):
+        return self.versions.get(owner, 0)
+
+
+ALIASES = {
+    "proyecto principal": "PSIMDESASW",
+    "tablero backend": "Board 42",
+    "mi jefe": "Ana Pérez",
+    "sprint actual": "Sprint 23",
+    **{f"alias {i}": f"valor {i}" for i in range(200)},
+}
+
+
+def test_tokenize_normaliza_y_quita_palabras_vacias():
+    assert tokenize("¿Cuál es el Proyecto de Ana Pérez?") == ["proyecto", "ana", "perez"]
+    assert tokenize("PROJ-123") == ["proj", "123"]
+
+
+def test_selecciona_el_alias_relevante():
+    selector = MemoryContextSelector(FakeStore(), token_budget=150, max_aliases=10)
+    selected = selector.select("u", ALIASES, "dame los issues del tablero backend")
+    assert selected[0] == ("tablero backend", "Board 42")
+    assert ("mi jefe", "Ana Pérez") not in selected
+
+
+def test_sin_coincidencias_no_se_inyecta_nada():
+    selector = MemoryContextSelector(FakeStore(), token_budget=150, max_aliases=10)
+    assert selector.select("u", ALIASES, "hola") == []
+
+
+def test_respeta_el_presupuesto_de_tokens():
+    selector = MemoryContextSelector(FakeStore(), token_budget=20, max_aliases=10)
+    selected = selector.select("u", ALIASES, "valor alias 1 2 3 4 5 6 7 8 9")
+    assert 0 < len(selected) < 10
+
+
+def test_el_indice_se_reconstruye_al_cambiar_la_version():
+    store = FakeStore()
+    selector = MemoryContextSelector(store, token_budget=150, max_aliases=10)
+    aliases = dict(ALIASES)
+    assert selector.select("u", aliases, "epica pagos") == []
+    aliases["epica pagos"] = "PROJ-77"
+    store.versions["u"] = 1
+    assert selector.select("u", aliases, "epica pagos") == [("epica pagos", "PROJ-77")]
+
+
+def test_el_indice_se_reconstruye_si_cambian_los_alias_recibidos():
+    # Otro proceso actualizó el almacén antes de que este armara su índice: la versión no cambia
+    selector = MemoryContextSelector(FakeStore(), token_budget=150, max_aliases=10)
+    assert selector.select("u", {"tablero backend": "Board 42"}, "tablero") == [("tablero backend", "Board 42")]
+    assert selector.select("u", {"tablero backend": "Board 7"}, "tablero") == [("tablero backend", "Board 7")]
+
+
+if __name__ == "__main__":
+    test_tokenize_normaliza_y_quita_palabras_vacias()
+    test_selecciona_el_alias_relevante()
+    test_sin_coincidencias_no_se_inyecta_nada()
+    test_respeta_el_presupuesto_de_tokens()
+    test_el_indice_se_reconstruye_al_cambiar_la_version()
+    test_el_indice_se_reconstruye_si_cambian_los_alias_recibidos()
+    print("✅ Pruebas de selección de contexto de memoria completadas")
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Pruebas del almacén local de alias de memoria (config/memory_store.py).
+No requieren conexión a Mem0.
+"""
+
+import sys
+import os
+import tempfile
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.memory_store import MemoryStore
+
+
+def test_la_version_se_comparte_entre_procesos():
+    path = os.path.join(tempfile.mkdtemp(), "memory.db")
+    writer = MemoryStore(path)
+    reader = MemoryStore(path)
+    assert reader.version("u") == 0
+    writer.save_pending("u", "tablero backend", "Board 42")
+    assert reader.version("u") == 1
+    writer.merge_remote("u", [{"alias": "mi jefe", "value": "Ana Pérez", "memory_id": "m1"}])
+    assert reader.version("u") == 2
+    assert reader.version("otro") == 0
+
+
+def test_la_version_no_vuelve_atras_al_borrar():
+    store = MemoryStore(os.path.join(tempfile.mkdtemp(), "memory.db"))
+    store.save_pending("u", "tablero backend", "Board 42")
+    store.delete_owner("u")
+    assert store.version("u") == 2
+    assert store.get_aliases("u") == []
+
+
+if __name__ == "__main__":
+    test_la_version_se_comparte_entre_procesos()
+    test_la_version_no_vuelve_atras_al_borrar()
+    print("✅ Pruebas del almacén de memoria completadas")
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Pruebas de la selección de grupos de herramientas por paso (agent_core/tool_catalog.py).
+No requieren conexión a Jira ni al LLM.
+"""
+
+import sys
+import os
+from types import SimpleNamespace
+
+# Agregar el directorio raíz al path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic_ai.messages import ModelRequest, UserPromptPart
+
+from agent_core.tool_catalog import ToolCatalog
+
+
+def _catalog():
+    return ToolCatalog(enabled=True, recent_turns=2, max_description_chars=200, max_param_description_chars=80)
+
+
+def _ctx(prompt):
+    return SimpleNamespace(prompt=prompt, messages=[ModelRequest(parts=[UserPromptPart(content=prompt)])])
+
+
+def test_corridas_seguidas_tienen_sus_propios_grupos():
+    catalog = _catalog()
+    first = _ctx("mueve PROJ-9 a Done")
+    assert "transitions" in catalog.active_groups(first)
+    # Otra corrida con un historial del mismo largo en la misma dirección de memoria
+    # (CPython reutiliza el id de una lista liberada)
+    second = _ctx("hola, dame el resumen de PROJ-1")
+    first.messages[:] = second.messages
+    second.messages = first.messages
+    assert "transitions" not in catalog.active_groups(second)
+
+
+def test_el_grupo_se_activa_por_el_pedido_tras_el_contexto():
+    catalog = _catalog()
+    assert "transitions" in catalog.active_groups(_ctx("Contexto: alias 'tablero'\n\nmueve PROJ-9 a Done"))
+
+
+if __name__ == "__main__":
+    test_corridas_seguidas_tienen_sus_propios_grupos()
+    test_el_grupo_se_activa_por_el_pedido_tras_el_contexto()
+    print("✅ Pruebas del catálogo de herramientas completadas")
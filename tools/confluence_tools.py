@@ -7,6 +7,9 @@ from pydantic import BaseModel, Field
 from pydantic.fields import FieldInfo # <--- IMPORTAR FieldInfo
 
 from agent_core.confluence_instances import get_confluence_client
+from agent_core.atlassian_async import get_async_confluence_client
+from config.cache_backend import shared_cache, user_namespace
+from config.service_executors import confluence_executor
 from config import settings
 import logfire
 
@@ -90,8 +93,7 @@ async def search_confluence_pages(
     logfire.info("Ejecutando search_confluence_pages con query: {query}, space: {space_key}, limit: {limit}, user: {user}",
                  query=query, space_key=space_key, limit=actual_max_results, user=atlassian_username)
     try:
-        confluence = get_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
-        loop = asyncio.get_running_loop()
+        confluence = get_async_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
         
         is_cql = " = " in query or " ~ " in query or " order by " in query.lower() 
 
@@ -105,10 +107,10 @@ async def search_confluence_pages(
             if space_key:
                 cql_to_execute = f"(space = \"{space_key}\") AND ({cql_to_execute})"
         
-        search_endpoint = f"rest/api/content/search?cql={cql_to_execute}&limit={actual_max_results}&expand=space,history.lastUpdated,history.createdBy,version,excerpt,_links.webui"
+        search_expand = "space,history.lastUpdated,history.createdBy,version,excerpt,_links.webui"
 
         with logfire.span("confluence.cql_search", cql=cql_to_execute, limit=actual_max_results):
-            results_raw = await loop.run_in_executor(None, lambda: confluence.get(search_endpoint))
+            results_raw = await confluence.cql(cql_to_execute, limit=actual_max_results, expand=search_expand)
 
         pages_found: List[ConfluencePage] = []
         if results_raw and results_raw.get("results"):
@@ -171,10 +173,12 @@ async def get_confluence_page_content(
     logfire.info("Ejecutando get_confluence_page_content para page_id: {page_id}, user: {user}", 
                  page_id=page_id, user=atlassian_username)
     try:
-        confluence = get_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
-        loop = asyncio.get_running_loop()
+        confluence = get_async_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
         with logfire.span("confluence.page_content", page_id=page_id):
-            page_data = await loop.run_in_executor(None, lambda: confluence.get_page_by_id(page_id, expand="body.storage,space,version,history.lastUpdated,history.createdBy,_links.webui"))
+            page_data = await shared_cache.get_or_load(
+                user_namespace("confluence_page", confluence.username), f"{page_id}|content",
+                settings.CONFLUENCE_PAGE_CACHE_TTL_SECONDS,
+                lambda: confluence.get_page_by_id(page_id, expand="body.storage,space,version,history.lastUpdated,history.createdBy,_links.webui"))
         
         if not page_data:
             return ConfluencePageDetails(id=page_id, title=f"No se encontró la página con ID {page_id}")
@@ -231,8 +235,7 @@ async def create_confluence_page(
     logfire.info("Intentando crear página en espacio {space_key} con título: '{title}', user: {user}",
                  space_key=space_key, title=title, user=atlassian_username)
     try:
-        confluence = get_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
-        loop = asyncio.get_running_loop()
+        confluence = await confluence_executor.run(get_confluence_client, username=atlassian_username, api_key=atlassian_api_key)
 
         # --- CORRECCIÓN para parent_id ---
         actual_parent_id_value: Optional[str]
@@ -261,7 +264,7 @@ async def create_confluence_page(
 
         with logfire.span("confluence.create_page_call", **api_args):
             call_func = functools.partial(confluence.create_page, **api_args)
-            created_page_data = await loop.run_in_executor(None, call_func)
+            created_page_data = await confluence_executor.run(call_func)
         
         # ... (resto de la función sin cambios) ...
         if not isinstance(created_page_data, dict) or 'id' not in created_page_data:
@@ -317,8 +320,7 @@ async def update_confluence_page_content(
         user=atlassian_username
     )
     try:
-        confluence = get_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
-        loop = asyncio.get_running_loop()
+        confluence = get_async_confluence_client(username=atlassian_username, api_key=atlassian_api_key)
 
         # --- CORRECCIÓN para new_title y new_version_comment si son FieldInfo ---
         actual_new_title: Optional[str]
@@ -338,7 +340,7 @@ async def update_confluence_page_content(
         title_to_update = actual_new_title
         if actual_new_title is None: # Si después de resolver FieldInfo, sigue siendo None, obtener el actual
             with logfire.span("confluence.get_page_title_for_update", page_id=page_id):
-                 current_page_data_for_title = await loop.run_in_executor(None, lambda: confluence.get_page_by_id(page_id, expand="title"))
+                 current_page_data_for_title = await confluence.get_page_by_id(page_id)
             if not current_page_data_for_title:
                  return CreatedConfluencePage(id=page_id, title=f"Página con ID {page_id} no encontrada para obtener título actual.") # Aquí añadí status antes, lo quito para consistencia
             title_to_update = current_page_data_for_title.get("title")
@@ -355,8 +357,9 @@ async def update_confluence_page_content(
         logfire.debug("Argumentos para confluence.update_page (page_id={pid}): {args}", pid=page_id, args=update_params)
 
         with logfire.span("confluence.update_page_call", page_id=page_id, **update_params):
-            call_func = functools.partial(confluence.update_page, page_id, **update_params)
-            updated_page_data = await loop.run_in_executor(None, call_func)
+            updated_page_data = await confluence.update_page(page_id, **update_params)
+        # La página cambió para todos los usuarios que la tengan en cache
+        await shared_cache.ainvalidate("confluence_page:", f"{page_id}|")
 
         # ... (resto de la función update_confluence_page_content como antes) ...
         if not isinstance(updated_page_data, dict) or 'id' not in updated_page_data:
@@ -367,7 +370,7 @@ async def update_confluence_page_content(
         
         space_key_from_response = updated_page_data.get("space", {}).get("key")
         if not space_key_from_response: 
-            page_info_for_space = await loop.run_in_executor(None, lambda: confluence.get_page_by_id(page_id, expand="space"))
+            page_info_for_space = await confluence.get_page_by_id(page_id, expand="space")
             space_key_from_response = page_info_for_space.get("space", {}).get("key") if page_info_for_space else None
 
 
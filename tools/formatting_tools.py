@@ -1,17 +1,173 @@
 # tools/formatting_tools.py
+"""
+Formato Markdown de los modelos de salida (`agent_core/output_models.py`).
+
+El formato es fijo, así que se renderiza con plantillas en Python puro: sin
+llamadas al LLM, en microsegundos y fila por fila (`iter_*`) para listas grandes.
+El formateo vía LLM queda solo como alternativa opcional
+(`MARKDOWN_FORMATTER_USE_LLM=true`).
+"""
 import json
-from typing import List
+from typing import Any, Iterable, Iterator, List
 from pydantic_ai.direct import model_request_sync
-from agent_core.output_models import JiraIssueItem # Asegúrate que la ruta sea correcta
+from agent_core.output_models import ( # Asegúrate que la ruta sea correcta
+    JiraIssueItem,
+    SprintIssueSummary,
+    ConfluencePageItem,
+    JiraIssueWorklogReport,
+)
 from config import settings # Para usar el mismo modelo LLM
 
+NO_ISSUES_MESSAGE = "No se encontraron issues con los criterios especificados."
+NO_PAGES_MESSAGE = "No se encontraron páginas con los criterios especificados."
+UNASSIGNED_LABEL = "No asignado"
+
+# --- Plantillas (una por elemento de lista) ---
+ISSUE_TEMPLATE = (
+    "{index}.  **{key}**\n"
+    "    *   **Resumen:** {summary}\n"
+    "    *   **Estado:** {status}\n"
+    "    *   **Responsable:** {assignee}\n"
+)
+SPRINT_ISSUE_TEMPLATE = ISSUE_TEMPLATE + "    *   **Story Points:** {story_points}\n"
+CONFLUENCE_PAGE_TEMPLATE = (
+    "{index}.  **{title}**\n"
+    "    *   **Espacio:** {space}\n"
+    "    *   **Autor:** {author}\n"
+    "    *   **Última modificación:** {last_modified}\n"
+)
+WORKLOG_ENTRY_TEMPLATE = "{index}.  **{author}** - {time_spent_friendly} ({started})\n"
+
+
+def _value(item: Any, name: str, default: Any = None) -> Any:
+    """Lee un atributo de un modelo o una clave de un dict (el LLM a veces pasa dicts)."""
+    if isinstance(item, dict):
+        value = item.get(name, default)
+    else:
+        value = getattr(item, name, default)
+    return default if value is None else value
+
+
+def _assignee(item: Any) -> str:
+    assignee = _value(item, "assignee")
+    return assignee if assignee and assignee != "Unassigned" else UNASSIGNED_LABEL
+
+
+def _story_points(item: Any) -> str:
+    points = _value(item, "story_points")
+    if points is None:
+        return "Sin estimar"
+    return f"{points:g}" if isinstance(points, (int, float)) else str(points)
+
+
+def iter_jira_issues_markdown(issues: Iterable[Any]) -> Iterator[str]:
+    """Genera el Markdown de cada JiraIssueItem, un bloque por issue."""
+    for index, issue in enumerate(issues, start=1):
+        yield ISSUE_TEMPLATE.format(
+            index=index,
+            key=_value(issue, "key", ""),
+            summary=_value(issue, "summary", ""),
+            status=_value(issue, "status", ""),
+            assignee=_assignee(issue),
+        )
+
+
+def iter_sprint_issues_markdown(issues: Iterable[Any]) -> Iterator[str]:
+    """Genera el Markdown de cada SprintIssueSummary (incluye Story Points)."""
+    for index, issue in enumerate(issues, start=1):
+        yield SPRINT_ISSUE_TEMPLATE.format(
+            index=index,
+            key=_value(issue, "key", ""),
+            summary=_value(issue, "summary", ""),
+            status=_value(issue, "status", ""),
+            assignee=_assignee(issue),
+            story_points=_story_points(issue),
+        )
+
+
+def iter_confluence_pages_markdown(pages: Iterable[Any]) -> Iterator[str]:
+    """Genera el Markdown de cada ConfluencePageItem; el título enlaza a la página si hay URL."""
+    for index, page in enumerate(pages, start=1):
+        title = _value(page, "title", "")
+        url = _value(page, "url")
+        block = CONFLUENCE_PAGE_TEMPLATE.format(
+            index=index,
+            title=f"[{title}]({url})" if url else title,
+            space=_value(page, "space", "N/A"),
+            author=_value(page, "author", "N/A"),
+            last_modified=_value(page, "last_modified", "N/A"),
+        )
+        description = _value(page, "description")
+        if description:
+            block += f"    *   **Descripción:** {description}\n"
+        yield block
+
+
+def iter_worklog_report_markdown(report: Any) -> Iterator[str]:
+    """Genera el Markdown de un JiraIssueWorklogReport: encabezado y una línea por worklog."""
+    yield (
+        f"**{_value(report, 'issue_key', '')}** - "
+        f"Total: {_value(report, 'total_time_spent_friendly', '')}\n\n"
+    )
+    for index, entry in enumerate(_value(report, "worklogs_by_user", []), start=1):
+        line = WORKLOG_ENTRY_TEMPLATE.format(
+            index=index,
+            author=_value(entry, "author", ""),
+            time_spent_friendly=_value(entry, "time_spent_friendly", ""),
+            started=_value(entry, "started", ""),
+        )
+        comment = _value(entry, "comment")
+        if comment:
+            line += f"    *   {comment}\n"
+        yield line
+    summary_message = _value(report, "summary_message")
+    if summary_message:
+        yield f"\n{summary_message}\n"
+
+
+def _render(blocks: Iterable[str]) -> str:
+    return "".join(blocks).strip()
+
+
+def render_jira_issues_markdown(issues: List[JiraIssueItem]) -> str:
+    if not issues:
+        return NO_ISSUES_MESSAGE
+    return _render(iter_jira_issues_markdown(issues))
+
+
+def render_sprint_issues_markdown(issues: List[SprintIssueSummary]) -> str:
+    if not issues:
+        return NO_ISSUES_MESSAGE
+    return _render(iter_sprint_issues_markdown(issues))
+
+
+def render_confluence_pages_markdown(pages: List[ConfluencePageItem]) -> str:
+    if not pages:
+        return NO_PAGES_MESSAGE
+    return _render(iter_confluence_pages_markdown(pages))
+
+
+def render_worklog_report_markdown(report: JiraIssueWorklogReport) -> str:
+    return _render(iter_worklog_report_markdown(report))
+
+
 def format_jira_issues_for_markdown(issues_data: List[JiraIssueItem]) -> str:
     """
     Formatea una lista de datos de issues de Jira en una cadena Markdown.
-    Esta herramienta llama internamente a un LLM con instrucciones de formato específicas.
+    Usa el renderizador determinista salvo que MARKDOWN_FORMATTER_USE_LLM esté activo.
     """
     if not issues_data:
-        return "No se encontraron issues con los criterios especificados."
+        return NO_ISSUES_MESSAGE
+    if settings.MARKDOWN_FORMATTER_USE_LLM:
+        return _format_jira_issues_with_llm(issues_data)
+    return render_jira_issues_markdown(issues_data)
+
+
+def _format_jira_issues_with_llm(issues_data: List[JiraIssueItem]) -> str:
+    """
+    Formatea la lista llamando a un LLM con instrucciones de formato específicas.
+    Alternativa opcional al renderizador determinista.
+    """
 
     # Convertir los datos de los issues a una representación de cadena (JSON es una buena opción)
     # para incluirla en el prompt del LLM formateador.
@@ -0,0 +1,62 @@
+# tools/jira_fields.py
+"""
+Registro central de proyecciones de campos de Jira.
+
+Cada modelo de salida declara exactamente los campos que lee de la respuesta,
+y toda llamada a `jql`/`issue` envía solo esos campos en lugar de `*all`
+(y sin `expand=changelog`), reduciendo bytes transferidos y tiempo de parseo.
+"""
+
+from typing import Dict, List, Tuple
+
+# Campos candidatos donde las instancias suelen guardar los Story Points
+STORY_POINT_FIELDS: Tuple[str, ...] = (
+    "customfield_10016", "customfield_10020", "customfield_10002",
+    "customfield_10008", "storyPoints", "story_points",
+)
+
+# Campos donde Jira Cloud expone el sprint del issue
+SPRINT_FIELDS: Tuple[str, ...] = ("customfield_10020", "sprint")
+
+FIELD_PROJECTIONS: Dict[str, Tuple[str, ...]] = {
+    # JiraIssue
+    "issue": ("summary", "status", "assignee", "reporter", "duedate"),
+    # JiraIssueDetails (incluye Story Points)
+    "issue_details": ("summary", "status", "assignee", "reporter", "duedate",
+                      "description", "created", "updated") + STORY_POINT_FIELDS,
+    # _extract_story_points
+    "story_points": STORY_POINT_FIELDS,
+    # _get_sprint_data_from_issue
+    "sprint": SPRINT_FIELDS,
+    # SprintIssueSummary (agent_core/output_models.py): clave, resumen, estado, asignado y puntos
+    "sprint_issue_summary": ("summary", "status", "assignee") + STORY_POINT_FIELDS,
+    # get_issue_story_points (resumen del issue + puntos)
+    "story_points_report": ("summary", "issuetype", "status", "assignee") + STORY_POINT_FIELDS,
+    # Encabezados de reportes (worklogs, transiciones)
+    "issue_summary": ("summary",),
+    "issue_status": ("summary", "status"),
+    # Lectura de worklogs desde el almacén local (el `id` del issue llega siempre)
+    "worklog_scope": ("summary", "created"),
+    # Issue de muestra para obtener metadatos del proyecto
+    "project_sample": ("project", "issuetype"),
+}
+
+# Proyección compuesta de las herramientas de sprint: JiraIssue + SprintIssueSummary + sprint
+FIELD_PROJECTIONS["sprint_issues"] = (
+    FIELD_PROJECTIONS["issue"] + FIELD_PROJECTIONS["sprint_issue_summary"] + SPRINT_FIELDS
+)
+
+
+def fields_for(*projections: str) -> List[str]:
+    """Une las proyecciones indicadas en una lista de campos sin duplicados (orden estable)."""
+    fields: List[str] = []
+    for projection in projections:
+        for field in FIELD_PROJECTIONS[projection]:
+            if field not in fields:
+                fields.append(field)
+    return fields
+
+
+def fields_param(*projections: str) -> str:
+    """Igual que `fields_for`, como string separado por comas para el parámetro `fields` de la API."""
+    return ",".join(fields_for(*projections))
@@ -0,0 +1,140 @@
+# tools/jira_issue_cache.py
+"""
+Cache de lectura para issues de Jira, por usuario.
+
+Las entradas se indexan por (usuario, issue, conjunto de campos) en el backend de
+cache configurado (`config/cache_backend.py`), compartido entre procesos si es
+SQLite. Una entrada vencida no se descarta: se revalida pidiendo solo el campo
+`updated` y, si el issue no cambió, se reutiliza sin volver a descargar el payload
+completo. Las herramientas de escritura invalidan el issue afectado (para todos
+los usuarios), junto con los datos derivados del issue como sus transiciones.
+"""
+
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+
+import logfire
+
+from config import settings
+from config.cache_backend import CacheBackend, shared_cache, user_namespace
+
+IssueFetcher = Callable[[list], Awaitable[Optional[Dict[str, Any]]]]
+
+NAMESPACE_KIND = "jira_issue"
+
+
+class JiraIssueCache:
+    """Cache de respuestas de `issue` con revalidación por `updated`, sobre un CacheBackend."""
+
+    def __init__(self, backend: CacheBackend, ttl_seconds: float, retain_seconds: float):
+        self._backend = backend
+        self._ttl = ttl_seconds
+        # Las entradas vencidas se conservan este tiempo para poder revalidarlas
+        self._retain = max(ttl_seconds, retain_seconds)
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    @staticmethod
+    def _namespace(user: str) -> str:
+        return user_namespace(NAMESPACE_KIND, user)
+
+    @staticmethod
+    def _make_key(issue_key: str, fields: Iterable[str]) -> str:
+        return f"{issue_key.upper()}|{','.join(sorted(set(fields)))}"
+
+    async def get_issue(
+        self,
+        user: str,
+        issue_key: str,
+        fields: Iterable[str],
+        fetch: IssueFetcher,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Retorna el issue desde cache o lo obtiene con `fetch(fields)`.
+        `fetch` recibe la lista de campos a pedir (se agrega `updated` para poder revalidar).
+        """
+        fields = list(fields)
+        namespace, key = self._namespace(user), self._make_key(issue_key, fields)
+
+        entry = await self._backend.aget(namespace, key)
+        if entry is not None and time.time() - entry["checked_at"] < self._ttl:
+            self.hits += 1
+            return entry["data"]
+
+        if entry is not None and entry.get("updated"):
+            # Revalidación barata: solo el campo `updated`
+            probe = await fetch(["updated"])
+            probe_updated = (probe or {}).get("fields", {}).get("updated")
+            if probe_updated and probe_updated == entry["updated"]:
+                entry["checked_at"] = time.time()
+                await self._backend.aset(namespace, key, entry, self._retain)
+                self.revalidated += 1
+                logfire.debug("Issue {issue_key} revalidado en cache (sin cambios)", issue_key=issue_key)
+                return entry["data"]
+
+        request_fields = fields if "updated" in fields else fields + ["updated"]
+        data = await fetch(request_fields)
+        self.misses += 1
+        if data:
+            await self.store(user, issue_key, fields, data)
+        else:
+            await self._backend.adelete(namespace, key)
+        return data
+
+    async def peek(self, user: str, issue_key: str, fields: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Entrada vigente (sin revalidar) o None; para lecturas por lote que consultan solo lo que falta."""
+        entry = await self._backend.aget(self._namespace(user), self._make_key(issue_key, fields))
+        if entry is not None and time.time() - entry["checked_at"] < self._ttl:
+            self.hits += 1
+            return entry["data"]
+        return None
+
+    async def store(self, user: str, issue_key: str, fields: Iterable[str], data: Dict[str, Any]) -> None:
+        """Guarda un issue obtenido por otra vía (ej. una consulta JQL por lote) con los mismos campos."""
+        await self._backend.aset(self._namespace(user), self._make_key(issue_key, fields), {
+            "data": data,
+            "updated": data.get("fields", {}).get("updated"),
+            "checked_at": time.time(),
+        }, self._retain)
+
+    async def get_related(
+        self,
+        user: str,
+        issue_key: str,
+        name: str,
+        ttl_seconds: float,
+        loader: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Datos derivados del issue (ej. transiciones) que se invalidan junto con él."""
+        return await self._backend.get_or_load(
+            self._namespace(user), f"{issue_key.upper()}|@{name}", ttl_seconds, loader)
+
+    async def invalidate_issue(self, issue_key: str) -> int:
+        """Elimina todas las entradas del issue (para todos los usuarios y conjuntos de campos)."""
+        count = await self._backend.ainvalidate(f"{NAMESPACE_KIND}:", f"{issue_key.upper()}|")
+        if count:
+            logfire.debug("Cache de issue invalidada para {issue_key} ({count} entradas)", issue_key=issue_key, count=count)
+        return count
+
+    async def invalidate_user(self, user: str) -> int:
+        return await self._backend.ainvalidate(self._namespace(user))
+
+    async def clear(self) -> None:
+        await self._backend.ainvalidate(f"{NAMESPACE_KIND}:")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": self._backend.name,
+            "hits": self.hits,
+            "revalidated": self.revalidated,
+            "misses": self.misses,
+        }
+
+
+# Instancia global
+issue_cache = JiraIssueCache(
+    backend=shared_cache,
+    ttl_seconds=settings.JIRA_ISSUE_CACHE_TTL_SECONDS,
+    retain_seconds=settings.JIRA_ISSUE_CACHE_RETAIN_SECONDS,
+)
@@ -4,14 +4,22 @@
 import asyncio
 import re 
 import functools
-from typing import List, Dict, Any, Optional
-from datetime import datetime, timedelta, timezone, time
+from typing import List, Dict, Any, Optional, AsyncIterator
+from datetime import date, datetime, timedelta, timezone, time
 import inspect # Added import
 
 from pydantic import BaseModel, Field
 from pydantic.fields import FieldInfo 
 
 from agent_core.jira_instances import get_jira_client
+from agent_core.atlassian_async import get_async_jira_client, AsyncJiraClient
+from config.cache_backend import shared_cache, user_namespace
+from config.service_executors import jira_executor
+from tools.jira_fields import fields_for, fields_param, STORY_POINT_FIELDS, SPRINT_FIELDS
+from tools.jira_issue_cache import issue_cache
+from tools.worklog_aggregation import WorklogAggregationReport, WorklogFilter, aggregate_worklogs
+from tools.worklog_sync import get_issue_worklogs_local_first, record_written_worklog
+from config import settings
 import logfire
 # NUEVO: Importar sistema de logging estructurado
 from config.logging_context import logger, log_operation, log_user_action
@@ -163,6 +171,75 @@ def _clean_field_info_param(param_value: Any) -> Any:
         return None
     return param_value
 
+async def _get_issue_cached(jira: AsyncJiraClient, issue_key: str, projection: str) -> Optional[dict]:
+    """Lee un issue a través de la cache por usuario, pidiendo solo los campos de la proyección."""
+    return await issue_cache.get_issue(
+        jira.username,
+        issue_key,
+        fields_for(projection),
+        lambda fields: jira.issue(issue_key, fields=fields)
+    )
+
+async def _sprint_jql_cached(jira, jql_query: str, limit: int) -> Optional[dict]:
+    """Búsqueda de issues de sprint compartida entre procesos, en el namespace del usuario."""
+    return await shared_cache.get_or_load(
+        user_namespace("jira_sprint", jira.username),
+        f"{limit}|{jql_query}",
+        settings.JIRA_SPRINT_CACHE_TTL_SECONDS,
+        lambda: jira_executor.run(lambda: jira.jql(jql_query, fields=fields_param("sprint_issues"), limit=limit)),
+    )
+
+def _issue_details_from_raw(issue_data: dict) -> JiraIssueDetails:
+    """Convierte un issue crudo (proyección `issue_details`) en JiraIssueDetails."""
+    fields = issue_data.get("fields", {})
+    assignee_info = fields.get("assignee")
+    reporter_info = fields.get("reporter")
+    return JiraIssueDetails(
+        key=issue_data.get("key"),
+        summary=fields.get("summary"),
+        status=fields.get("status", {}).get("name"),
+        assignee=assignee_info.get("displayName") if assignee_info else None,
+        reporter=reporter_info.get("displayName") if reporter_info else None,
+        duedate=str(fields.get("duedate")) if fields.get("duedate") else None,
+        description=fields.get("description"), 
+        created=fields.get("created"),
+        updated=fields.get("updated"),
+        story_points=_extract_story_points(issue_data)  # Usar función existente para extraer story points
+    )
+
+def _jira_issue_from_raw(issue: dict) -> JiraIssue:
+    """Convierte un issue crudo de la respuesta JQL en JiraIssue."""
+    fields = issue.get("fields", {})
+    status_info = fields.get("status", {})
+    assignee_info = fields.get("assignee")
+    reporter_info = fields.get("reporter")
+    return JiraIssue(
+        key=issue.get("key"),
+        summary=fields.get("summary"),
+        status=status_info.get("name") if status_info else None,
+        assignee=assignee_info.get("displayName") if assignee_info else None,
+        reporter=reporter_info.get("displayName") if reporter_info else None,
+        duedate=str(fields.get("duedate")) if fields.get("duedate") else None
+    )
+
+async def stream_issues(
+    jql_query: str,
+    max_results: Optional[int] = None,
+    atlassian_username: Optional[str] = None,
+    atlassian_api_key: Optional[str] = None
+) -> AsyncIterator[JiraIssue]:
+    """
+    Generador asíncrono de JiraIssue para una consulta JQL, recorriendo todas las páginas.
+    Permite cortar temprano o consumir miles de issues sin cargarlos todos en memoria.
+    """
+    jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
+    async for raw_issue in jira.iter_jql(
+        jql_query,
+        fields=fields_for("issue"),
+        max_results=max_results
+    ):
+        yield _jira_issue_from_raw(raw_issue)
+
 @log_operation("jira_search_issues", log_input=True, log_output=False)
 async def search_issues(
     jql_query: str = Field(..., description="La consulta JQL para buscar issues. Ejemplo: 'project = \"PROJ\" AND status = Open ORDER BY priority DESC'"),
@@ -201,7 +278,8 @@ async def search_issues(
     except Exception as e:
         logger.error("session_access_failed", error=e)
 
-    actual_max_results = min(max(1, max_results), 100)
+    max_results = _clean_field_info_param(max_results) or 10
+    actual_max_results = min(max(1, max_results), settings.JIRA_SEARCH_MAX_RESULTS)
     
     # Log del inicio de búsqueda con contexto estructurado
     logger.info("jira_search_initiated", 
@@ -210,36 +288,19 @@ async def search_issues(
                has_credentials=bool(atlassian_username and atlassian_api_key))
     
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key)
-        loop = asyncio.get_running_loop()
-        
         with logfire.span("jira.jql_search", 
                          jql=jql_query, 
                          limit=actual_max_results,
                          username=atlassian_username):
-            # Usar jira.jql() que es el método correcto para atlassian-python-api
-            jql_response = await loop.run_in_executor(None, 
-                lambda: jira.jql(jql_query, fields=["summary", "status", "assignee", "reporter", "duedate"], limit=actual_max_results))
-        
-        # Extraer la lista de issues de la respuesta JQL
-        issues_data = jql_response.get("issues", []) if isinstance(jql_response, dict) else []
-        
-        results = []
-        for issue in issues_data:
-            # Procesar cada issue - la estructura puede ser diferente en jql()
-            fields = issue.get("fields", {})
-            status_info = fields.get("status", {})
-            assignee_info = fields.get("assignee")
-            reporter_info = fields.get("reporter")
-            
-            results.append(JiraIssue(
-                key=issue.get("key"),
-                summary=fields.get("summary"),
-                status=status_info.get("name") if status_info else None,
-                assignee=assignee_info.get("displayName") if assignee_info else None,
-                reporter=reporter_info.get("displayName") if reporter_info else None,
-                duedate=str(fields.get("duedate")) if fields.get("duedate") else None
-            ))
+            # Paginación automática: las páginas siguientes se piden en paralelo
+            results = [
+                issue async for issue in stream_issues(
+                    jql_query,
+                    max_results=actual_max_results,
+                    atlassian_username=atlassian_username,
+                    atlassian_api_key=atlassian_api_key
+                )
+            ]
         
         # Log del resultado exitoso
         logger.info("jira_search_completed",
@@ -298,26 +359,12 @@ async def get_issue_details(
     logfire.info("Ejecutando get_issue_details para: {issue_key}, user: {user}", 
                  issue_key=issue_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         with logfire.span("jira.issue_details", issue_key=issue_key):
-            issue_data = await loop.run_in_executor(None, jira.issue, issue_key)
+            issue_data = await _get_issue_cached(jira, issue_key, "issue_details")
         if not issue_data:
             return JiraIssueDetails(key=issue_key, summary=f"No se encontró el issue con clave {issue_key}", status="NOT_FOUND")
-        fields = issue_data.get("fields", {})
-        assignee_info = fields.get("assignee")
-        reporter_info = fields.get("reporter")
-        details = JiraIssueDetails(
-            key=issue_data.get("key"),
-            summary=fields.get("summary"),
-            status=fields.get("status", {}).get("name"),
-            assignee=assignee_info.get("displayName") if assignee_info else None,
-            reporter=reporter_info.get("displayName") if reporter_info else None,
-            description=fields.get("description"), 
-            created=fields.get("created"),
-            updated=fields.get("updated"),
-            story_points=_extract_story_points(issue_data)  # Usar función existente para extraer story points
-        )
+        details = _issue_details_from_raw(issue_data)
         logfire.info("get_issue_details obtuvo detalles para {issue_key}", issue_key=issue_key)
         return details
     except Exception as e:
@@ -325,6 +372,124 @@ async def get_issue_details(
                       issue_key=issue_key, error_message=str(e), exc_info=True)
         return JiraIssueDetails(key=issue_key, summary=f"Error al obtener detalles: {str(e)}", status="ERROR")
 
+_ISSUE_KEY_PATTERN = re.compile(r"^[A-Z][A-Z0-9_]*-\d+$")
+
+async def get_issues_details_batch(
+    issue_keys: List[str] = Field(..., description="Lista de claves de issues (ej. ['PROJ-1', 'PROJ-7', 'PROJ-22']). Usar en lugar de varias llamadas a get_issue_details."),
+    atlassian_username: Optional[str] = None,
+    atlassian_api_key: Optional[str] = None
+) -> List[JiraIssueDetails]:
+    """
+    Obtiene los detalles de varios issues en una sola consulta JQL `key in (...)`.
+    Las listas grandes se dividen en bloques que se consultan en paralelo. El resultado
+    respeta el orden de entrada; los issues inexistentes o con error se devuelven con
+    status "NOT_FOUND" / "ERROR" en su posición.
+    """
+    # Fallback logic for credentials
+    if not atlassian_username or not atlassian_api_key:
+        try:
+            import streamlit as st
+            current_function_name = inspect.currentframe().f_code.co_name
+            if "atlassian_username" in st.session_state and st.session_state.atlassian_username and \
+               "atlassian_api_key" in st.session_state and st.session_state.atlassian_api_key:
+                atlassian_username = st.session_state.atlassian_username
+                atlassian_api_key = st.session_state.atlassian_api_key
+                logfire.debug(f"{current_function_name}: Using Atlassian credentials from st.session_state for user {atlassian_username}.")
+            else:
+                logfire.warn(
+                    f"{current_function_name}: Atlassian credentials not found or incomplete in st.session_state. "
+                    f"Username present: {'atlassian_username' in st.session_state and bool(st.session_state.atlassian_username)}. "
+                    f"API key present: {'atlassian_api_key' in st.session_state and bool(st.session_state.atlassian_api_key)}."
+                )
+        except ImportError:
+            logfire.warn(f"{inspect.currentframe().f_code.co_name}: Streamlit not available. Cannot fetch credentials from session_state.")
+        except Exception as e:
+            logfire.warn(f"{inspect.currentframe().f_code.co_name}: Could not get credentials from st.session_state: {e}")
+
+    issue_keys = _clean_field_info_param(issue_keys) or []
+    if isinstance(issue_keys, str):
+        issue_keys = re.split(r"[,\s]+", issue_keys)
+    requested = [str(key).strip().upper() for key in issue_keys if str(key).strip()]
+    # Claves únicas válidas, en el orden en que aparecen
+    unique_valid_keys = list(dict.fromkeys(key for key in requested if _ISSUE_KEY_PATTERN.match(key)))
+
+    logfire.info("get_issues_details_batch: {count} claves ({unique} únicas válidas), user: {user}",
+                 count=len(requested), unique=len(unique_valid_keys), user=atlassian_username)
+    if not requested:
+        return []
+
+    found: Dict[str, JiraIssueDetails] = {}
+    errors: Dict[str, str] = {}
+    try:
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
+    except Exception as e:
+        logfire.error("Error en get_issues_details_batch: {error_message}", error_message=str(e), exc_info=True)
+        return [JiraIssueDetails(key=key, summary=f"Error al obtener detalles: {str(e)}", status="ERROR") for key in requested]
+
+    chunk_size = max(1, settings.JIRA_BATCH_CHUNK_SIZE)
+    semaphore = asyncio.Semaphore(max(1, settings.JIRA_BATCH_MAX_CONCURRENCY))
+
+    async def _fetch_single(key: str) -> None:
+        try:
+            issue_data = await _get_issue_cached(jira, key, "issue_details")
+            if issue_data:
+                found[key] = _issue_details_from_raw(issue_data)
+        except Exception as e:
+            # 404: el issue no existe (o el usuario no puede verlo), se reporta como NOT_FOUND
+            if getattr(getattr(e, "response", None), "status_code", None) != 404:
+                errors[key] = str(e)
+
+    async def _fetch_chunk(chunk: List[str]) -> None:
+        async with semaphore:
+            jql_query = f"key in ({', '.join(chunk)})"
+            try:
+                with logfire.span("jira.issues_batch_chunk", size=len(chunk)):
+                    # validateQuery=warn: las claves inexistentes no invalidan todo el bloque
+                    page = await jira.jql(jql_query, fields=fields_for("issue_details"),
+                                          limit=len(chunk), validate_query="warn")
+                for issue_data in (page or {}).get("issues", []):
+                    returned_key = str(issue_data.get("key", "")).upper()
+                    if returned_key in chunk:
+                        found[returned_key] = _issue_details_from_raw(issue_data)
+                        await issue_cache.store(jira.username, returned_key, fields_for("issue_details"), issue_data)
+            except Exception as e:
+                # Si el bloque falla completo, resolver clave por clave para aislar el error
+                logfire.warn("Bloque de issues falló ({error}); reintentando por clave", error=str(e))
+                await asyncio.gather(*(_fetch_single(key) for key in chunk))
+                return
+            # Un issue movido o renombrado vuelve con su clave nueva: resolver por clave pedida
+            missing = [key for key in chunk if key not in found]
+            if missing:
+                await asyncio.gather(*(_fetch_single(key) for key in missing))
+
+    # Los issues vigentes en la cache no se vuelven a consultar
+    pending_keys = []
+    cached_issues = await asyncio.gather(
+        *(issue_cache.peek(jira.username, key, fields_for("issue_details")) for key in unique_valid_keys))
+    for key, cached in zip(unique_valid_keys, cached_issues):
+        if cached:
+            found[key] = _issue_details_from_raw(cached)
+        else:
+            pending_keys.append(key)
+
+    chunks = [pending_keys[i:i + chunk_size] for i in range(0, len(pending_keys), chunk_size)]
+    await asyncio.gather(*(_fetch_chunk(chunk) for chunk in chunks))
+
+    results: List[JiraIssueDetails] = []
+    for key in requested:
+        if key in found:
+            results.append(found[key])
+        elif not _ISSUE_KEY_PATTERN.match(key):
+            results.append(JiraIssueDetails(key=key, summary=f"Clave de issue inválida: {key}", status="ERROR"))
+        elif key in errors:
+            results.append(JiraIssueDetails(key=key, summary=f"Error al obtener detalles: {errors[key]}", status="ERROR"))
+        else:
+            results.append(JiraIssueDetails(key=key, summary=f"No se encontró el issue con clave {key}", status="NOT_FOUND"))
+
+    logfire.info("get_issues_details_batch resolvió {found}/{total} issues",
+                 found=sum(1 for r in results if r.status not in ("ERROR", "NOT_FOUND")), total=len(results))
+    return results
+
 @log_operation("jira_add_comment", log_input=False, log_output=False)  # No loguear contenido por privacidad
 async def add_comment_to_jira_issue(
     issue_key: str = Field(..., description="La clave del issue al que añadir el comentario (ej. 'PROJ-123')."),
@@ -362,14 +527,14 @@ async def add_comment_to_jira_issue(
                has_credentials=bool(atlassian_username and atlassian_api_key))
     
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
         
         with logfire.span("jira.add_comment_to_issue", 
                          issue_key=issue_key,
                          comment_length=len(comment_body),
                          username=atlassian_username):
-            comment_data_dict = await loop.run_in_executor(None, jira.issue_add_comment, issue_key, comment_body)
+            comment_data_dict = await jira_executor.run(jira.issue_add_comment, issue_key, comment_body)
+        await issue_cache.invalidate_issue(issue_key)
         
         if not isinstance(comment_data_dict, dict) or 'id' not in comment_data_dict:
             logger.error("jira_api_unexpected_response",
@@ -507,8 +672,7 @@ async def add_worklog_to_jira_issue(
         cmt=bool(comment_cleaned), cnf=confirm_cleaned, user=atlassian_username
     )
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
 
         time_spent_seconds_int = _parse_time_spent_to_seconds(time_spent)
         if time_spent_seconds_int <= 0:
@@ -537,7 +701,9 @@ async def add_worklog_to_jira_issue(
                 started_str,
                 time_spent_seconds_int
             )
-            worklog_data = await loop.run_in_executor(None, call_func)
+            worklog_data = await jira_executor.run(call_func)
+        await issue_cache.invalidate_issue(issue_key)
+        await record_written_worklog(jira.username, worklog_data)
 
         author_info = worklog_data.get("author", {})
         comment_from_response = worklog_data.get('comment')
@@ -575,9 +741,8 @@ async def get_user_worklog_hours_for_issue(
     Devuelve la cantidad total de horas que un usuario trabajó en una historia (issue).
     El usuario puede ser identificado por 'name' (Jira Server) o 'accountId' (Jira Cloud).
     """
-    jira = get_jira_client()
-    loop = asyncio.get_running_loop()
-    worklogs_data = await loop.run_in_executor(None, lambda: jira.issue_get_worklog(issue_key))
+    jira = get_async_jira_client()
+    worklogs_data = await jira.issue_get_worklog(issue_key)
     total_seconds = 0
     for worklog in worklogs_data.get('worklogs', []):
         author = worklog.get('author', {})
@@ -621,11 +786,13 @@ async def get_user_hours_on_story(
     logfire.info("get_user_hours_on_story: issue_key={key}, target_user={tuser}, request_user={ruser}", 
                  key=issue_key, tuser=username_or_accountid, ruser=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
-        worklogs_data = await loop.run_in_executor(None, lambda: jira.issue_get_worklog(issue_key))
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
+        issue_data = await _get_issue_cached(jira, issue_key, "worklog_scope")
+        worklogs = await get_issue_worklogs_local_first(jira, issue_data) if issue_data else None
+        if worklogs is None:
+            worklogs = (await jira.issue_get_worklog(issue_key)).get('worklogs', [])
         total_seconds = 0
-        for worklog in worklogs_data.get('worklogs', []):
+        for worklog in worklogs:
             author = worklog.get('author', {})
             # Compatibilidad con Jira Cloud y Server
             if (
@@ -684,8 +851,6 @@ async def get_user_hours_with_confirmed_user(
     logfire.info("get_user_hours_with_confirmed_user: issue_key={key}, target_user_id={tid}, target_user_name={tname}, request_user={ruser}",
                  key=issue_key, tid=user_account_id, tname=user_display_name, ruser=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
         hours = await get_user_worklog_hours_for_issue(issue_key, user_account_id)
         return {
             "hours": hours,
@@ -732,11 +897,9 @@ async def get_child_issues_status(
 
     logfire.info("get_child_issues_status for {key}, user: {user}", key=parent_issue_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
         # Buscar subtareas (issues cuyo parent es la historia)
         jql_subtasks = f'parent = "{parent_issue_key}" ORDER BY priority DESC'
-        subtasks = await search_issues(jql_subtasks, max_results=50, atlassian_username=atlassian_username, atlassian_api_key=atlassian_api_key)
+        subtasks = await search_issues(jql_subtasks, max_results=settings.JIRA_SEARCH_MAX_RESULTS, atlassian_username=atlassian_username, atlassian_api_key=atlassian_api_key)
         results = []
         now = datetime.now().date()
         soon_threshold = now + timedelta(days=days_soon)
@@ -798,8 +961,7 @@ async def search_jira_users(
     logfire.info("search_jira_users: query={q}, max_results={m}, request_user={ru}", 
                  q=query, m=max_results, ru=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         query = _clean_field_info_param(query)
         max_results = _clean_field_info_param(max_results) or 10
@@ -822,14 +984,11 @@ async def search_jira_users(
         # Usar la API de búsqueda de usuarios de Jira
         with logfire.span("jira.user_search", query=query, limit=actual_max_results):
             # Para Jira Cloud, usar user_find_by_user_string
-            users_raw = await loop.run_in_executor(
-                None, 
-                lambda: jira.user_find_by_user_string(
-                    query=query, 
-                    start=0, 
-                    limit=actual_max_results, 
-                    include_inactive_users=False
-                )
+            users_raw = await jira.user_find_by_user_string(
+                query=query, 
+                start=0, 
+                limit=actual_max_results, 
+                include_inactive_users=False
             )
         
         if not users_raw:
@@ -915,8 +1074,7 @@ async def validate_jira_user(
     logfire.info("validate_jira_user: user_identifier={uid}, request_user={ru}", 
                  uid=user_identifier, ru=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetro que puede llegar como FieldInfo
         user_identifier = _clean_field_info_param(user_identifier)
         
@@ -937,7 +1095,7 @@ async def validate_jira_user(
         if user_identifier and len(user_identifier) > 20 and ':' in user_identifier:
             try:
                 with logfire.span("jira.user_direct", user_id=user_identifier):
-                    user_data = await loop.run_in_executor(None, jira.user, user_identifier)
+                    user_data = await jira.user(user_identifier)
                 
                 if user_data:
                     validated_user = JiraUser(
@@ -963,14 +1121,11 @@ async def validate_jira_user(
         
         # Si no es accountId o falló, buscar por nombre/email
         with logfire.span("jira.user_search_validation", query=user_identifier):
-            users_raw = await loop.run_in_executor(
-                None,
-                lambda: jira.user_find_by_user_string(
-                    query=user_identifier,
-                    start=0,
-                    limit=10,
-                    include_inactive_users=False
-                )
+            users_raw = await jira.user_find_by_user_string(
+                query=user_identifier,
+                start=0,
+                limit=10,
+                include_inactive_users=False
             )
         
         if not users_raw:
@@ -1083,8 +1238,7 @@ async def get_issue_story_points(
 
     logfire.info("get_issue_story_points for {key}, user: {user}", key=issue_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         issue_key = _clean_field_info_param(issue_key)
         
@@ -1100,7 +1254,7 @@ async def get_issue_story_points(
         
         # Obtener detalles del issue
         with logfire.span("jira.get_issue_for_story_points", issue_key=issue_key):
-            issue_data = await loop.run_in_executor(None, jira.issue, issue_key)
+            issue_data = await _get_issue_cached(jira, issue_key, "story_points_report")
         
         if not issue_data:
             return {
@@ -1131,12 +1285,7 @@ async def get_issue_story_points(
         
         # Información de debug sobre qué campos se encontraron
         debug_info = {}
-        story_points_fields = [
-            "customfield_10016", "customfield_10020", "customfield_10002", 
-            "customfield_10008", "storyPoints", "story_points"
-        ]
-        
-        for field_name in story_points_fields:
+        for field_name in STORY_POINT_FIELDS:
             if field_name in fields:
                 debug_info[field_name] = fields[field_name]
         
@@ -1206,8 +1355,7 @@ async def get_all_worklog_hours_for_issue(
 
     logfire.info("get_all_worklog_hours_for_issue for {key}, user: {user}", key=issue_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         issue_key = _clean_field_info_param(issue_key)
         
@@ -1215,7 +1363,7 @@ async def get_all_worklog_hours_for_issue(
         
         # Obtener detalles del issue para el resumen
         with logfire.span("jira.issue_details_for_worklog", issue_key=issue_key):
-            issue_data = await loop.run_in_executor(None, jira.issue, issue_key)
+            issue_data = await _get_issue_cached(jira, issue_key, "worklog_scope")
         
         if not issue_data:
             return IssueWorklogReport(
@@ -1230,8 +1378,13 @@ async def get_all_worklog_hours_for_issue(
         issue_summary = issue_data.get("fields", {}).get("summary", "Sin resumen")
         
         # Obtener todos los worklogs del issue
-        with logfire.span("jira.get_all_worklogs", issue_key=issue_key):
-            worklogs_data = await loop.run_in_executor(None, lambda: jira.issue_get_worklog(issue_key))
+        # Primero el almacén local sincronizado; si no cubre el issue, la API
+        local_worklogs = await get_issue_worklogs_local_first(jira, issue_data)
+        if local_worklogs is not None:
+            worklogs_data = {'worklogs': local_worklogs}
+        else:
+            with logfire.span("jira.get_all_worklogs", issue_key=issue_key):
+                worklogs_data = await jira.issue_get_worklog(issue_key)
         
         if not worklogs_data or not worklogs_data.get('worklogs'):
             return IssueWorklogReport(
@@ -1335,6 +1488,69 @@ async def get_all_worklog_hours_for_issue(
             users_summary=[]
         )
 
+async def get_worklog_hours_report(
+    jql_query: Optional[str] = Field(default=None, description="Consulta JQL con los issues a analizar (ej. 'sprint in openSprints() AND project = PROJ')."),
+    parent_issue_key: Optional[str] = Field(default=None, description="Épica o historia padre; incluye el issue, sus hijos y las subtareas de los hijos."),
+    user: Optional[str] = Field(default=None, description="Filtrar por autor del worklog (accountId, nombre visible o email)."),
+    date_from: Optional[str] = Field(default=None, description="Fecha inicial inclusive (YYYY-MM-DD)."),
+    date_to: Optional[str] = Field(default=None, description="Fecha final inclusive (YYYY-MM-DD)."),
+    atlassian_username: Optional[str] = None,
+    atlassian_api_key: Optional[str] = None
+) -> WorklogAggregationReport:
+    """
+    Reporte de horas registradas sobre muchos issues en una sola llamada: totales por
+    usuario, por día y por issue. Usar para épicas, sprints o cualquier consulta JQL
+    en lugar de consultar issue por issue.
+    """
+    # Fallback logic for credentials
+    if not atlassian_username or not atlassian_api_key:
+        try:
+            import streamlit as st
+            current_function_name = inspect.currentframe().f_code.co_name
+            if "atlassian_username" in st.session_state and st.session_state.atlassian_username and \
+               "atlassian_api_key" in st.session_state and st.session_state.atlassian_api_key:
+                atlassian_username = st.session_state.atlassian_username
+                atlassian_api_key = st.session_state.atlassian_api_key
+                logfire.debug(f"{current_function_name}: Using Atlassian credentials from st.session_state for user {atlassian_username}.")
+            else:
+                logfire.warn(
+                    f"{current_function_name}: Atlassian credentials not found or incomplete in st.session_state. "
+                    f"Username present: {'atlassian_username' in st.session_state and bool(st.session_state.atlassian_username)}. "
+                    f"API key present: {'atlassian_api_key' in st.session_state and bool(st.session_state.atlassian_api_key)}."
+                )
+        except ImportError:
+            logfire.warn(f"{inspect.currentframe().f_code.co_name}: Streamlit not available. Cannot fetch credentials from session_state.")
+        except Exception as e:
+            logfire.warn(f"{inspect.currentframe().f_code.co_name}: Could not get credentials from st.session_state: {e}")
+
+    jql_query = _clean_field_info_param(jql_query)
+    parent_issue_key = _clean_field_info_param(parent_issue_key)
+    user = _clean_field_info_param(user)
+    date_from = _clean_field_info_param(date_from)
+    date_to = _clean_field_info_param(date_to)
+    scope = jql_query or parent_issue_key or "vacío"
+
+    logfire.info("get_worklog_hours_report: jql={jql}, parent={parent}, user={target}, desde={dfrom}, hasta={dto}, request_user={ru}",
+                 jql=jql_query, parent=parent_issue_key, target=user, dfrom=date_from, dto=date_to, ru=atlassian_username)
+    try:
+        worklog_filter = WorklogFilter(
+            user=user,
+            date_from=date.fromisoformat(date_from) if date_from else None,
+            date_to=date.fromisoformat(date_to) if date_to else None
+        )
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
+        with logfire.span("jira.worklog_hours_report", scope=scope):
+            return await aggregate_worklogs(jira, jql=jql_query, parent_key=parent_issue_key, worklog_filter=worklog_filter)
+    except Exception as e:
+        logfire.error("Error en get_worklog_hours_report para {scope}: {error_message}",
+                      scope=scope, error_message=str(e), exc_info=True)
+        return WorklogAggregationReport(
+            scope=scope, issues_scanned=0, issues_with_worklogs=0,
+            total_hours=0.0, total_seconds=0, total_entries=0,
+            by_user=[], by_day=[], by_issue=[],
+            errors=[f"Error al generar el reporte de horas: {str(e)}"]
+        )
+
 async def get_active_sprint_issues(
     project_key: Optional[str] = Field(default=None, description="Clave del proyecto para filtrar (ej: 'PSIMDESASW'). Si no se especifica, busca en todos los proyectos."),
     max_results: int = 20,
@@ -1365,8 +1581,7 @@ async def get_active_sprint_issues(
     logfire.info("get_active_sprint_issues: project_key={pk}, max_results={mr}, request_user={ru}",
                  pk=project_key, mr=max_results, ru=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         project_key = _clean_field_info_param(project_key)
         
@@ -1380,13 +1595,9 @@ async def get_active_sprint_issues(
         
         logfire.info("Ejecutando get_active_sprint_issues con JQL: {jql_query}", jql_query=jql_query)
         
-        # Usar expand para obtener información del sprint
+        # Pedir solo los campos que usan JiraIssue, el sprint y los Story Points
         with logfire.span("jira.sprint_search", jql=jql_query, limit=actual_max_results):
-            issues_raw = await loop.run_in_executor(None, lambda: jira.jql(
-                jql_query, 
-                limit=actual_max_results,
-                expand="changelog"
-            ))
+            issues_raw = await _sprint_jql_cached(jira, jql_query, limit=actual_max_results)
         
         if not issues_raw or not issues_raw.get("issues"):
             # Sprint activo sin issues o no encontrado
@@ -1498,8 +1709,7 @@ async def get_my_current_sprint_work(
     logfire.info("get_my_current_sprint_work: project_key={pk}, assignee={assignee_param}, request_user={ru}",
                  pk=project_key_cleaned, assignee_param=assignee, ru=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
         # Construir JQL para trabajo del usuario en sprint activo
         assignee_clause = f'assignee = "{assignee}"' if assignee else 'assignee = currentUser()'
         
@@ -1511,11 +1721,7 @@ async def get_my_current_sprint_work(
         logfire.info("Ejecutando get_my_current_sprint_work con JQL: {jql_query}", jql_query=jql_query)
         
         with logfire.span("jira.my_sprint_work", jql=jql_query):
-            issues_raw = await loop.run_in_executor(None, lambda: jira.jql(
-                jql_query, 
-                limit=50,
-                expand="changelog"
-            ))
+            issues_raw = await _sprint_jql_cached(jira, jql_query, limit=50)
         
         if not issues_raw or not issues_raw.get("issues"):
             # Usuario sin trabajo en sprint activo
@@ -1626,8 +1832,7 @@ async def get_sprint_progress(
     logfire.info("get_sprint_progress: project_key={pk}, sprint_name={sname}, request_user={ru}",
                  pk=project_key_cleaned, sname=sprint_name_cleaned, ru=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
         # Construir JQL según si se especifica sprint específico o activo
         if sprint_name_cleaned:
             base_jql = f'sprint = "{sprint_name_cleaned}"'
@@ -1642,11 +1847,7 @@ async def get_sprint_progress(
         logfire.info("Ejecutando get_sprint_progress con JQL: {jql_query}", jql_query=jql_query)
         
         with logfire.span("jira.sprint_progress", jql=jql_query):
-            issues_raw = await loop.run_in_executor(None, lambda: jira.jql(
-                jql_query, 
-                limit=200,  # Más límite para análisis completo
-                expand="changelog"
-            ))
+            issues_raw = await _sprint_jql_cached(jira, jql_query, limit=200)
         
         if not issues_raw or not issues_raw.get("issues"):
             # Sprint sin issues
@@ -1743,12 +1944,7 @@ def _extract_story_points(issue_data: dict) -> Optional[int]:
         fields = issue_data.get("fields", {})
         # Los story points suelen estar en customfield_10016 o similar
         # Probamos varias posibilidades comunes
-        story_points_fields = [
-            "customfield_10016", "customfield_10020", "customfield_10002", 
-            "customfield_10008", "storyPoints", "story_points"
-        ]
-        
-        for field_name in story_points_fields:
+        for field_name in STORY_POINT_FIELDS:
             if field_name in fields and fields[field_name] is not None:
                 return int(float(fields[field_name]))
         return None
@@ -1759,7 +1955,7 @@ def _get_sprint_data_from_issue(issue_data: dict) -> Optional[JiraSprint]:
     """Extrae datos del sprint de un issue."""
     try:
         fields = issue_data.get("fields", {})
-        sprint_field = fields.get("customfield_10020") or fields.get("sprint")
+        sprint_field = next((fields.get(name) for name in SPRINT_FIELDS if fields.get(name)), None)
         
         if not sprint_field:
             return None
@@ -1863,8 +2059,7 @@ async def get_issue_transitions(
 
     logfire.info("get_issue_transitions for {key}, user: {user}", key=issue_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         issue_key = _clean_field_info_param(issue_key)
         
@@ -1872,7 +2067,7 @@ async def get_issue_transitions(
         
         # Obtener detalles del issue para el estado actual
         with logfire.span("jira.get_issue_details", issue_key=issue_key):
-            issue_data = await loop.run_in_executor(None, jira.issue, issue_key)
+            issue_data = await _get_issue_cached(jira, issue_key, "issue_status")
         
         if not issue_data:
             error_status = JiraStatus(id="error", name="Issue no encontrado")
@@ -1886,7 +2081,9 @@ async def get_issue_transitions(
         
         # Obtener transiciones disponibles
         with logfire.span("jira.get_transitions", issue_key=issue_key):
-            transitions_data = await loop.run_in_executor(None, jira.get_issue_transitions, issue_key)
+            transitions_data = await issue_cache.get_related(
+                jira.username, issue_key, "transitions", settings.JIRA_ISSUE_CACHE_TTL_SECONDS,
+                lambda: jira.get_issue_transitions(issue_key))
         
         # Agregar logging para diagnosticar la respuesta
         logfire.info("Respuesta de get_issue_transitions: tipo={type}, contenido={content}", 
@@ -2040,8 +2237,7 @@ async def get_project_workflow_statuses(
 
     logfire.info("get_project_workflow_statuses for {key}, user: {user}", key=project_key, user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = await jira_executor.run(get_jira_client, username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         project_key = _clean_field_info_param(project_key)
         
@@ -2049,7 +2245,9 @@ async def get_project_workflow_statuses(
         
         # Obtener información del proyecto
         with logfire.span("jira.get_project", project_key=project_key):
-            project_data = await loop.run_in_executor(None, jira.project, project_key)
+            project_data = await shared_cache.get_or_load(
+                user_namespace("jira_project", jira.username), project_key.upper(),
+                settings.JIRA_STATUS_CACHE_TTL_SECONDS, lambda: jira_executor.run(jira.project, project_key))
         
         if not project_data:
             return ProjectWorkflowInfo(
@@ -2062,7 +2260,9 @@ async def get_project_workflow_statuses(
         # Obtener todos los estados usando la API REST de Jira
         with logfire.span("jira.get_statuses"):
             # Usar el método HTTP directo para obtener estados
-            statuses_data = await loop.run_in_executor(None, lambda: jira.get("/rest/api/2/status"))
+            statuses_data = await shared_cache.get_or_load(
+                user_namespace("jira_status", jira.username), "all",
+                settings.JIRA_STATUS_CACHE_TTL_SECONDS, lambda: jira_executor.run(lambda: jira.get("/rest/api/2/status")))
         
         # Procesar estados
         all_statuses = []
@@ -2080,9 +2280,7 @@ async def get_project_workflow_statuses(
         try:
             # Buscar un issue del proyecto para obtener información del workflow
             with logfire.span("jira.search_project_issues", project_key=project_key):
-                sample_issues = await loop.run_in_executor(
-                    None, 
-                    lambda: jira.jql(f'project = "{project_key}" ORDER BY created DESC', limit=1)
+                sample_issues = await jira_executor.run(lambda: jira.jql(f'project = "{project_key}" ORDER BY created DESC', fields=fields_param("project_sample"), limit=1)
                 )
             
             if sample_issues and sample_issues.get("issues"):
@@ -2131,8 +2329,7 @@ async def transition_issue(
                  key=issue_key, tid=transition_id, cmt=bool(comment_cleaned), 
                  flds=bool(additional_fields_cleaned), user=atlassian_username)
     try:
-        jira = get_jira_client(username=atlassian_username, api_key=atlassian_api_key) # Modified
-        loop = asyncio.get_running_loop()
+        jira = get_async_jira_client(username=atlassian_username, api_key=atlassian_api_key)
         # Limpiar parámetros que pueden llegar como FieldInfo
         issue_key = _clean_field_info_param(issue_key)
         transition_id = _clean_field_info_param(transition_id)
@@ -2150,21 +2347,25 @@ async def transition_issue(
             }
         
         with logfire.span("jira.set_issue_status_by_transition_id", issue_key=issue_key, transition_id=transition_id_int):
-            await loop.run_in_executor(None, jira.set_issue_status_by_transition_id, issue_key, transition_id_int)
+            await jira.set_issue_status_by_transition_id(issue_key, transition_id_int)
+        await issue_cache.invalidate_issue(issue_key)
+        # Las vistas de sprint de todos los usuarios muestran el estado del issue
+        await shared_cache.ainvalidate("jira_sprint:")
         
         # Si hay comentario, agregarlo por separado después de la transición
         if comment_cleaned:
             with logfire.span("jira.add_comment", issue_key=issue_key):
-                await loop.run_in_executor(None, jira.issue_add_comment, issue_key, comment_cleaned)
+                await jira.issue_add_comment(issue_key, comment_cleaned)
         
         # Si hay campos adicionales, actualizarlos por separado después de la transición
         if additional_fields_cleaned:
             with logfire.span("jira.update_fields", issue_key=issue_key):
-                await loop.run_in_executor(None, jira.update_issue_field, issue_key, additional_fields_cleaned)
+                await jira.update_issue_field(issue_key, additional_fields_cleaned)
+            await issue_cache.invalidate_issue(issue_key)
         
         # Obtener el estado actualizado del issue
         with logfire.span("jira.get_updated_issue", issue_key=issue_key):
-            updated_issue = await loop.run_in_executor(None, jira.issue, issue_key)
+            updated_issue = await jira.issue(issue_key, fields=fields_for("issue_status"))
         
         new_status = "Unknown"
         if updated_issue:
@@ -1,9 +1,12 @@
+import asyncio
 import os
 from typing import Optional, List, Dict, Any
 from pydantic import BaseModel, Field
 from pydantic.fields import FieldInfo
 from mem0 import MemoryClient
 import logfire
+from config import settings
+from config.service_executors import mem0_executor
 
 # User ID dinámico - se obtiene del usuario autenticado
 # Fallback para compatibilidad con versiones anteriores
@@ -14,6 +17,12 @@ def get_current_user_id() -> str:
     Obtiene el ID del usuario actual utilizando el AuthService centralizado.
     Esto asegura consistencia en la identificación del usuario en toda la app.
     """
+    # Corrutinas en el loop de fondo: el usuario viene en el contexto de la petición
+    from config.request_context import get_request_user_id
+    request_user_id = get_request_user_id()
+    if request_user_id:
+        return request_user_id
+
     try:
         # Usar el servicio centralizado de autenticación
         from config.auth_service import AuthService
@@ -105,6 +114,39 @@ class SearchMemoryResponse(BaseModel):
     results: List[MemoryResult]
     status: str
 
+async def _mem0_add(user_id: str, alias: str, value: str, type: Optional[str] = None,
+                    context: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> str:
+    """Envía un alias a Mem0 y retorna el ID de la memoria ("ERROR" si la respuesta no lo trae)."""
+    metadata = {"alias": alias, "value": value}
+    if type is not None:
+        metadata["type"] = type
+    if context is not None:
+        metadata["context"] = context
+    if extra and isinstance(extra, dict):
+        metadata.update(extra)
+
+    content_str = f"{alias} => {value}" if context is None else f"{alias} => {value} ({context})"
+
+    result = await mem0_executor.run(
+        mem0_client.add,
+        [{"role": "user", "content": content_str}],
+        user_id=user_id,
+        metadata=metadata
+    )
+    logfire.debug(f"Mem0 client.add() raw result: {result}")
+
+    memory_id = "ERROR"
+    if isinstance(result, list) and len(result) > 0 and isinstance(result[0], dict) and result[0].get("id"):
+        memory_id = result[0]["id"]
+    elif isinstance(result, dict) and result.get("id"):
+        memory_id = result["id"]
+    elif isinstance(result, dict) and "results" in result and isinstance(result["results"], list) and len(result["results"]) > 0 and result["results"][0].get("id"):
+        memory_id = result["results"][0]["id"]
+
+    if memory_id == "ERROR":
+         logfire.error(f"Failed to extract memory_id from mem0 result. Raw result: {result}")
+    return memory_id
+
 async def save_memory(
     alias: str = Field(..., description="Nombre corto, apodo o alias que el usuario quiere recordar."),
     value: str = Field(..., description="Valor asociado al alias. Puede ser un ID, texto, número, etc."),
@@ -115,50 +157,21 @@ async def save_memory(
     """
     Guarda una memoria personalizada para el usuario, asociando un alias a un valor y metadatos.
     """
-    if not mem0_client:
-        logfire.warn("save_memory called but mem0_client is not initialized.")
-        return SaveMemoryResponse(memory_id="ERROR", status="Mem0 client not initialized. Set MEM0_API_KEY or ensure OPENAI_API_KEY is configured for fallback.")
-
     _type_val = type.default if isinstance(type, FieldInfo) else type
     _context_val = context.default if isinstance(context, FieldInfo) else context
     _extra_val = extra.default if isinstance(extra, FieldInfo) else extra
-    
-    metadata = {"alias": alias, "value": value}
-    if _type_val is not None:
-        metadata["type"] = _type_val
-    if _context_val is not None:
-        metadata["context"] = _context_val
-    if _extra_val and isinstance(_extra_val, dict):
-        metadata.update(_extra_val)
-    
-    content_str = f"{alias} => {value}" if _context_val is None else f"{alias} => {value} ({_context_val})"
-    
+
     try:
-        # Tracking removido para evitar dependencias circulares
-        
         current_user_id = get_current_user_id()
         logfire.debug(f"Saving memory for user: {current_user_id}")
-        
-        result = mem0_client.add(
-            [{"role": "user", "content": content_str}],
-            user_id=current_user_id,
-            metadata=metadata
-        )
-        logfire.debug(f"Mem0 client.add() raw result: {result}")
-        
-        memory_id = "ERROR"
-        if isinstance(result, list) and len(result) > 0 and isinstance(result[0], dict) and result[0].get("id"):
-            memory_id = result[0]["id"]
-        elif isinstance(result, dict) and result.get("id"):
-            memory_id = result["id"]
-        elif isinstance(result, dict) and "results" in result and isinstance(result["results"], list) and len(result["results"]) > 0 and result["results"][0].get("id"):
-            memory_id = result["results"][0]["id"]
-
-        if memory_id == "ERROR":
-             logfire.error(f"Failed to extract memory_id from mem0 result. Raw result: {result}")
-        return SaveMemoryResponse(memory_id=memory_id, status="ok" if memory_id != "ERROR" else "error saving memory")
+
+        # Se guarda localmente al instante; el envío a Mem0 queda en segundo plano
+        from tools.memory_service import memory_service
+        await asyncio.to_thread(memory_service.save, current_user_id, alias, value,
+                                type=_type_val, context=_context_val, extra=_extra_val)
+        return SaveMemoryResponse(memory_id="PENDING", status="ok")
     except Exception as e:
-        logfire.error(f"Error during mem0_client.add or processing its result: {e}", exc_info=True)
+        logfire.error(f"Error saving memory locally: {e}", exc_info=True)
         return SaveMemoryResponse(memory_id="ERROR", status=f"Error saving memory: {str(e)}")
 
 async def search_memory(
@@ -171,7 +184,7 @@ async def search_memory(
     """
     Busca memorias del usuario por alias, tipo, valor o búsqueda semántica.
     """
-    if not mem0_client:
+    if not mem0_client and not settings.MEMORY_LOCAL_INDEX_ENABLED:
         logfire.warn("search_memory called but mem0_client is not initialized.")
         return SearchMemoryResponse(results=[], status="Mem0 client not initialized. Set MEM0_API_KEY or ensure OPENAI_API_KEY is configured for fallback.")
 
@@ -214,8 +227,23 @@ async def search_memory(
         
         current_user_id = get_current_user_id()
         logfire.debug(f"Searching memory for user: {current_user_id}")
+
+        # Índice local: hash para alias/tipo/valor exactos y coseno para consultas libres.
+        # Mem0 solo se consulta para refrescar el almacén local (en segundo plano).
+        if settings.MEMORY_LOCAL_INDEX_ENABLED:
+            from tools.memory_index import memory_index
+            from tools.memory_service import memory_service
+            # El almacén y el índice leen SQLite: en un hilo, fuera del loop compartido
+            await asyncio.to_thread(memory_service.schedule_reconcile, current_user_id)
+            results = await asyncio.to_thread(memory_index.search, current_user_id, alias=_alias_val, type=_type_val,
+                                              value=_value_val, query=_query_val, limit=resolved_limit)
+            if not results and _alias_val and not _query_val:
+                # Alias sin coincidencia exacta: búsqueda aproximada por el texto del alias
+                results = await asyncio.to_thread(memory_index.search, current_user_id, type=_type_val,
+                                                  value=_value_val, query=str(_alias_val), limit=resolved_limit)
+            return SearchMemoryResponse(results=results, status="ok")
         
-        result = mem0_client.search(query=search_query_text, user_id=current_user_id, filters=filters, limit=resolved_limit)
+        result = await mem0_executor.run(mem0_client.search, query=search_query_text, user_id=current_user_id, filters=filters, limit=resolved_limit)
         logfire.debug(f"Mem0 client.search() raw result: {result}")
         
         parsed_results_list = []
@@ -371,131 +399,167 @@ def invalidate_user_memory_cache(old_user_id: str, new_user_id: str):
         logfire.error(f"Error invalidating memory cache: {e}", 
                      old_user=old_user_id, new_user=new_user_id, exc_info=True)
 
-async def precargar_memoria_completa_usuario(limit: int = 100) -> SearchMemoryResponse:
+def _extract_memory_list(result: Any) -> List[Any]:
+    """Lista de memorias de una respuesta de Mem0 (el formato varía entre versiones de la API)."""
+    if isinstance(result, list):
+        return result
+    if isinstance(result, dict):
+        for key in ("results", "memories", "data"):
+            if isinstance(result.get(key), list):
+                return result[key]
+        # Si es un dict pero no tiene la estructura esperada, intentar procesar directamente
+        if "memory" in result or "id" in result:
+            return [result]
+    return []
+
+def _parse_memory_items(actual_mem_list: List[Any]) -> List[MemoryResult]:
+    """Convierte memorias crudas de Mem0 en alias (metadata alias/value o patrones de texto conocidos)."""
+    parsed_results_list = []
+    for i, mem_item in enumerate(actual_mem_list):
+        if not isinstance(mem_item, dict):
+            logfire.debug(f"Memoria {i+1} no es dict, tipo: {type(mem_item)}")
+            continue
+
+        # Obtener metadata - puede estar en diferentes lugares según la versión de la API
+        meta = mem_item.get("metadata", {})
+        if not isinstance(meta, dict):
+            meta = {}
+
+        # Buscar alias y value en metadata
+        alias_val = meta.get("alias")
+        value_val = meta.get("value")
+
+        # Solo procesar memorias que tienen alias y value en metadata
+        if alias_val and value_val:
+            parsed_results_list.append(MemoryResult(
+                memory_id=str(mem_item.get("id", "")),
+                alias=str(alias_val),
+                value=str(value_val),
+                type=str(meta.get("type")) if meta.get("type") is not None else None,
+                context=str(meta.get("context")) if meta.get("context") is not None else None,
+                extra={k: v for k, v in meta.items() if k not in {"alias", "value", "type", "context"}}
+            ))
+            continue
+
+        # Log para memorias que no tienen la estructura esperada (contenido solo en debug)
+        memory_content = mem_item.get("memory", "")
+        logfire.debug(f"Memoria {i+1} sin alias/value - contenido: {memory_content}, metadata completa: {meta}")
+
+        # Intentar extraer información si la memoria está en formato texto
+        # Por ejemplo: "User name is Manuel" podría convertirse en alias="nombre", value="Manuel"
+        if memory_content and isinstance(memory_content, str):
+            for pattern in ("name is", "se llama"):
+                parts = memory_content.lower().split(pattern)
+                if len(parts) >= 2:
+                    name_value = parts[1].strip().title()
+                    parsed_results_list.append(MemoryResult(
+                        memory_id=str(mem_item.get("id", "")),
+                        alias="nombre",
+                        value=name_value,
+                        type="personal_details",
+                        context=f"Extraído automáticamente de: {memory_content}",
+                        extra={"original_memory": memory_content, "auto_extracted": True}
+                    ))
+                    logfire.debug(f"Memoria convertida automáticamente: {memory_content} -> nombre={name_value}")
+                    break
+    return parsed_results_list
+
+class MemoryPage(BaseModel):
+    results: List[MemoryResult]
+    status: str
+    raw_count: int = 0
+    has_more: bool = False
+    # Mayor `updated_at` visto en la página (marca de agua para pedir solo cambios después)
+    watermark: Optional[str] = None
+
+async def fetch_memory_page(
+    user_id: str,
+    page: int,
+    page_size: int,
+    updated_since: Optional[str] = None,
+) -> MemoryPage:
+    """
+    Lee una página de memorias del usuario con get_all v2 (paginado), opcionalmente solo
+    las modificadas desde `updated_since`. No hace fallback: quien llama decide qué hacer
+    si falla.
+    """
+    if not mem0_client:
+        return MemoryPage(results=[], status="Mem0 client not initialized.")
+    filters: List[Dict[str, Any]] = [{"user_id": user_id}]
+    if updated_since:
+        filters.append({"updated_at": {"gte": updated_since}})
+    try:
+        result = await mem0_executor.run(
+            mem0_client.get_all,
+            version="v2",
+            filters={"AND": filters},
+            page=page,
+            page_size=page_size,
+        )
+    except Exception as e:
+        logfire.warn(f"get_all paginado falló (página {page}): {e}")
+        return MemoryPage(results=[], status=f"Error leyendo memorias: {str(e)}")
+
+    actual_mem_list = _extract_memory_list(result)
+    logfire.debug(f"fetch_memory_page - página {page} contenido: {result}")
+    watermarks = [str(item["updated_at"]) for item in actual_mem_list
+                  if isinstance(item, dict) and item.get("updated_at")]
+    if isinstance(result, dict) and ("next" in result or "count" in result):
+        has_more = bool(result.get("next"))
+    else:
+        has_more = len(actual_mem_list) >= page_size
+    return MemoryPage(
+        results=_parse_memory_items(actual_mem_list),
+        status="ok",
+        raw_count=len(actual_mem_list),
+        has_more=has_more,
+        watermark=max(watermarks) if watermarks else None,
+    )
+
+async def precargar_memoria_completa_usuario(limit: int = 100, user_id: Optional[str] = None) -> SearchMemoryResponse:
     """
     Función específica para precargar toda la memoria del usuario al iniciar la app.
-    Usa mem0_client.get_all() para obtener todas las memorias del usuario.
+    Recorre get_all() página por página hasta `limit` memorias; si falla o no hay
+    alias, usa la búsqueda semántica como fallback.
     """
     if not mem0_client:
         logfire.warn("precargar_memoria_completa_usuario called but mem0_client is not initialized.")
         return SearchMemoryResponse(results=[], status="Mem0 client not initialized.")
     
     try:
-        current_user_id = get_current_user_id()
+        current_user_id = user_id or get_current_user_id()
         logfire.info(f"Precargando memoria para usuario: {current_user_id}")
-        
-        # Usar get_all() para obtener todas las memorias del usuario
-        # Esto es mucho más eficiente que hacer búsquedas semánticas genéricas
-        result = mem0_client.get_all(user_id=current_user_id, limit=limit)
-        logfire.info(f"precargar_memoria_completa_usuario - get_all result type: {type(result)}")
-        logfire.info(f"precargar_memoria_completa_usuario - get_all result content: {result}")
-        
-        parsed_results_list = []
-        
-        # Procesar el resultado de get_all()
-        # El formato puede variar entre versiones de la API
-        actual_mem_list = []
-        if isinstance(result, list):
-            actual_mem_list = result
-        elif isinstance(result, dict):
-            # Buscar las memorias en diferentes formatos posibles
-            if "results" in result and isinstance(result["results"], list):
-                actual_mem_list = result["results"]
-            elif "memories" in result and isinstance(result["memories"], list):
-                actual_mem_list = result["memories"]
-            elif "data" in result and isinstance(result["data"], list):
-                actual_mem_list = result["data"]
-            else:
-                # Si es un dict pero no tiene la estructura esperada, intentar procesar directamente
-                if "memory" in result or "id" in result:
-                    actual_mem_list = [result]
-
-        logfire.info(f"Procesando {len(actual_mem_list)} memorias")
-
-        for i, mem_item in enumerate(actual_mem_list):
-            logfire.debug(f"Procesando memoria {i+1}: {mem_item}")
-            
-            if not isinstance(mem_item, dict): 
-                logfire.debug(f"Memoria {i+1} no es dict, tipo: {type(mem_item)}")
-                continue
-                
-            # Obtener metadata - puede estar en diferentes lugares según la versión de la API
-            meta = mem_item.get("metadata", {})
-            if not isinstance(meta, dict): 
-                meta = {}
-            
-            logfire.debug(f"Memoria {i+1} metadata: {meta}")
-            
-            # Buscar alias y value en metadata
-            alias_val = meta.get("alias")
-            value_val = meta.get("value")
-            
-            logfire.debug(f"Memoria {i+1} - alias: {alias_val}, value: {value_val}")
 
-            # Solo procesar memorias que tienen alias y value en metadata
-            if alias_val and value_val:
-                parsed_results_list.append(MemoryResult(
-                    memory_id=str(mem_item.get("id", "")),
-                    alias=str(alias_val),
-                    value=str(value_val),
-                    type=str(meta.get("type")) if meta.get("type") is not None else None,
-                    context=str(meta.get("context")) if meta.get("context") is not None else None,
-                    extra={k: v for k, v in meta.items() if k not in {"alias", "value", "type", "context"}}
-                ))
-            else:
-                # Log para memorias que no tienen la estructura esperada
-                memory_content = mem_item.get("memory", "")
-                logfire.debug(f"Memoria {i+1} sin alias/value - contenido: {memory_content}, metadata completa: {meta}")
-                
-                # Intentar extraer información si la memoria está en formato texto
-                # Por ejemplo: "User name is Manuel" podría convertirse en alias="nombre", value="Manuel"
-                if memory_content and isinstance(memory_content, str):
-                    # Patterns comunes que podríamos reconocer
-                    if "name is" in memory_content.lower():
-                        # "User name is Manuel" -> alias="nombre", value="Manuel"
-                        parts = memory_content.lower().split("name is")
-                        if len(parts) >= 2:
-                            name_value = parts[1].strip().title()
-                            parsed_results_list.append(MemoryResult(
-                                memory_id=str(mem_item.get("id", "")),
-                                alias="nombre",
-                                value=name_value,
-                                type="personal_details",
-                                context=f"Extraído automáticamente de: {memory_content}",
-                                extra={"original_memory": memory_content, "auto_extracted": True}
-                            ))
-                            logfire.info(f"Memoria convertida automáticamente: {memory_content} -> nombre={name_value}")
-                    # Agregar más patterns según sea necesario
-                    elif "se llama" in memory_content.lower():
-                        # "El usuario se llama Juan" -> alias="nombre", value="Juan"
-                        parts = memory_content.lower().split("se llama")
-                        if len(parts) >= 2:
-                            name_value = parts[1].strip().title()
-                            parsed_results_list.append(MemoryResult(
-                                memory_id=str(mem_item.get("id", "")),
-                                alias="nombre",
-                                value=name_value,
-                                type="personal_details",
-                                context=f"Extraído automáticamente de: {memory_content}",
-                                extra={"original_memory": memory_content, "auto_extracted": True}
-                            ))
-                            logfire.info(f"Memoria convertida automáticamente: {memory_content} -> nombre={name_value}")
-        
-        logfire.info(f"precargar_memoria_completa_usuario: Cargados {len(parsed_results_list)} alias válidos para el usuario.")
+        page_size = max(1, min(limit, settings.MEMORY_PRELOAD_PAGE_SIZE))
+        parsed_results_list: List[MemoryResult] = []
+        raw_total = 0
+        page = 1
+        while raw_total < limit:
+            memory_page = await fetch_memory_page(current_user_id, page, page_size)
+            if memory_page.status != "ok":
+                raise RuntimeError(memory_page.status)
+            parsed_results_list.extend(memory_page.results)
+            raw_total += memory_page.raw_count
+            if not memory_page.has_more:
+                break
+            page += 1
+
+        logfire.info(f"precargar_memoria_completa_usuario: Cargados {len(parsed_results_list)} alias válidos "
+                     f"de {raw_total} memorias ({page} páginas) para el usuario.")
         
         # Si no encontramos ningún alias válido, usar fallback de búsqueda
         if len(parsed_results_list) == 0:
             logfire.info("No se encontraron alias en metadata, intentando con búsqueda semántica como fallback")
             return await _precargar_memoria_fallback_search(current_user_id, limit)
         
-        return SearchMemoryResponse(results=parsed_results_list, status="ok")
+        return SearchMemoryResponse(results=parsed_results_list[:limit], status="ok")
         
     except Exception as e:
         logfire.error(f"Error durante precargar_memoria_completa_usuario: {e}", exc_info=True)
         
         # Fallback a búsqueda semántica si get_all() falla
         try:
-            current_user_id = get_current_user_id()
+            current_user_id = user_id or get_current_user_id()
             logfire.info("Intentando fallback con búsqueda semántica")
             return await _precargar_memoria_fallback_search(current_user_id, limit)
         except Exception as fallback_error:
@@ -522,7 +586,8 @@ async def _precargar_memoria_fallback_search(user_id: str, limit: int = 100) ->
             try:
                 logfire.debug(f"Intentando búsqueda fallback: {description}")
                 
-                result = mem0_client.search(
+                result = await mem0_executor.run(
+                    mem0_client.search,
                     query=query, 
                     user_id=user_id, 
                     filters={}, 
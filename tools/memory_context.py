@@ -0,0 +1,129 @@
+# tools/memory_context.py
+"""
+Selección de los alias de memoria que viajan como contexto en cada prompt.
+
+En vez de anteponer siempre los primeros alias del usuario, se puntúan todos contra
+el pedido actual con BM25 sobre el nombre y el valor de cada alias, y se incluyen
+solo los mejores dentro de un presupuesto de tokens. El índice se arma una vez por
+usuario y se reutiliza mientras no cambien su almacén de memoria ni los alias recibidos.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Dict, FrozenSet, List, Tuple
+
+import logfire
+
+from agent_core.history_manager import CHARS_PER_TOKEN
+from config import settings
+from config.memory_store import MemoryStore, memory_store
+
+# Palabras demasiado frecuentes en los pedidos como para indicar un alias
+STOPWORDS: FrozenSet[str] = frozenset({
+    "a", "al", "con", "de", "del", "el", "en", "es", "la", "las", "lo", "los", "me", "mi", "mis", "para",
+    "por", "que", "se", "su", "sus", "un", "una", "y", "o", "cual", "cuales", "como", "dame", "the", "of",
+    "to", "in", "on", "for", "and", "is", "my", "what", "show",
+})
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text: str) -> List[str]:
+    """Términos en minúsculas y sin acentos; separa también claves como `PROJ-123`."""
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return [term for term in re.findall(r"[a-z0-9]+", text) if len(term) > 1 and term not in STOPWORDS]
+
+
+@dataclass
+class AliasIndex:
+    version: Tuple[int, int]
+    entries: List[Tuple[str, str]]
+    term_freqs: List[Counter]
+    lengths: List[int]
+    avg_length: float
+    postings: Dict[str, List[int]] = field(default_factory=dict)
+
+
+class MemoryContextSelector:
+    def __init__(self, store: MemoryStore, token_budget: int, max_aliases: int):
+        self.store = store
+        self.token_budget = token_budget
+        self.max_aliases = max_aliases
+        self._indexes: Dict[str, AliasIndex] = {}
+        self._lock = threading.Lock()
+
+    def _build(self, aliases: Dict[str, str], version: Tuple[int, int]) -> AliasIndex:
+        entries = list(aliases.items())
+        term_freqs = [Counter(tokenize(alias) * 2 + tokenize(str(value))) for alias, value in entries]
+        lengths = [sum(tf.values()) for tf in term_freqs]
+        index = AliasIndex(
+            version=version,
+            entries=entries,
+            term_freqs=term_freqs,
+            lengths=lengths,
+            avg_length=(sum(lengths) / len(lengths)) if lengths else 0.0,
+        )
+        for position, tf in enumerate(term_freqs):
+            for term in tf:
+                index.postings.setdefault(term, []).append(position)
+        return index
+
+    def _index_for(self, user_id: str, aliases: Dict[str, str]) -> AliasIndex:
+        # La versión del almacén es compartida entre procesos, pero el diccionario de sesión puede ser una
+        # copia anterior: la clave incluye también su contenido
+        version = (self.store.version(user_id), hash(frozenset(aliases.items())))
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is None or index.version != version:
+                index = self._build(aliases, version)
+                self._indexes[user_id] = index
+            return index
+
+    def rank(self, user_id: str, aliases: Dict[str, str], prompt: str) -> List[Tuple[str, str, float]]:
+        """Alias con puntaje BM25 positivo contra el pedido, del más al menos relevante."""
+        if not aliases:
+            return []
+        index = self._index_for(user_id, aliases)
+        total = len(index.entries)
+        scores: Dict[int, float] = {}
+        for term in set(tokenize(prompt)):
+            postings = index.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position in postings:
+                tf = index.term_freqs[position][term]
+                norm = 1 - BM25_B + BM25_B * index.lengths[position] / (index.avg_length or 1)
+                scores[position] = scores.get(position, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: -item[1])
+        return [(index.entries[position][0], index.entries[position][1], score) for position, score in ranked]
+
+    def select(self, user_id: str, aliases: Dict[str, str], prompt: str) -> List[Tuple[str, str]]:
+        """Mejores alias para el pedido que entran en el presupuesto de tokens."""
+        selected: List[Tuple[str, str]] = []
+        used_tokens = 0
+        for alias, value, _ in self.rank(user_id, aliases, prompt):
+            if len(selected) >= self.max_aliases:
+                break
+            tokens = len(f"'{alias}' → {value}, ") // CHARS_PER_TOKEN + 1
+            if used_tokens + tokens > self.token_budget:
+                continue
+            selected.append((alias, value))
+            used_tokens += tokens
+        logfire.debug("Contexto de memoria: {selected}/{total} alias (~{tokens} tokens)",
+                      selected=len(selected), total=len(aliases), tokens=used_tokens)
+        return selected
+
+
+# Instancia global
+memory_context_selector = MemoryContextSelector(
+    store=memory_store,
+    token_budget=settings.MEMORY_CONTEXT_TOKEN_BUDGET,
+    max_aliases=settings.MEMORY_CONTEXT_MAX_ALIASES,
+)
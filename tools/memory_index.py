@@ -0,0 +1,195 @@
+# tools/memory_index.py
+"""
+Índice local de la memoria del usuario para `search_memory`.
+
+Los usuarios tienen a lo sumo unos cientos de alias, y ya están todos en el
+almacén local (`config/memory_store.py`). En vez de una búsqueda semántica remota
+por consulta:
+
+- Filtros exactos (alias, tipo, valor): índices hash en memoria.
+- Consultas libres: similitud coseno (NumPy) contra una matriz de embeddings
+  locales (n-gramas de caracteres y palabras proyectados con hashing, sin llamadas
+  a modelos), persistida en disco por usuario para no recalcularla en cada arranque.
+
+El índice se reconstruye cuando cambia la versión del almacén del usuario; los
+embeddings de textos que no cambiaron se reutilizan. Mem0 solo se consulta para
+refrescar el almacén (reconciliación).
+"""
+
+import hashlib
+import re
+import threading
+import unicodedata
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+import logfire
+import numpy as np
+
+from config import settings
+from config.memory_store import MemoryStore, memory_store
+from tools.mem0_tools import MemoryResult
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", (text or "").lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.findall(r"\w+", text))
+
+
+def embed_text(text: str, dims: int) -> np.ndarray:
+    """Vector normalizado de n-gramas (3-gramas de caracteres y palabras) con hashing estable."""
+    normalized = _normalize(text)
+    vector = np.zeros(dims, dtype=np.float32)
+    padded = f" {normalized} "
+    features = [padded[i:i + 3] for i in range(len(padded) - 2)] + [f"w:{w}" for w in normalized.split()]
+    for feature in features:
+        h = zlib.crc32(feature.encode("utf-8"))
+        # El bit alto decide el signo para reducir colisiones sesgadas
+        vector[h % dims] += 1.0 if h & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _item_text(item: Dict) -> str:
+    return " ".join(str(item.get(key) or "") for key in ("alias", "value", "type", "context"))
+
+
+def _text_key(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class UserMemoryIndex:
+    version: int
+    items: List[Dict]
+    matrix: np.ndarray
+    text_keys: List[str]
+    by_alias: Dict[str, List[int]] = field(default_factory=dict)
+    by_type: Dict[str, List[int]] = field(default_factory=dict)
+    by_value: Dict[str, List[int]] = field(default_factory=dict)
+
+
+class MemoryIndex:
+    def __init__(self, store: MemoryStore, index_dir: str, dims: int, min_score: float):
+        self.store = store
+        self.index_dir = Path(index_dir)
+        self.dims = dims
+        self.min_score = min_score
+        self._indexes: Dict[str, UserMemoryIndex] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, user_id: str) -> Path:
+        return self.index_dir / f"{hashlib.sha256(user_id.encode('utf-8')).hexdigest()[:32]}.npz"
+
+    def _load_cached_embeddings(self, user_id: str) -> Dict[str, np.ndarray]:
+        """Embeddings persistidos del usuario por clave de texto (vacío si no hay o no corresponden)."""
+        path = self._path(user_id)
+        if not path.exists():
+            return {}
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if int(data["dims"]) != self.dims:
+                    return {}
+                return dict(zip(data["text_keys"].tolist(), data["matrix"]))
+        except Exception as e:
+            logfire.warn("Índice de memoria en disco ilegible para {path}: {error}", path=str(path), error=str(e))
+            return {}
+
+    def _persist(self, user_id: str, index: UserMemoryIndex) -> None:
+        try:
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._path(user_id).with_suffix(".tmp.npz")
+            np.savez(tmp_path, matrix=index.matrix, text_keys=np.array(index.text_keys, dtype=str),
+                     dims=np.array(self.dims))
+            tmp_path.replace(self._path(user_id))
+        except Exception as e:
+            logfire.warn("No se pudo persistir el índice de memoria: {error}", error=str(e))
+
+    def _build(self, user_id: str, version: int, previous: Optional[UserMemoryIndex]) -> UserMemoryIndex:
+        items = self.store.get_aliases(user_id)
+        cached = dict(zip(previous.text_keys, previous.matrix)) if previous is not None \
+            else self._load_cached_embeddings(user_id)
+        texts = [_item_text(item) for item in items]
+        text_keys = [_text_key(text) for text in texts]
+        computed = 0
+        rows = []
+        for text, key in zip(texts, text_keys):
+            vector = cached.get(key)
+            if vector is None:
+                vector = embed_text(text, self.dims)
+                computed += 1
+            rows.append(vector)
+        matrix = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, self.dims), dtype=np.float32)
+
+        index = UserMemoryIndex(version=version, items=items, matrix=matrix, text_keys=text_keys)
+        for position, item in enumerate(items):
+            index.by_alias.setdefault(_normalize(item["alias"]), []).append(position)
+            if item.get("type"):
+                index.by_type.setdefault(_normalize(item["type"]), []).append(position)
+            index.by_value.setdefault(_normalize(item["value"]), []).append(position)
+        if computed:
+            self._persist(user_id, index)
+        logfire.debug("Índice de memoria reconstruido: {count} alias ({computed} embeddings nuevos)",
+                      count=len(items), computed=computed)
+        return index
+
+    def get(self, user_id: str) -> UserMemoryIndex:
+        version = self.store.version(user_id)
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None and index.version == version:
+                return index
+            index = self._build(user_id, version, index)
+            self._indexes[user_id] = index
+            return index
+
+    def search(
+        self,
+        user_id: str,
+        alias: Optional[str] = None,
+        type: Optional[str] = None,
+        value: Optional[str] = None,
+        query: Optional[str] = None,
+        limit: int = 3,
+    ) -> List[MemoryResult]:
+        """Filtra por alias/tipo/valor exactos y ordena por similitud con `query` (si hay)."""
+        index = self.get(user_id)
+        candidates: Optional[Set[int]] = None
+        for lookup, term in ((index.by_alias, alias), (index.by_type, type), (index.by_value, value)):
+            if term:
+                matches = set(lookup.get(_normalize(term), ()))
+                candidates = matches if candidates is None else candidates & matches
+        positions = sorted(candidates) if candidates is not None else list(range(len(index.items)))
+        if not positions:
+            return []
+
+        if query:
+            scores = index.matrix[positions] @ embed_text(query, self.dims)
+            order = np.argsort(-scores)[:limit]
+            positions = [positions[i] for i in order if scores[i] >= self.min_score]
+        else:
+            positions = positions[:limit]
+
+        return [
+            MemoryResult(
+                memory_id=index.items[i]["memory_id"] or "PENDING",
+                alias=index.items[i]["alias"],
+                value=index.items[i]["value"],
+                type=index.items[i]["type"],
+                context=index.items[i]["context"],
+                extra=index.items[i]["extra"],
+            )
+            for i in positions
+        ]
+
+
+# Instancia global
+memory_index = MemoryIndex(
+    store=memory_store,
+    index_dir=settings.MEMORY_INDEX_DIR,
+    dims=settings.MEMORY_INDEX_DIMS,
+    min_score=settings.MEMORY_INDEX_MIN_SCORE,
+)
@@ -0,0 +1,246 @@
+# tools/memory_service.py
+"""
+Servicio de memoria del usuario: lecturas locales inmediatas y escrituras diferidas a Mem0.
+
+- Lecturas: los alias salen del almacén local (`config/memory_store.py`), sin
+  llamadas remotas en el turno del chat.
+- Escrituras: se guardan localmente como pendientes y una tarea en el loop de fondo
+  las envía a Mem0 por lotes, con reintentos y backoff. Las que agotan los
+  reintentos quedan pendientes para la próxima pasada.
+
+Desde el loop de fondo (compartido por todos los usuarios) el almacén SQLite se
+consulta en un hilo, para que un archivo bloqueado no frene a las demás corrutinas.
+- Reconciliación: cada tanto (o a pedido) se leen las memorias de Mem0 por páginas
+  y se fusionan con las locales, sin pisar escrituras que aún no llegaron. Después
+  de la primera lectura completa solo se piden las modificadas desde la marca de
+  agua (`updated_at`) guardada.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+import logfire
+
+from config import settings
+from config.event_loop import app_event_loop
+from config.memory_store import MemoryStore, memory_store
+from tools.mem0_tools import _mem0_add, _precargar_memoria_fallback_search, fetch_memory_page, mem0_client
+
+
+class MemoryService:
+    def __init__(
+        self,
+        store: MemoryStore,
+        batch_size: int,
+        batch_delay_seconds: float,
+        max_retries: int,
+        reconcile_interval_seconds: float,
+        page_size: int,
+        max_pages: int,
+    ):
+        self.store = store
+        self.batch_size = max(1, batch_size)
+        self.batch_delay_seconds = batch_delay_seconds
+        self.max_retries = max(1, max_retries)
+        self.reconcile_interval_seconds = reconcile_interval_seconds
+        self.page_size = max(1, page_size)
+        self.max_pages = max(1, max_pages)
+        self._lock = threading.Lock()
+        self._flush_scheduled = False
+        # Un `save` llegó mientras había una pasada en curso: esta vuelve a consultar antes de terminar
+        self._flush_requested = False
+        self._reconciling: Set[str] = set()
+
+    # --- Lecturas (locales) ---
+
+    def get_aliases(self, user_id: str) -> Dict[str, str]:
+        return {item["alias"]: item["value"] for item in self.store.get_aliases(user_id)}
+
+    # --- Escrituras (diferidas) ---
+
+    def save(self, user_id: str, alias: str, value: str, type: Optional[str] = None,
+             context: Optional[str] = None, extra: Optional[Dict[str, Any]] = None) -> None:
+        """Guarda el alias localmente y programa su envío a Mem0 sin esperar la respuesta."""
+        self.store.save_pending(user_id, alias, value, type=type, context=context, extra=extra)
+        logfire.info("Alias '{alias}' guardado localmente; envío a Mem0 en segundo plano", alias=alias)
+        self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        with self._lock:
+            if self._flush_scheduled:
+                self._flush_requested = True
+                return
+            self._flush_scheduled = True
+        app_event_loop.submit(self._flush())
+
+    async def _write_one(self, item: Dict[str, Any]) -> bool:
+        for attempt in range(self.max_retries):
+            try:
+                memory_id = await _mem0_add(item["owner"], item["alias"], item["value"], type=item["type"],
+                                            context=item["context"], extra=item["extra"])
+                if memory_id != "ERROR":
+                    await asyncio.to_thread(self.store.mark_synced, item["owner"], item["alias"],
+                                            item["updated_at"], memory_id)
+                    return True
+            except Exception as e:
+                logfire.warn("Envío de alias '{alias}' a Mem0 falló (intento {attempt}): {error}",
+                             alias=item["alias"], attempt=attempt + 1, error=str(e))
+            if attempt + 1 < self.max_retries:
+                await asyncio.sleep(min(30.0, 0.5 * 2 ** attempt))
+        await asyncio.to_thread(self.store.mark_failed, item["owner"], item["alias"], item["updated_at"])
+        return False
+
+    async def _flush(self) -> None:
+        """Envía las escrituras pendientes por lotes hasta vaciar la cola (o solo quedar fallidas)."""
+        await asyncio.sleep(self.batch_delay_seconds)
+        failed: Set[Tuple[str, str, float]] = set()
+        drained = interrupted = False
+        try:
+            while True:
+                with self._lock:
+                    self._flush_requested = False
+                rows = [] if mem0_client is None else \
+                    await asyncio.to_thread(self.store.get_pending, self.batch_size + len(failed))
+                pending = [
+                    item for item in rows if (item["owner"], item["alias"], item["updated_at"]) not in failed
+                ][:self.batch_size]
+                if not pending:
+                    with self._lock:
+                        if self._flush_requested:
+                            continue
+                        # Se libera bajo el lock: un `save` posterior programa su propia pasada
+                        self._flush_scheduled = False
+                        drained = True
+                        break
+                started_at = time.perf_counter()
+                results = await asyncio.gather(*(self._write_one(item) for item in pending))
+                for item, ok in zip(pending, results):
+                    if not ok:
+                        failed.add((item["owner"], item["alias"], item["updated_at"]))
+                logfire.info("Lote de memoria enviado a Mem0: {ok}/{total} en {elapsed_ms:.0f} ms",
+                             ok=sum(results), total=len(pending), elapsed_ms=(time.perf_counter() - started_at) * 1000)
+        except Exception as e:
+            logfire.error("Envío de memoria a Mem0 interrumpido: {error}", error=str(e))
+            interrupted = True
+        finally:
+            if not drained:
+                with self._lock:
+                    self._flush_scheduled = False
+            # Una cancelación (cierre del loop) no reprograma; un error sí, si quedó algo por enviar
+            if interrupted and await asyncio.to_thread(self._has_pending):
+                self._schedule_flush()
+
+    def _has_pending(self) -> bool:
+        """Si quedan escrituras por enviar; ante un error del almacén se asume que sí."""
+        if mem0_client is None:
+            return False
+        try:
+            return bool(self.store.get_pending(1))
+        except Exception as e:
+            logfire.warn("No se pudo consultar el almacén de memoria: {error}", error=str(e))
+            return True
+
+    # --- Reconciliación ---
+
+    def is_stale(self, user_id: str) -> bool:
+        last = self.store.last_reconciled_at(user_id)
+        return last is None or time.time() - last > self.reconcile_interval_seconds
+
+    async def reconcile(self, user_id: str, force: bool = False,
+                        first_page: Optional[threading.Event] = None) -> int:
+        """
+        Fusiona en el almacén local las memorias de Mem0 del usuario, página por página.
+        Con marca de agua (y sin `force`) solo pide las modificadas desde la última lectura.
+        `first_page` se activa apenas la primera página está en el almacén. Retorna cuántos
+        alias se incorporaron.
+        """
+        try:
+            if mem0_client is None or (not force and not await asyncio.to_thread(self.is_stale, user_id)):
+                return 0
+            with self._lock:
+                if user_id in self._reconciling:
+                    return 0
+                self._reconciling.add(user_id)
+            try:
+                return await self._reconcile_pages(user_id, force, first_page)
+            finally:
+                with self._lock:
+                    self._reconciling.discard(user_id)
+                # Reintentar escrituras que hayan quedado pendientes
+                self._schedule_flush()
+        finally:
+            if first_page is not None:
+                first_page.set()
+
+    async def _reconcile_pages(self, user_id: str, force: bool, first_page: Optional[threading.Event]) -> int:
+        since = None if force else await asyncio.to_thread(self.store.remote_watermark, user_id)
+        watermark: Optional[str] = None
+        merged = pages = 0
+        for page in range(1, self.max_pages + 1):
+            memory_page = await fetch_memory_page(user_id, page, self.page_size, updated_since=since)
+            if memory_page.status != "ok":
+                if pages == 0 and since is None:
+                    return await self._reconcile_fallback(user_id)
+                logfire.warn("Reconciliación de memoria interrumpida en la página {page} para {user}: {status}",
+                             page=page, user=user_id, status=memory_page.status)
+                # Sin marca de agua nueva: la próxima pasada vuelve a pedir desde la anterior
+                await asyncio.to_thread(self.store.mark_reconciled, user_id)
+                return merged
+            pages += 1
+            merged += await asyncio.to_thread(self.store.merge_remote, user_id,
+                                              [item.model_dump() for item in memory_page.results],
+                                              protect_seconds=self.reconcile_interval_seconds)
+            if memory_page.watermark and (watermark is None or memory_page.watermark > watermark):
+                watermark = memory_page.watermark
+            if first_page is not None:
+                first_page.set()
+            if not memory_page.has_more:
+                break
+        else:
+            logfire.warn("Reconciliación de memoria cortada tras {pages} páginas para {user}",
+                         pages=self.max_pages, user=user_id)
+        await asyncio.to_thread(self.store.mark_reconciled, user_id, watermark)
+        logfire.info("Memoria reconciliada para {user} ({mode}): {count} alias en {pages} páginas",
+                     user=user_id, mode="completa" if since is None else "incremental", count=merged, pages=pages)
+        return merged
+
+    async def _reconcile_fallback(self, user_id: str) -> int:
+        """Lectura completa por búsqueda semántica cuando get_all paginado no está disponible."""
+        result = await _precargar_memoria_fallback_search(user_id, self.page_size * self.max_pages)
+        # Se registra el intento (sin marca de agua) para no consultar Mem0 en cada rerun
+        await asyncio.to_thread(self.store.mark_reconciled, user_id)
+        if result.status != "ok":
+            logfire.warn("Reconciliación de memoria sin datos para {user}: {status}", user=user_id, status=result.status)
+            return 0
+        return await asyncio.to_thread(self.store.merge_remote, user_id, [item.model_dump() for item in result.results],
+                                       protect_seconds=self.reconcile_interval_seconds)
+
+    def preload(self, user_id: str, force: bool = False, first_page_timeout: Optional[float] = None) -> None:
+        """
+        Reconcilia en el loop de fondo y bloquea solo hasta que la primera página está en
+        el almacén local (o vence `first_page_timeout`); el resto sigue en segundo plano.
+        """
+        first_page = threading.Event()
+        app_event_loop.submit(self.reconcile(user_id, force=force, first_page=first_page))
+        if not first_page.wait(first_page_timeout):
+            logfire.warn("Primera página de memoria no llegó en {timeout}s; se sigue en segundo plano",
+                         timeout=first_page_timeout)
+
+    def schedule_reconcile(self, user_id: str) -> None:
+        """Reconcilia en segundo plano si el almacén local está desactualizado."""
+        if mem0_client is not None and self.is_stale(user_id):
+            app_event_loop.submit(self.reconcile(user_id))
+
+
+# Instancia global
+memory_service = MemoryService(
+    store=memory_store,
+    batch_size=settings.MEMORY_WRITE_BATCH_SIZE,
+    batch_delay_seconds=settings.MEMORY_WRITE_BATCH_DELAY_SECONDS,
+    max_retries=settings.MEMORY_WRITE_MAX_RETRIES,
+    reconcile_interval_seconds=settings.MEMORY_RECONCILE_INTERVAL_SECONDS,
+    page_size=settings.MEMORY_PRELOAD_PAGE_SIZE,
+    max_pages=settings.MEMORY_PRELOAD_MAX_PAGES,
+)
@@ -0,0 +1,243 @@
+# tools/worklog_aggregation.py
+"""
+Motor de agregación de worklogs sobre un conjunto de issues (JQL o issue padre).
+
+1. Recorre la búsqueda JQL pidiendo `summary` y `worklog`: Jira incluye hasta ~20
+   worklogs por issue en la respuesta, así que la mayoría no necesita más llamadas.
+2. Solo para los issues con más worklogs que los incluidos, descarga el resto en
+   paralelo (concurrencia acotada) siguiendo la paginación del endpoint de worklogs.
+3. Reduce todo a totales por usuario, por día y por issue.
+"""
+
+import asyncio
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import logfire
+from pydantic import BaseModel
+
+from agent_core.atlassian_async import AsyncJiraClient
+from config import settings
+from config.settings import parse_datetime_robust
+
+
+class WorklogTotals(BaseModel):
+    key: str  # accountId, fecha (YYYY-MM-DD) o clave del issue según la agrupación
+    label: Optional[str] = None  # Nombre visible del usuario o resumen del issue
+    hours: float
+    seconds: int
+    entries: int
+
+
+class WorklogAggregationReport(BaseModel):
+    scope: str
+    issues_scanned: int
+    issues_with_worklogs: int
+    total_hours: float
+    total_seconds: int
+    total_entries: int
+    by_user: List[WorklogTotals]
+    by_day: List[WorklogTotals]
+    by_issue: List[WorklogTotals]
+    truncated: bool = False
+    errors: List[str] = []
+
+
+@dataclass
+class WorklogFilter:
+    """Filtros opcionales sobre autor y rango de fechas (inclusive)."""
+    user: Optional[str] = None
+    date_from: Optional[date] = None
+    date_to: Optional[date] = None
+
+    def matches_author(self, author: Dict[str, Any]) -> bool:
+        if not self.user:
+            return True
+        target = self.user.lower()
+        return any(
+            (author.get(attr) or "").lower() == target
+            for attr in ("accountId", "name", "displayName", "emailAddress")
+        )
+
+    def matches_day(self, day: Optional[date]) -> bool:
+        if day is None:
+            return self.date_from is None and self.date_to is None
+        if self.date_from and day < self.date_from:
+            return False
+        if self.date_to and day > self.date_to:
+            return False
+        return True
+
+
+def worklog_day(started: Optional[str]) -> Optional[date]:
+    """Día local (zona horaria configurada) en que comenzó el worklog."""
+    if not started:
+        return None
+    try:
+        return parse_datetime_robust(started, fallback_to_now=False).date()
+    except ValueError:
+        try:
+            return date.fromisoformat(started[:10])
+        except ValueError:
+            return None
+
+
+class _Accumulator:
+    def __init__(self):
+        self.seconds: Dict[str, int] = defaultdict(int)
+        self.entries: Dict[str, int] = defaultdict(int)
+        self.labels: Dict[str, str] = {}
+
+    def add(self, key: str, seconds: int, label: Optional[str] = None) -> None:
+        self.seconds[key] += seconds
+        self.entries[key] += 1
+        if label and key not in self.labels:
+            self.labels[key] = label
+
+    def totals(self, sort_by_key: bool = False) -> List[WorklogTotals]:
+        keys = sorted(self.seconds) if sort_by_key else sorted(self.seconds, key=lambda k: -self.seconds[k])
+        return [
+            WorklogTotals(
+                key=key,
+                label=self.labels.get(key),
+                hours=round(self.seconds[key] / 3600, 2),
+                seconds=self.seconds[key],
+                entries=self.entries[key],
+            )
+            for key in keys
+        ]
+
+
+def reduce_worklogs(
+    scope: str,
+    issues: Dict[str, str],
+    worklogs_by_issue: Dict[str, Iterable[Dict[str, Any]]],
+    worklog_filter: Optional[WorklogFilter] = None,
+    truncated: bool = False,
+    errors: Optional[List[str]] = None,
+) -> WorklogAggregationReport:
+    """Reduce worklogs crudos (por issue) a totales por usuario, día e issue."""
+    worklog_filter = worklog_filter or WorklogFilter()
+    by_user, by_day, by_issue = _Accumulator(), _Accumulator(), _Accumulator()
+    total_seconds = 0
+    total_entries = 0
+
+    for issue_key, worklogs in worklogs_by_issue.items():
+        for worklog in worklogs:
+            author = worklog.get("author") or {}
+            if not worklog_filter.matches_author(author):
+                continue
+            day = worklog_day(worklog.get("started"))
+            if not worklog_filter.matches_day(day):
+                continue
+            seconds = int(worklog.get("timeSpentSeconds") or 0)
+            user_key = author.get("accountId") or author.get("name") or author.get("displayName") or "desconocido"
+            by_user.add(user_key, seconds, author.get("displayName"))
+            by_day.add(day.isoformat() if day else "sin-fecha", seconds)
+            by_issue.add(issue_key, seconds, issues.get(issue_key))
+            total_seconds += seconds
+            total_entries += 1
+
+    return WorklogAggregationReport(
+        scope=scope,
+        issues_scanned=len(issues),
+        issues_with_worklogs=len(by_issue.seconds),
+        total_hours=round(total_seconds / 3600, 2),
+        total_seconds=total_seconds,
+        total_entries=total_entries,
+        by_user=by_user.totals(),
+        by_day=by_day.totals(sort_by_key=True),
+        by_issue=by_issue.totals(),
+        truncated=truncated,
+        errors=errors or [],
+    )
+
+
+async def _collect_issues(
+    jira: AsyncJiraClient,
+    jql: str,
+    max_issues: int,
+    issues: Dict[str, str],
+    inline_worklogs: Dict[str, List[Dict[str, Any]]],
+    incomplete: List[str],
+) -> int:
+    """Recorre la búsqueda JQL guardando resumen y worklogs incluidos. Retorna issues leídos."""
+    count = 0
+    async for issue in jira.iter_jql(jql, fields=["summary", "worklog"], max_results=max_issues):
+        key = issue.get("key")
+        if not key or key in issues:
+            continue
+        count += 1
+        fields = issue.get("fields", {})
+        issues[key] = fields.get("summary")
+        worklog_field = fields.get("worklog") or {}
+        embedded = worklog_field.get("worklogs", [])
+        inline_worklogs[key] = embedded
+        if worklog_field.get("total", 0) > len(embedded):
+            incomplete.append(key)
+    return count
+
+
+async def aggregate_worklogs(
+    jira: AsyncJiraClient,
+    jql: Optional[str] = None,
+    parent_key: Optional[str] = None,
+    worklog_filter: Optional[WorklogFilter] = None,
+    max_issues: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> WorklogAggregationReport:
+    """
+    Agrega los worklogs de todos los issues de `jql`, o del árbol de `parent_key`
+    (el issue, sus hijos y los hijos de sus hijos, ej. épica → historias → subtareas).
+    """
+    if not jql and not parent_key:
+        raise ValueError("Se requiere una consulta JQL o la clave de un issue padre.")
+    max_issues = max_issues or settings.WORKLOG_AGGREGATION_MAX_ISSUES
+    concurrency = max(1, concurrency or settings.WORKLOG_FETCH_CONCURRENCY)
+
+    issues: Dict[str, str] = {}
+    worklogs_by_issue: Dict[str, List[Dict[str, Any]]] = {}
+    incomplete: List[str] = []
+    errors: List[str] = []
+
+    with logfire.span("worklog_aggregation.collect_issues", jql=jql, parent_key=parent_key):
+        if jql:
+            scope = jql
+            await _collect_issues(jira, jql, max_issues, issues, worklogs_by_issue, incomplete)
+        else:
+            parent_key = parent_key.strip().upper()
+            scope = f"árbol de {parent_key}"
+            await _collect_issues(jira, f"key = {parent_key} OR parent = {parent_key}",
+                                  max_issues, issues, worklogs_by_issue, incomplete)
+            # Segundo nivel: subtareas de los hijos directos, en bloques para no exceder el largo del JQL
+            level = [key for key in issues if key != parent_key]
+            chunk_size = max(1, settings.JIRA_BATCH_CHUNK_SIZE)
+            for i in range(0, len(level), chunk_size):
+                if len(issues) >= max_issues:
+                    break
+                chunk = level[i:i + chunk_size]
+                await _collect_issues(jira, f"parent in ({', '.join(chunk)})",
+                                      max_issues - len(issues), issues, worklogs_by_issue, incomplete)
+
+    truncated = len(issues) >= max_issues
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _fetch_all(issue_key: str) -> None:
+        async with semaphore:
+            try:
+                worklogs_by_issue[issue_key] = [w async for w in jira.iter_issue_worklogs(issue_key)]
+            except Exception as e:
+                # Conservar los worklogs incluidos en la búsqueda y reportar el faltante
+                errors.append(f"{issue_key}: {e}")
+
+    if incomplete:
+        with logfire.span("worklog_aggregation.fetch_worklogs", issues=len(incomplete), concurrency=concurrency):
+            await asyncio.gather(*(_fetch_all(key) for key in incomplete))
+
+    report = reduce_worklogs(scope, issues, worklogs_by_issue, worklog_filter, truncated, errors)
+    logfire.info("Agregación de worklogs: {issues} issues, {entries} worklogs, {hours}h ({extra} con paginación extra)",
+                 issues=report.issues_scanned, entries=report.total_entries,
+                 hours=report.total_hours, extra=len(incomplete))
+    return report
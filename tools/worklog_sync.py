@@ -0,0 +1,147 @@
+# tools/worklog_sync.py
+"""
+Sincronización incremental de worklogs hacia el almacén local.
+
+En lugar de consultar los worklogs de cada issue en cada pregunta, se sigue el
+feed `worklog/updated?since=` desde la última marca de agua, se descargan los
+worklogs cambiados en bloques de hasta 1000 con `worklog/list` y se aplican las
+eliminaciones de `worklog/deleted`. Las lecturas usan el almacén local cuando
+está al día y cubre la fecha de creación del issue; si no, vuelven a la API y la
+sincronización se lanza en segundo plano para las próximas.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional, Set
+
+import logfire
+
+from agent_core.atlassian_async import AsyncJiraClient
+from config import settings
+from config.settings import parse_datetime_robust
+from config.worklog_store import worklog_store
+
+# Máximo de IDs aceptados por POST /worklog/list
+WORKLOG_LIST_MAX_IDS = 1000
+
+_sync_locks: Dict[str, threading.Lock] = {}
+_sync_locks_guard = threading.Lock()
+_background_syncs: Set[asyncio.Task] = set()
+
+
+def _owner_lock(owner: str) -> threading.Lock:
+    with _sync_locks_guard:
+        return _sync_locks.setdefault(owner, threading.Lock())
+
+
+async def _fetch_worklogs_by_id(jira: AsyncJiraClient, ids: List[int]) -> List[Dict[str, Any]]:
+    worklogs: List[Dict[str, Any]] = []
+    for i in range(0, len(ids), WORKLOG_LIST_MAX_IDS):
+        worklogs.extend(await jira.worklog_list(ids[i:i + WORKLOG_LIST_MAX_IDS]))
+    return worklogs
+
+
+async def sync_worklogs(jira: AsyncJiraClient) -> int:
+    """
+    Sincroniza el almacén local del usuario del cliente. Retorna los worklogs
+    actualizados, o -1 si ya había una sincronización en curso para ese usuario.
+    """
+    owner = jira.username
+    lock = _owner_lock(owner)
+    if not lock.acquire(blocking=False):
+        return -1
+    try:
+        with logfire.span("worklog_sync.sync", owner=owner):
+            state = await asyncio.to_thread(worklog_store.get_sync_state, owner)
+            if state:
+                since = state["watermark_ms"]
+                covered_since = state["covered_since_ms"]
+                # Eliminaciones primero, sin mover la marca de agua: si algo falla no se pierden
+                deleted_since = since
+                while True:
+                    page = await jira.worklog_deleted_since(deleted_since)
+                    deleted_ids = [v["worklogId"] for v in page.get("values", [])]
+                    if deleted_ids:
+                        await asyncio.to_thread(worklog_store.apply_changes, owner, [], deleted_ids, since, covered_since)
+                    deleted_since = page.get("until", deleted_since)
+                    if page.get("lastPage", True) or not deleted_ids:
+                        break
+            else:
+                days = settings.WORKLOG_SYNC_INITIAL_DAYS
+                since = int((time.time() - days * 86400) * 1000) if days > 0 else 0
+                covered_since = since
+
+            updated = 0
+            while True:
+                page = await jira.worklog_updated_since(since)
+                ids = [v["worklogId"] for v in page.get("values", [])]
+                worklogs = await _fetch_worklogs_by_id(jira, ids) if ids else []
+                since = page.get("until", since)
+                updated += await asyncio.to_thread(worklog_store.apply_changes, owner, worklogs, [], since, covered_since)
+                if page.get("lastPage", True) or not ids:
+                    break
+
+            logfire.info("Sincronización de worklogs para {owner}: {count} actualizados, marca de agua {watermark}",
+                         owner=owner, count=updated, watermark=since)
+            return updated
+    finally:
+        lock.release()
+
+
+async def _sync_in_background(jira: AsyncJiraClient) -> None:
+    try:
+        await sync_worklogs(jira)
+    except Exception as e:
+        logfire.warn("No se pudo sincronizar worklogs para {owner}: {error}", owner=jira.username, error=str(e))
+
+
+def schedule_sync(jira: AsyncJiraClient) -> None:
+    """Lanza la sincronización del usuario en segundo plano (en el loop del cliente), salvo que ya esté en curso."""
+    if _owner_lock(jira.username).locked():
+        return
+    task = asyncio.get_running_loop().create_task(_sync_in_background(jira))
+    # Referencia fuerte hasta que termine (el loop solo guarda referencias débiles a las tareas)
+    _background_syncs.add(task)
+    task.add_done_callback(_background_syncs.discard)
+
+
+def _created_ms(issue_data: Dict[str, Any]) -> Optional[int]:
+    created = issue_data.get("fields", {}).get("created")
+    if not created:
+        return None
+    try:
+        return int(parse_datetime_robust(created, fallback_to_now=False).timestamp() * 1000)
+    except ValueError:
+        return None
+
+
+async def get_issue_worklogs_local_first(
+    jira: AsyncJiraClient,
+    issue_data: Dict[str, Any],
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Worklogs del issue (proyección `worklog_scope`) desde el almacén local, con la
+    forma de la API. Retorna None si el almacén no puede responder con certeza.
+    """
+    if not settings.WORKLOG_SYNC_ENABLED or not issue_data.get("id"):
+        return None
+    owner = jira.username
+    state = await asyncio.to_thread(worklog_store.get_sync_state, owner)
+    if not state or time.time() - state["last_sync_at"] > settings.WORKLOG_SYNC_MAX_STALENESS_SECONDS:
+        # La sincronización (en la primera, días de historia de toda la instancia) no se espera
+        # dentro de una herramienta de un solo issue: mientras corre, se usa la API por issue
+        schedule_sync(jira)
+        return None
+
+    created_ms = _created_ms(issue_data)
+    if created_ms is None or created_ms < state["covered_since_ms"]:
+        # El issue es anterior a la historia sincronizada: puede tener worklogs que no están
+        return None
+    return await asyncio.to_thread(worklog_store.get_issue_worklogs, owner, issue_data["id"])
+
+
+async def record_written_worklog(jira_username: str, worklog_data: Dict[str, Any]) -> None:
+    """Refleja en el almacén un worklog recién creado (el feed no incluye el último minuto)."""
+    if settings.WORKLOG_SYNC_ENABLED and jira_username and worklog_data:
+        await asyncio.to_thread(worklog_store.upsert_worklogs, jira_username, [worklog_data])
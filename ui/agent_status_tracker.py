@@ -1,6 +1,6 @@
 # ui/agent_status_tracker.py
 import streamlit as st
-from typing import Optional
+from typing import List, Optional
 from dataclasses import dataclass
 
 @dataclass
@@ -16,10 +16,12 @@ class AgentStatusDisplay:
     
     def __init__(self):
         self.current_status: Optional[CurrentStatus] = None
+        self.running_tools: List[str] = []
     
     def reset(self):
         """Reinicia el display."""
         self.current_status = None
+        self.running_tools = []
     
     def update_status(self, action: str, icon: str, details: str, is_running: bool = True):
         """Actualiza el estado actual."""
@@ -38,10 +40,62 @@ class AgentStatusDisplay:
         """Finaliza el procesamiento."""
         self.update_status(message, "✅", "Respuesta generada exitosamente", False)
     
+    def tool_started(self, tool_name: str):
+        """Registra el inicio de una herramienta (evento del streaming del agente)."""
+        self.running_tools.append(tool_name)
+        display_name = tool_name.replace('_', ' ').title()
+        self.update_status("Ejecutando herramienta", get_tool_icon(tool_name), f"Usando {display_name}", True)
+    
+    def tool_finished(self, tool_name: str):
+        """Registra el fin de una herramienta; si no quedan otras en curso, vuelve al análisis."""
+        if tool_name in self.running_tools:
+            self.running_tools.remove(tool_name)
+        if self.running_tools:
+            self.tool_started(self.running_tools.pop())
+        else:
+            self.update_status("Analizando consulta", "🤔", "Procesando resultados...", True)
+    
     def get_current_status(self) -> Optional[CurrentStatus]:
         """Obtiene el estado actual."""
         return self.current_status
 
+# Iconos por familia de herramienta (coincidencia por subcadena del nombre)
+TOOL_ICONS = {
+    "worklog": "⏱️",
+    "comment": "💬",
+    "transition": "🔀",
+    "confluence": "📚",
+    "page": "📄",
+    "memory": "🧠",
+    "sprint": "🏃",
+    "jira": "🎫",
+    "issue": "🎫",
+    "user": "👤",
+    "format": "📝",
+}
+
+# Nombres cortos usados por track_tool_execution
+TOOL_ICONS_BY_NAME = {
+    "jira_search": "🎫",
+    "jira_details": "📋",
+    "jira_comment": "💬",
+    "jira_worklog": "⏱️",
+    "confluence_search": "📚",
+    "confluence_content": "📄",
+    "save_memory": "💾",
+    "search_memory": "🔍"
+}
+
+def get_tool_icon(tool_name: str) -> str:
+    """Icono para una herramienta según su nombre."""
+    if tool_name in TOOL_ICONS_BY_NAME:
+        return TOOL_ICONS_BY_NAME[tool_name]
+    lowered = tool_name.lower()
+    for fragment, icon in TOOL_ICONS.items():
+        if fragment in lowered:
+            return icon
+    return "🔧"
+
 # Instancia global
 status_display = AgentStatusDisplay()
 
@@ -145,18 +199,7 @@ def track_memory_search(query: str = ""):
 
 def track_tool_execution(tool_name: str):
     """Trackea la ejecución de una herramienta."""
-    tool_icons = {
-        "jira_search": "🎫",
-        "jira_details": "📋", 
-        "jira_comment": "💬",
-        "jira_worklog": "⏱️",
-        "confluence_search": "📚",
-        "confluence_content": "📄",
-        "save_memory": "💾",
-        "search_memory": "🔍"
-    }
-    
-    icon = tool_icons.get(tool_name, "🔧")
+    icon = get_tool_icon(tool_name)
     display_name = tool_name.replace('_', ' ').title()
     update_agent_status("Ejecutando herramienta", icon, f"Usando {display_name}")
 
@@ -1,26 +1,140 @@
 # ui/agent_wrapper.py
 import asyncio
 import inspect
-from typing import Any, Dict, List
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+from pydantic_ai import Agent
+from pydantic_ai.messages import (
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    PartDeltaEvent,
+    PartStartEvent,
+    TextPart,
+    SystemPromptPart,
+    TextPartDelta,
+)
 from agent_core.main_agent import main_agent
+from agent_core.intent_router import intent_router
+from agent_core.model_tiering import ROUTING_TIER, SINGLE_TIER, model_tiers, record_model_usage
+from agent_core.response_cache import response_cache
+from config import settings
 import logfire
 
+@dataclass
+class AgentStreamEvent:
+    """Evento emitido durante una ejecución en streaming."""
+    kind: str  # "text", "tool_start", "tool_end" o "done"
+    text: str = ""
+    tool_name: Optional[str] = None
+    result: Any = None  # AgentRunResult, solo en el evento "done"
+
 class SimpleAgentWrapper:
     """Wrapper simplificado para el agente - sin tracking automático de herramientas."""
-    
+
     def __init__(self, original_agent):
         self.original_agent = original_agent
-    
-    async def run(self, prompt: str, message_history: List = None):
-        """Ejecuta el agente de forma simple."""
+
+    async def _try_fast_path(self, user_prompt: str, message_history: List = None):
+        """Comandos triviales resueltos sin LLM (ver agent_core/intent_router.py)."""
+        routed = await intent_router.try_route(user_prompt, message_history)
+        if routed is not None and not message_history:
+            # Primer turno: el system prompt viaja en el primer request del historial
+            system_parts = [SystemPromptPart(content=p) for p in getattr(self.original_agent, "_system_prompts", ())]
+            first = routed.messages[0]
+            first.parts = system_parts + list(first.parts)
+        return routed
+
+    @staticmethod
+    def _record_single_tier_usage(started_at: float, usage) -> None:
+        record_model_usage(SINGLE_TIER, settings.PYDANTIC_AI_MODEL, (time.perf_counter() - started_at) * 1000,
+                           usage.request_tokens or 0, usage.response_tokens or 0)
+
+    async def run(self, prompt: str, message_history: List = None, user_prompt: Optional[str] = None):
+        """
+        Ejecuta el agente de forma simple. `prompt` puede incluir el contexto de memoria;
+        `user_prompt` es el mensaje tal como lo escribió el usuario (por defecto, `prompt`).
+        """
         try:
+            if model_tiers.enabled:
+                # En dos niveles el modelo se elige antes de cada request: se conduce nodo a nodo
+                async for event in self.run_stream(prompt, message_history, user_prompt=user_prompt):
+                    if event.kind == "done":
+                        return event.result
+            routed = await self._try_fast_path(prompt if user_prompt is None else user_prompt, message_history)
+            if routed is not None:
+                return routed
+            cached = response_cache.get(prompt, message_history)
+            if cached is not None:
+                return cached
             logfire.info("Ejecutando agente con prompt", prompt_length=len(prompt))
+            started_at = time.perf_counter()
             result = await self.original_agent.run(prompt, message_history=message_history or [])
             logfire.info("Agente completado exitosamente")
+            self._record_single_tier_usage(started_at, result.usage())
+            response_cache.record(prompt, message_history, result)
             return result
         except Exception as e:
             logfire.error(f"Error en ejecución del agente: {e}", exc_info=True)
             raise
 
+    async def run_stream(
+        self,
+        prompt: str,
+        message_history: List = None,
+        user_prompt: Optional[str] = None,
+    ) -> AsyncIterator[AgentStreamEvent]:
+        """
+        Ejecuta el agente nodo a nodo (`Agent.iter`) emitiendo el texto a medida que
+        llega del modelo y el inicio/fin de cada herramienta. El último evento es
+        "done" con el resultado completo (para `new_messages()`). `user_prompt` como en `run`.
+        """
+        try:
+            routed = await self._try_fast_path(prompt if user_prompt is None else user_prompt, message_history)
+            if routed is not None:
+                yield AgentStreamEvent("text", text=routed.output)
+                yield AgentStreamEvent("done", result=routed)
+                return
+            cached = response_cache.get(prompt, message_history)
+            if cached is not None:
+                yield AgentStreamEvent("text", text=cached.output)
+                yield AgentStreamEvent("done", result=cached)
+                return
+            logfire.info("Ejecutando agente en streaming", prompt_length=len(prompt))
+            tiered = model_tiers.start_run() if model_tiers.enabled else None
+            started_at = time.perf_counter()
+            run_model = model_tiers.model_for(ROUTING_TIER) if tiered else None
+            async with self.original_agent.iter(prompt, message_history=message_history or [], model=run_model) as agent_run:
+                async for node in agent_run:
+                    if Agent.is_model_request_node(node):
+                        if tiered:
+                            # Modelo de este request según los resultados de herramientas acumulados
+                            agent_run.ctx.deps.model = model_tiers.model_for(tiered.observe_request(node.request))
+                            tiered.request_started(agent_run.usage())
+                        async with node.stream(agent_run.ctx) as request_stream:
+                            async for event in request_stream:
+                                if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+                                    if event.part.content:
+                                        yield AgentStreamEvent("text", text=event.part.content)
+                                elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                                    yield AgentStreamEvent("text", text=event.delta.content_delta)
+                        if tiered:
+                            tiered.request_finished(agent_run.usage())
+                    elif Agent.is_call_tools_node(node):
+                        async with node.stream(agent_run.ctx) as tools_stream:
+                            async for event in tools_stream:
+                                if isinstance(event, FunctionToolCallEvent):
+                                    yield AgentStreamEvent("tool_start", tool_name=event.part.tool_name)
+                                elif isinstance(event, FunctionToolResultEvent):
+                                    yield AgentStreamEvent("tool_end", tool_name=event.result.tool_name)
+            logfire.info("Agente completado exitosamente (streaming)")
+            if not tiered:
+                self._record_single_tier_usage(started_at, agent_run.usage())
+            response_cache.record(prompt, message_history, agent_run.result)
+            yield AgentStreamEvent("done", result=agent_run.result)
+        except Exception as e:
+            logfire.error(f"Error en ejecución del agente: {e}", exc_info=True)
+            raise
+
 # Crear la instancia simplificada del agente
-simple_agent = SimpleAgentWrapper(main_agent) 
\ No newline at end of file
+simple_agent = SimpleAgentWrapper(main_agent)
@@ -1,10 +1,12 @@
 # ui/app.py
 import streamlit as st
-import asyncio
 import logfire
 from config import settings
 # Nuevas importaciones para BD y cifrado
 from config.user_credentials_db import user_credentials_db
+from config.worklog_store import worklog_store
+from config.event_loop import app_event_loop, run_async
+from config.request_context import set_request_context
 from config.encryption import credential_encryption
 # NUEVO: Sistema de logging robusto con contexto de usuario
 from config.logging_context import (
@@ -12,13 +14,19 @@ from config.logging_context import (
 )
 # Servicio de autenticación centralizado
 from config.auth_service import AuthService
+from agent_core.jira_instances import invalidate_jira_client
+from agent_core.confluence_instances import invalidate_confluence_client
+from agent_core.atlassian_async import invalidate_async_clients
 from ui.agent_wrapper import simple_agent # Importamos nuestro agente simplificado
+from agent_core.history_manager import history_manager
 from pydantic_ai.messages import UserPromptPart, TextPart, ModelMessage # Para el historial
-from typing import List, Dict
-from tools.mem0_tools import search_memory, save_memory, precargar_memoria_completa_usuario
+from typing import List, Dict, Optional
+from tools.mem0_tools import search_memory
+from tools.memory_context import memory_context_selector
+from tools.memory_service import memory_service
 from datetime import datetime
 from ui.custom_styles import apply_custom_title_styles, render_custom_title
-from ui.agent_status_tracker import start_agent_process, render_current_status, track_context_building, track_llm_thinking, track_response_generation, finish_agent_process, status_display
+from ui.agent_status_tracker import start_agent_process, render_current_status, track_context_building, track_response_generation, finish_agent_process, AgentStatusDisplay
 import json
 from pathlib import Path
 import time
@@ -127,6 +135,17 @@ def get_atlassian_credentials_for_user(user_email: str) -> tuple[str, str]:
         logger.error("credentials_retrieval_failed", error=e, user_email=user_email)
         return "", ""
 
+def invalidar_clientes_atlassian(atlassian_username: str):
+    """Descarta los clientes Jira/Confluence cacheados de un usuario tras rotar o borrar su token."""
+    if not atlassian_username:
+        return
+    try:
+        invalidate_jira_client(atlassian_username)
+        invalidate_confluence_client(atlassian_username)
+        invalidate_async_clients(atlassian_username)
+    except Exception as e:
+        logger.warning("client_invalidation_failed", error=e)
+
 @log_operation("save_user_credentials", log_input=False)  # No loguear credenciales en input
 def save_atlassian_credentials_for_user(user_email: str, api_key: str, atlassian_username: str):
     """Guarda las credenciales de Atlassian para un usuario específico en la BD."""
@@ -1290,26 +1309,37 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- FUNCIONES UTILITARIAS ---
-def precargar_memoria_usuario():
-    """Precarga la memoria del usuario desde Mem0 al iniciar la app o cuando se fuerza la recarga."""
+def fijar_contexto_peticion():
+    """
+    Copia usuario y credenciales de la sesión al contexto de la petición, para que las
+    corrutinas ejecutadas en el loop de fondo (sin acceso a st.session_state) los vean.
+    """
+    set_request_context(
+        user_id=AuthService.get_user_id(),
+        atlassian_username=st.session_state.get("atlassian_username"),
+        atlassian_api_key=st.session_state.get("atlassian_api_key"),
+    )
+
+def precargar_memoria_usuario(forzar_sincronizacion: bool = False):
+    """
+    Carga la memoria del usuario desde el almacén local. Solo se espera a Mem0 la primera
+    vez (almacén vacío) o cuando se fuerza, y solo hasta tener la primera página; el resto
+    (y las reconciliaciones periódicas) llega en segundo plano.
+    """
     try:
         # Obtener el usuario actual para logging
         current_user_id = AuthService.get_user_id()
         logfire.info(f"Precargando memoria para usuario: {current_user_id}")
         
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        result = loop.run_until_complete(precargar_memoria_completa_usuario(limit=100))
-        loop.close()
-        
-        memoria = {}
-        if result and hasattr(result, "results") and result.status == "ok":
-            for mem in result.results:
-                if mem.alias and mem.value:
-                    memoria[mem.alias] = mem.value
-            logfire.info(f"Memoria precargada exitosamente para {current_user_id}: {len(memoria)} alias cargados.")
+        fijar_contexto_peticion()
+        memoria = memory_service.get_aliases(current_user_id)
+        if forzar_sincronizacion or (not memoria and memory_service.is_stale(current_user_id)):
+            memory_service.preload(current_user_id, force=True,
+                                   first_page_timeout=settings.MEMORY_PRELOAD_FIRST_PAGE_TIMEOUT_SECONDS)
+            memoria = memory_service.get_aliases(current_user_id)
         else:
-            logfire.warn(f"No se pudo precargar la memoria para {current_user_id}: {result.status if result else 'resultado nulo'}")
+            memory_service.schedule_reconcile(current_user_id)
+        logfire.info(f"Memoria precargada para {current_user_id}: {len(memoria)} alias cargados.")
         
         st.session_state["memoria_usuario"] = memoria
         
@@ -1323,24 +1353,18 @@ def resolver_alias(alias):
     return memoria.get(alias)
 
 def guardar_nuevo_alias(alias, value):
-    """Guarda un nuevo alias tanto en sesión como en Mem0, y fuerza recarga de memoria."""
+    """Guarda un nuevo alias en sesión y en el almacén local; el envío a Mem0 sigue en segundo plano."""
     if "memoria_usuario" not in st.session_state:
         st.session_state["memoria_usuario"] = {}
     st.session_state["memoria_usuario"][alias] = value
     
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    loop.run_until_complete(save_memory(alias=alias, value=value))
-    loop.close()
-    
-    # 🔄 AUTO-RECARGA: Forzar recarga de memoria después de guardar
-    logfire.info(f"Auto-recargando memoria después de guardar alias: {alias}")
-    if "memoria_usuario" in st.session_state:
-        del st.session_state["memoria_usuario"]
-    precargar_memoria_usuario()  # Recargar inmediatamente
+    memory_service.save(AuthService.get_user_id(), alias, value)
 
-def generar_contexto_completo():
-    """Genera un string con información del usuario y memoria para pasarla como contexto al agente."""
+def generar_contexto_completo(prompt: str = ""):
+    """
+    Genera un string con información del usuario y memoria para pasarla como contexto al agente.
+    De la memoria solo se incluyen los alias relevantes para `prompt`, dentro del presupuesto de tokens.
+    """
     contexto_partes = []
     
     # 1. Información del usuario
@@ -1350,13 +1374,12 @@ def generar_contexto_completo():
     if st.session_state.get("usar_contexto_memoria", True):
         memoria = st.session_state.get("memoria_usuario", {})
         if memoria:
-            max_alias = 10
-            memoria_items = list(memoria.items())[:max_alias]
-            alias_lines = [f"'{alias}' → {value}" for alias, value in memoria_items]
+            seleccion = memory_context_selector.select(AuthService.get_user_id(), memoria, prompt)
+            alias_lines = [f"'{alias}' → {value}" for alias, value in seleccion]
             
-            total_alias = len(memoria)
-            if total_alias > max_alias:
-                alias_lines.append(f"... y {total_alias - max_alias} alias más en memoria")
+            restantes = len(memoria) - len(seleccion)
+            if restantes > 0:
+                alias_lines.append(f"... y {restantes} alias más en memoria (consultables con search_memory)")
             
             contexto_partes.append(f"MEMORIA: {', '.join(alias_lines)}")
     
@@ -1366,6 +1389,51 @@ def generar_contexto_memoria():
     """Función legacy - mantener para compatibilidad."""
     return generar_contexto_completo()
 
+def ejecutar_agente_streaming(prompt_con_contexto: str, message_history: List, response_placeholder, status_placeholder,
+                              user_prompt: Optional[str] = None):
+    """
+    Ejecuta el agente en modo streaming: el texto parcial se muestra en el chat a medida
+    que llega y el inicio/fin de cada herramienta se refleja en el indicador de estado.
+    Retorna el resultado final del agente (o None si la ejecución no terminó).
+    """
+    # Un indicador por ejecución: el de módulo lo comparten todas las sesiones del servidor
+    status_display = AgentStatusDisplay()
+    status_display.update_status("Analizando consulta", "🤔", "El agente está procesando la información...")
+    streamed_text = ""
+    last_render = 0.0
+    result = None
+
+    events = app_event_loop.iterate(simple_agent.run_stream(prompt_con_contexto, message_history=message_history,
+                                                            user_prompt=user_prompt))
+    for event in events:
+        if event.kind == "text":
+            if not streamed_text:
+                status_placeholder.empty()
+            streamed_text += event.text
+            # Limitar los repintados para no saturar el websocket con cada token
+            now = time.monotonic()
+            if now - last_render >= settings.AGENT_STREAM_RENDER_INTERVAL_SECONDS:
+                response_placeholder.markdown(streamed_text + "▌")
+                last_render = now
+        elif event.kind == "tool_start":
+            # El texto previo a una herramienta es un preámbulo; la respuesta final lo reemplaza
+            streamed_text = ""
+            response_placeholder.empty()
+            status_display.tool_started(event.tool_name)
+            with status_placeholder.container():
+                render_current_status(status_display)
+        elif event.kind == "tool_end":
+            status_display.tool_finished(event.tool_name)
+            with status_placeholder.container():
+                render_current_status(status_display)
+        elif event.kind == "done":
+            result = event.result
+
+    if streamed_text:
+        response_placeholder.markdown(streamed_text)
+    status_display.finish()
+    return result
+
 # --- INICIALIZACIÓN DEL ESTADO ---
 if "pydantic_ai_messages" not in st.session_state:
     st.session_state.pydantic_ai_messages: List[ModelMessage] = []
@@ -1613,10 +1681,13 @@ with chat_container:
 
 # 💬 MANEJO DEL INPUT - PATRÓN OFICIAL DE STREAMLIT
 if prompt := st.chat_input("💬 Escribe tu consulta aquí...", key="main_chat"):
+    # Generar contexto completo (usuario + memoria) una sola vez: el log refleja lo que se inyecta
+    contexto_completo = generar_contexto_completo(prompt)
+
     # Log de la acción del usuario
     log_user_action("user_query_submitted", 
                    query_length=len(prompt),
-                   has_context=bool(generar_contexto_completo()),
+                   has_context=bool(contexto_completo),
                    query_preview=prompt[:100])  # Solo primeros 100 chars por privacidad
     
     # ✅ PASO 1: Agregar mensaje del usuario al historial INMEDIATAMENTE
@@ -1651,8 +1722,6 @@ if prompt := st.chat_input("💬 Escribe tu consulta aquí...", key="main_chat")
     # ✅ PASO 3: Crear contenedor temporal para mostrar status del agente
     status_placeholder = st.empty()
     
-    # Generar contexto completo (usuario + memoria)
-    contexto_completo = generar_contexto_completo()
     prompt_con_contexto = f"{contexto_completo}\n\n{prompt}" if contexto_completo else prompt
     
     # Log del contexto generado
@@ -1710,25 +1779,45 @@ if prompt := st.chat_input("💬 Escribe tu consulta aquí...", key="main_chat")
             # Ejecutar el agente
             logger.info("agent_execution_starting", 
                        operation_id=operation_id,
-                       execution_method="asyncio")
+                       execution_method="background_loop_stream" if settings.AGENT_STREAMING_ENABLED else "background_loop")
             
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            # Las corrutinas corren en el loop persistente del proceso (pools y clientes se reutilizan)
+            fijar_contexto_peticion()
             
-            result = loop.run_until_complete(simple_agent.run(
-                prompt_con_contexto,
-                message_history=st.session_state.pydantic_ai_messages
-            ))
-            loop.close()
+            if settings.AGENT_STREAMING_ENABLED:
+                # Mostrar la consulta y la respuesta parcial dentro del chat mientras se genera
+                with chat_container:
+                    with st.chat_message("user", avatar="👤"):
+                        st.markdown(prompt)
+                    with st.chat_message("assistant", avatar="🤖"):
+                        response_placeholder = st.empty()
+                result = ejecutar_agente_streaming(
+                    prompt_con_contexto,
+                    st.session_state.pydantic_ai_messages,
+                    response_placeholder,
+                    status_placeholder,
+                    user_prompt=prompt,
+                )
+            else:
+                result = run_async(simple_agent.run(
+                    prompt_con_contexto,
+                    message_history=st.session_state.pydantic_ai_messages,
+                    user_prompt=prompt,
+                ))
             
             # Actualizar historial con los nuevos mensajes del agente
-            st.session_state.pydantic_ai_messages.extend(result.new_messages())
+            if result is not None:
+                st.session_state.pydantic_ai_messages.extend(result.new_messages())
+                # Mantener el historial dentro del presupuesto (resume retornos y turnos antiguos)
+                st.session_state.pydantic_ai_messages = history_manager.compact(st.session_state.pydantic_ai_messages)
+                # Alias que haya guardado el agente: visibles al instante desde el almacén local
+                st.session_state["memoria_usuario"] = memory_service.get_aliases(AuthService.get_user_id())
         
         # Calcular duración total
         agent_duration_ms = (time.time() - agent_start_time) * 1000
         
         # ✅ PASO 4: Mostrar respuesta final y guardar en historial
-        if result.output:
+        if result is not None and result.output:
             # Log de respuesta exitosa
             logger.info("agent_response_generated", 
                        operation_id=operation_id,
@@ -2118,7 +2207,7 @@ with st.sidebar:
                         help="Sincroniza los alias desde el servidor"):
                 if "memoria_usuario" in st.session_state:
                     del st.session_state["memoria_usuario"]
-                precargar_memoria_usuario()  # Recargar
+                precargar_memoria_usuario(forzar_sincronizacion=True)  # Recargar desde Mem0
                 st.rerun()
 
     with col2:
@@ -2165,6 +2254,7 @@ with st.sidebar:
             if st.button("💾 Guardar", use_container_width=True, type="primary"):
                 if new_api_key_input and new_username_input:
                     save_atlassian_credentials_for_user(current_user, new_api_key_input, new_username_input)
+                    invalidar_clientes_atlassian(st.session_state.get("atlassian_username", ""))
                     st.session_state.atlassian_api_key = new_api_key_input
                     st.session_state.atlassian_username = new_username_input
                     st.success("¡Credenciales guardadas!")
@@ -2176,6 +2266,9 @@ with st.sidebar:
         with col_clear:
             if st.button("🗑️ Limpiar", use_container_width=True):
                 save_atlassian_credentials_for_user(current_user, "", "") # Guardar vacío borra
+                invalidar_clientes_atlassian(st.session_state.get("atlassian_username", ""))
+                if st.session_state.get("atlassian_username"):
+                    worklog_store.delete_owner(st.session_state.atlassian_username)
                 st.session_state.atlassian_api_key = ""
                 st.session_state.atlassian_username = ""
                 st.info("Credenciales eliminadas de persistencia.")